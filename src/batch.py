@@ -0,0 +1,813 @@
+import argparse
+import time
+from collections import deque
+from typing import Dict, List, Optional
+import numpy as np
+
+from board import Board
+from constants import (
+    GRID_OFFSET,
+    PIECES_PER_PLAYER,
+    PLACES_BEFORE_INNER,
+    PLACES_TO_FRUIT,
+    REROLL_VALUES,
+    ROLL_VALUES,
+    ROLL_WEIGHTS,
+    SAFE_HOUSES,
+    COLS,
+    SQUARES,
+)
+from paths import MAX_STEPS, get_path_tables
+from piece import PieceColor
+from rolls import RollSource
+from simulate import DEFAULT_MAX_TURNS, SimulationReport
+from state import BoardState
+
+_VALUES = np.array(ROLL_VALUES, dtype=np.int8)
+_EVEN = _VALUES % 2 == 0
+_REROLL = np.isin(_VALUES, REROLL_VALUES)
+# Every index into ROLL_VALUES repeated as many times as its weight, see
+# :py:data:`src.rolls.ROLL_TABLE`.
+_ROLL_INDEX_TABLE = np.repeat(np.arange(len(ROLL_VALUES)), ROLL_WEIGHTS)
+# The index of the roll value 2, the only value a tying move can use.
+_TWO = ROLL_VALUES.index(2)
+
+# Whether every flat square index is a safe house, plus a last entry, which is
+# never safe, for the padding of the paths past the fruit square.
+_SAFE = np.zeros(SQUARES + 1, dtype=bool)
+_SAFE[[row * COLS + col for row, col in SAFE_HOUSES]] = True
+
+# The number of moves a player can choose from: a normal and a tying move of
+# every piece for every roll value.
+_MOVE_SHAPE = (PIECES_PER_PLAYER, len(ROLL_VALUES), 2)
+_CHOICES = int(np.prod(_MOVE_SHAPE))
+
+# The bits of a player's field in the packed square occupancy, see
+# :py:meth:`BatchedGames._occupancy`, and of its count of single pieces.
+_FIELD_BITS = 8
+_FIELD_MASK = (1 << _FIELD_BITS) - 1
+_SINGLE_MASK = (1 << _FIELD_BITS // 2) - 1
+
+# Compact the arrays once fewer than this fraction of the games is still played.
+_COMPACT_BELOW = 0.5
+
+
+class BatchedGames:
+    """Plays many games in lockstep, holding all of them in NumPy arrays so that
+    every decision is made for all games at once with vectorized operations. Both
+    players pick uniformly among their legal moves, which makes the engine meant
+    for Monte Carlo rollouts and for random-policy statistics.
+
+    The rules are the rules of :py:meth:`src.board.Board.calc_moves` and
+    :py:meth:`src.board.Board.move`, checked move by move by :py:func:`validate`.
+    A piece is a path position per player and slot; two slots tied together hold
+    the slot of their partner. A single piece pinned by enemy TiedPieces holds a
+    bitmask of the players whose TiedPieces it met, the counterpart of the lists of
+    :py:attr:`src.board.Board.enemy_piece_with_player_tied_piece`.
+
+    Usage::
+
+        games = BatchedGames(10000, number_of_players=2, seed=0)
+        report = games.play()
+
+    Args:
+        games (int): The number of games.
+        number_of_players (int, optional): The number of players of every game.
+            Defaults to 2.
+        seed (optional): The seed of the random number generator, e.g. an int.
+            Defaults to None, which seeds it from fresh entropy.
+        max_turns (int, optional): The number of turns after which a game is
+            abandoned. Defaults to DEFAULT_MAX_TURNS.
+    """
+
+    def __init__(
+        self,
+        games: int,
+        number_of_players: int = 2,
+        seed=None,
+        max_turns: int = DEFAULT_MAX_TURNS,
+    ):
+        self.number_of_players = number_of_players
+        self.players = list(PieceColor.__members__.keys())[:number_of_players]
+        self.max_turns = max_turns
+        self.rng = np.random.default_rng(seed)
+        self.throw_log: Optional[Dict[int, List[int]]] = None
+
+        paths = get_path_tables(number_of_players)
+        # The flat square index of every path position of every player, padded
+        # past the fruit square with SQUARES, which holds no pieces.
+        self.path_squares = np.full(
+            (number_of_players, PLACES_TO_FRUIT + 1 + MAX_STEPS), SQUARES
+        )
+        self.path_squares[:, : PLACES_TO_FRUIT + 1] = paths.alias_to_square.reshape(
+            number_of_players, GRID_OFFSET
+        )[:, : PLACES_TO_FRUIT + 1]
+        # The flat square index a piece of every player reaches from every path
+        # position with every roll value, as a (players * positions) x values
+        # array.
+        self.target_squares = self.path_squares[
+            :, np.arange(PLACES_TO_FRUIT + 1)[:, None] + _VALUES
+        ].reshape(-1, len(ROLL_VALUES))
+
+        shape = (games, number_of_players, PIECES_PER_PLAYER)
+        self.positions = np.zeros(shape, dtype=np.int8)
+        self.partners = np.full(shape, -1, dtype=np.int8)
+        self.pins = np.zeros(shape, dtype=np.int8)
+        self.captured = np.zeros((games, number_of_players), dtype=bool)
+        self.roll_counts = np.zeros((games, len(ROLL_VALUES)), dtype=np.int64)
+        self.to_move = np.zeros(games, dtype=np.int64)
+        self.finished = np.zeros((games, number_of_players), dtype=bool)
+        self.new_turn = np.ones(games, dtype=bool)
+        self.active = np.ones(games, dtype=bool)
+        self.game_ids = np.arange(games)
+        self.occupancy = self._occupancy()
+
+        # The results, indexed by game id.
+        self.finish_order = np.full((games, number_of_players), -1, dtype=np.int64)
+        self.turns = np.zeros(games, dtype=np.int64)
+        self.moves = np.zeros(games, dtype=np.int64)
+
+        # The flat index into the legal moves of the move made in every game by
+        # the last advance, or -1.
+        self.last_choice: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_board(
+        cls,
+        board: Board,
+        to_move: PieceColor,
+        games: int,
+        seed=None,
+        max_turns: int = DEFAULT_MAX_TURNS,
+    ) -> "BatchedGames":
+        """Create a batch of games that all continue from the position of a board,
+        e.g. for Monte Carlo rollouts.
+
+        If the player to move has a pending roll, the games continue the turn with
+        it; otherwise they start the player's turn. Players that have finished
+        are put in the finish order in seat order.
+
+        Args:
+            board (Board): The board.
+            to_move (PieceColor): The player to move.
+            games (int): The number of games.
+            seed (optional): The seed of the random number generator. Defaults to
+                None.
+            max_turns (int, optional): The number of further turns after which a
+                game is abandoned. Defaults to DEFAULT_MAX_TURNS.
+
+        Returns:
+            BatchedGames: The games.
+        """
+        batch = cls(games, board.number_of_players, seed=seed, max_turns=max_turns)
+        for idx, player in enumerate(board.players):
+            slot = 0
+            for row in board.squares:
+                for square in row:
+                    for piece in square.pieces:
+                        if piece.color != player:
+                            continue
+                        alias = (
+                            board.get_row_col_to_alias(player, square.row, square.col)
+                            % GRID_OFFSET
+                        )
+                        if piece.name == "TiedPiece":
+                            batch.positions[:, idx, slot : slot + 2] = alias
+                            batch.partners[:, idx, slot] = slot + 1
+                            batch.partners[:, idx, slot + 1] = slot
+                            slot += 2
+                            continue
+                        batch.positions[:, idx, slot] = alias
+                        if piece.with_enemy_tied_piece:
+                            batch.pins[:, idx, slot] = sum(
+                                1 << pinner
+                                for pinner, color in enumerate(board.players)
+                                if any(
+                                    pinned is piece
+                                    for pinned in board.enemy_piece_with_player_tied_piece[
+                                        color
+                                    ]
+                                    or []
+                                )
+                            )
+                        slot += 1
+            batch.captured[:, idx] = board.player_captured_flags[player]
+            if board.has_player_finished(player):
+                batch.finished[:, idx] = True
+                batch.finish_order[:, batch.finished[0].sum() - 1] = idx
+        for value in board.roll:
+            batch.roll_counts[:, ROLL_VALUES.index(value)] += 1
+        batch.to_move[:] = board.players.index(to_move)
+        batch.new_turn[:] = not board.roll
+        batch.occupancy = batch._occupancy()
+        return batch
+
+    @property
+    def games(self) -> int:
+        """The number of games of the batch."""
+        return len(self.turns)
+
+    def play(self) -> SimulationReport:
+        """Play every game until it ends or is abandoned.
+
+        Returns:
+            SimulationReport: The totals of the games.
+        """
+        start = time.perf_counter()
+        while self.active.any():
+            self.step()
+        report = self.report()
+        report.seconds = time.perf_counter() - start
+        return report
+
+    def step(self):
+        """Make one decision in every game still played: roll at the start of a
+        turn, then make a random legal move, or end the turn if there is none.
+        """
+        self.start_turns()
+        self.advance(self.legal_moves())
+        if self.active.sum() < _COMPACT_BELOW * len(self.active):
+            self._compact()
+
+    def start_turns(self):
+        """Throw the cowries for the games in which a turn starts."""
+        starting = np.flatnonzero(self.active & self.new_turn)
+        if len(starting):
+            self._kawade(starting)
+            self.new_turn[starting] = False
+
+    def legal_moves(self) -> np.ndarray:
+        """Return the legal moves of the player to move of every game as a mask.
+
+        Returns:
+            np.ndarray: A games x PIECES_PER_PLAYER x len(ROLL_VALUES) x 2 boolean
+            array of whether the piece in a slot can move with a roll value, with
+            a normal move (0) or a tying move (1). Of several identical pieces on
+            a square only the first slot has moves, like in
+            :py:meth:`src.board.Board.legal_moves`.
+        """
+        games = len(self.to_move)
+        rows = np.arange(games)
+        mover = self.to_move
+        occupancy = self.occupancy
+        shift = _FIELD_BITS * mover
+
+        positions = self.positions[rows, mover]
+        partners = self.partners[rows, mover]
+        # Flat indices into path_squares and into the occupancy.
+        path = (mover * self.path_squares.shape[1])[:, None]
+        squares = (rows * (SQUARES + 1))[:, None]
+        targets = positions[:, :, None] + _VALUES
+        target_squares = self.target_squares.take(
+            (mover * (PLACES_TO_FRUIT + 1))[:, None] + positions, axis=0
+        )
+        current_squares = self.path_squares.take(path + positions)
+        current_singles = (
+            occupancy.take(squares + current_squares) >> shift[:, None]
+        ) & _SINGLE_MASK
+
+        free = np.ones(targets.shape, dtype=bool)
+        blocking = self._blocked_squares(occupancy, mover)
+        holding = np.flatnonzero(blocking.any(1))
+        if len(holding):
+            # Whether no square strictly between a piece and its target holds it
+            # up, from the number of blocked squares along the path.
+            blocked_before = np.cumsum(
+                blocking[holding[:, None], self.path_squares[mover[holding]]],
+                1,
+                dtype=np.int8,
+            )
+            held = rows[: len(holding), None, None]
+            free[holding] = (
+                blocked_before[held, targets[holding] - 1]
+                == blocked_before[held[:, :, 0], positions[holding]][:, :, None]
+            )
+        can_go_till = np.where(
+            self.captured[rows, mover], PLACES_TO_FRUIT, PLACES_BEFORE_INNER
+        )
+        # The squares of the outer loop a single piece cannot land on hold pieces
+        # of its own player only and are not safe houses.
+        others = occupancy & ~(_FIELD_MASK << shift[:, None])
+        crowded = (others == 0) & (occupancy != 0) & ~_SAFE
+        landing = (targets > PLACES_BEFORE_INNER) | ~crowded.take(
+            squares[:, :, None] + target_squares
+        )
+        rolled = self.roll_counts[:, None, :] > 0
+        movable = (positions < PLACES_TO_FRUIT) & self.active[:, None]
+
+        earlier = np.tri(PIECES_PER_PLAYER, k=-1, dtype=bool)
+        same_square = positions[:, :, None] == positions[:, None, :]
+        single = (partners < 0) & (self.pins[rows, mover] == 0)
+        single &= ~(same_square & single[:, None, :] & earlier).any(2)
+        single &= movable
+
+        moves = np.zeros((games,) + _MOVE_SHAPE, dtype=bool)
+        moves[..., 0] = (
+            single[:, :, None]
+            & rolled
+            & free
+            & (targets <= can_go_till[:, None, None])
+            & landing
+        )
+        moves[:, :, _TWO, 1] = (
+            single
+            & rolled[:, :, _TWO]
+            & free[:, :, _TWO]
+            & (positions > PLACES_BEFORE_INNER)
+            & ~_SAFE[current_squares]
+            & (current_singles > 1)
+            & ~_SAFE[target_squares[:, :, 0]]
+        )
+        # TiedPieces are rare, so only the games with one are looked at.
+        tied = partners >= 0
+        with_tied = np.flatnonzero(tied.any(1))
+        if len(with_tied):
+            positions = positions[with_tied]
+            tied = tied[with_tied] & movable[with_tied]
+            tied &= ~(same_square[with_tied] & tied[:, None, :] & earlier).any(2)
+            moves[with_tied, :, :, 0] |= (
+                tied[:, :, None]
+                & rolled[with_tied]
+                & _EVEN
+                & (positions[:, :, None] + _VALUES // 2 <= PLACES_TO_FRUIT)
+            )
+        return moves
+
+    def _blocked_squares(self, occupancy: np.ndarray, mover: np.ndarray) -> np.ndarray:
+        """Return the squares that hold up the single pieces of the player to move:
+        the squares that are not safe houses on which an enemy has a TiedPiece
+        and no single piece.
+
+        Args:
+            occupancy (np.ndarray): The packed occupancy, see :py:meth:`_occupancy`.
+            mover (np.ndarray): The player to move of every game.
+
+        Returns:
+            np.ndarray: A games x (SQUARES + 1) boolean array.
+        """
+        blocked = np.zeros(occupancy.shape, dtype=bool)
+        # TiedPieces are rare, so only the squares they are on are looked at.
+        rows, players, slots = np.nonzero(self.partners >= 0)
+        enemy = players != mover[rows]
+        rows, players, slots = rows[enemy], players[enemy], slots[enemy]
+        squares = self.path_squares[players, self.positions[rows, players, slots]]
+        singles = (occupancy[rows, squares] >> _FIELD_BITS * players) & _SINGLE_MASK
+        holding = (singles == 0) & ~_SAFE[squares]
+        blocked[rows[holding], squares[holding]] = True
+        return blocked
+
+    def _occupancy(self) -> np.ndarray:
+        """Count the pieces on every square of every game, plus an empty padding
+        square, packed in one int per square: a field of _FIELD_BITS bits per
+        player that holds the number of its single pieces in the low and the
+        number of its tied slots in the high half. The counts are kept in
+        :py:attr:`occupancy` and updated by every move.
+
+        Returns:
+            np.ndarray: A games x (SQUARES + 1) array of the packed counts.
+        """
+        games = len(self.to_move)
+        players = np.arange(self.number_of_players)[None, :, None]
+        squares = self.path_squares[players, self.positions]
+        squares += np.arange(games)[:, None, None] * (SQUARES + 1)
+        weights = np.where(self.partners < 0, 1, _SINGLE_MASK + 1) << (
+            _FIELD_BITS * players
+        )
+        # The counts are far below 2**53, so the float weights add up exactly.
+        return (
+            np.bincount(
+                squares.ravel(), weights.ravel(), minlength=games * (SQUARES + 1)
+            )
+            .astype(np.int64)
+            .reshape(games, SQUARES + 1)
+        )
+
+    def advance(self, moves: np.ndarray):
+        """Make a random one of the given legal moves in every game still played,
+        and end the turn of the games without legal moves, without a roll left or
+        whose player has finished.
+
+        Args:
+            moves (np.ndarray): The legal moves, see :py:meth:`legal_moves`.
+        """
+        moves = moves.reshape(len(moves), _CHOICES)
+        counts = moves.sum(1)
+        stuck = np.flatnonzero(self.active & (counts == 0))
+
+        playing = np.flatnonzero(counts)
+        pick = np.floor(self.rng.random(len(playing)) * counts[playing])
+        choice = (
+            moves.cumsum(1, dtype=np.int8)[playing] > pick[:, None].astype(np.int8)
+        ).argmax(1)
+        self.last_choice = np.full(len(moves), -1)
+        self.last_choice[playing] = choice
+        done = self._make_moves(playing, *np.unravel_index(choice, _MOVE_SHAPE))
+        self._end_turns(np.concatenate([stuck, done]))
+
+    def _make_moves(
+        self,
+        games: np.ndarray,
+        slots: np.ndarray,
+        values: np.ndarray,
+        tying: np.ndarray,
+    ) -> np.ndarray:
+        """Make a move in each of the given games.
+
+        Args:
+            games (np.ndarray): The rows of the games.
+            slots (np.ndarray): The slot of the moved piece.
+            values (np.ndarray): The index of the roll value used.
+            tying (np.ndarray): Whether the move is a tying move.
+
+        Returns:
+            np.ndarray: The rows of the games whose turn is over.
+        """
+        mover = self.to_move[games]
+        players = np.arange(self.number_of_players)
+        self.roll_counts[games, values] -= 1
+        self.moves[self.game_ids[games]] += 1
+
+        start = self.positions[games, mover, slots]
+        partners = self.partners[games, mover, slots]
+        is_tied = partners >= 0
+        tying = tying.astype(bool)
+        if tying.any():
+            # Tie the piece with the first other single piece on its square.
+            others = (
+                (self.partners[games[tying], mover[tying]] < 0)
+                & (self.positions[games[tying], mover[tying]] == start[tying, None])
+                & (np.arange(PIECES_PER_PLAYER) != slots[tying, None])
+            ).argmax(1)
+            partners[tying] = others
+            self.partners[games[tying], mover[tying], slots[tying]] = others
+            self.partners[games[tying], mover[tying], others] = slots[tying]
+        steps = np.where(is_tied, _VALUES[values] // 2, _VALUES[values])
+        steps[tying] = 1
+        end = start + steps
+        path = mover * self.path_squares.shape[1]
+        initial = self.path_squares.take(path + start)
+        final = self.path_squares.take(path + end)
+        final_occupancy = self.occupancy[games, final]
+
+        # A single piece that lands on an enemy TiedPiece is pinned until the end
+        # of the next turn of every player with a TiedPiece on the square.
+        pinners = np.zeros(len(games), dtype=np.int64)
+        for player in players:
+            field = (final_occupancy >> _FIELD_BITS * player) & _FIELD_MASK
+            pinners |= (field > _SINGLE_MASK) << player
+        pinned = ~is_tied & ~tying & (pinners & ~(1 << mover) != 0)
+        self.pins[games[pinned], mover[pinned], slots[pinned]] |= pinners[pinned]
+
+        self.positions[games, mover, slots] = end
+        both = is_tied | tying
+        self.positions[games[both], mover[both], partners[both]] = end[both]
+        single_weight = 1 << _FIELD_BITS * mover
+        tied_weight = single_weight << _FIELD_BITS // 2
+        self.occupancy[games, initial] -= np.where(
+            is_tied, 2 * tied_weight, np.where(tying, 2, 1) * single_weight
+        )
+        self.occupancy[games, final] += np.where(both, 2 * tied_weight, single_weight)
+
+        # Captures on the final square; a TiedPiece captures TiedPieces too, and
+        # takes the pieces left behind on its initial square with it.
+        own_field = _FIELD_MASK << _FIELD_BITS * mover
+        hits = np.flatnonzero(
+            (final_occupancy & ~own_field != 0) & ~_SAFE[final]
+            | is_tied
+            & (self.occupancy[games, initial] & ~own_field != 0)
+            & ~_SAFE[initial]
+        )
+        if len(hits):
+            self._capture(
+                games[hits],
+                mover[hits],
+                is_tied[hits],
+                initial[hits],
+                final[hits],
+            )
+
+        finished = (self.positions[games, mover] == PLACES_TO_FRUIT).all(1)
+        winners = games[finished]
+        ids = self.game_ids[winners]
+        self.finish_order[ids, self.finished[winners].sum(1)] = mover[finished]
+        self.finished[winners, mover[finished]] = True
+        return games[finished | (self.roll_counts[games].sum(1) == 0)]
+
+    def _capture(
+        self,
+        games: np.ndarray,
+        mover: np.ndarray,
+        is_tied: np.ndarray,
+        initial: np.ndarray,
+        final: np.ndarray,
+    ):
+        """Send the enemy pieces captured by the moves just made home, and throw
+        the bonus rolls of the captures on the final squares.
+
+        Args:
+            games (np.ndarray): The rows of the games.
+            mover (np.ndarray): The player that moved.
+            is_tied (np.ndarray): Whether the moved piece is a TiedPiece.
+            initial (np.ndarray): The square the piece moved from.
+            final (np.ndarray): The square the piece moved to.
+        """
+        players = np.arange(self.number_of_players)[None, :, None]
+        squares = self.path_squares[players, self.positions[games]]
+        enemy = players != mover[:, None, None]
+        single = self.partners[games] < 0
+        captured = (
+            enemy
+            & (squares == final[:, None, None])
+            & ~_SAFE[final][:, None, None]
+            & (single | is_tied[:, None, None])
+        )
+        bonus_rolls = (captured & single).sum((1, 2)) + (captured & ~single).sum(
+            (1, 2)
+        ) // 2
+        captured |= (
+            enemy
+            & (squares == initial[:, None, None])
+            & ~_SAFE[initial][:, None, None]
+            & is_tied[:, None, None]
+        )
+        capturing = captured.any((1, 2))
+        self.captured[games[capturing], mover[capturing]] = True
+
+        rows, victims, slots = np.nonzero(captured)
+        victim_games = games[rows]
+        weights = 1 << _FIELD_BITS * victims
+        np.subtract.at(
+            self.occupancy,
+            (victim_games, squares[rows, victims, slots]),
+            np.where(single[rows, victims, slots], 1, _SINGLE_MASK + 1) * weights,
+        )
+        np.add.at(
+            self.occupancy, (victim_games, self.path_squares[victims, 0]), weights
+        )
+        self.positions[victim_games, victims, slots] = 0
+        self.partners[victim_games, victims, slots] = -1
+        while bonus_rolls.any():
+            self._kawade(games[bonus_rolls > 0])
+            bonus_rolls = np.maximum(bonus_rolls - 1, 0)
+
+    def _end_turns(self, games: np.ndarray):
+        """End the turn of the player to move in the given games, and pass the
+        turn on to the next player that has not finished.
+
+        Args:
+            games (np.ndarray): The rows of the games.
+        """
+        mover = self.to_move[games]
+        self.roll_counts[games] = 0
+        rows, players, slots = np.nonzero(self.pins[games])
+        pins = self.pins[games[rows], players, slots]
+        cleared = (pins >> mover[rows]) & 1 == 1
+        self.pins[games[rows[cleared]], players[cleared], slots[cleared]] = 0
+        ids = self.game_ids[games]
+        self.turns[ids] += 1
+        over = (self.finished[games].sum(1) >= self.number_of_players - 1) | (
+            self.turns[ids] >= self.max_turns
+        )
+        self.active[games[over]] = False
+
+        playing = games[~over]
+        seats = (self.to_move[playing] + 1) % self.number_of_players
+        for _ in range(self.number_of_players):
+            waiting = self.finished[playing, seats]
+            if not waiting.any():
+                break
+            seats = np.where(waiting, (seats + 1) % self.number_of_players, seats)
+        self.to_move[playing] = seats
+        self.new_turn[playing] = True
+
+    def _kawade(self, games: np.ndarray):
+        """Throw the cowries once in each of the given games, throwing again while
+        a value in REROLL_VALUES comes up, and add the values to the rolls.
+
+        Args:
+            games (np.ndarray): The rows of the games, without duplicates.
+        """
+        while len(games):
+            values = _ROLL_INDEX_TABLE[
+                self.rng.integers(len(_ROLL_INDEX_TABLE), size=len(games))
+            ]
+            self.roll_counts[games, values] += 1
+            if self.throw_log is not None:
+                for game, value in zip(self.game_ids[games].tolist(), values.tolist()):
+                    self.throw_log.setdefault(game, []).append(ROLL_VALUES[value])
+            games = games[_REROLL[values]]
+
+    def _compact(self):
+        """Drop the rows of the games that are over from the arrays."""
+        keep = self.active
+        for name in (
+            "positions",
+            "partners",
+            "pins",
+            "captured",
+            "roll_counts",
+            "to_move",
+            "finished",
+            "new_turn",
+            "active",
+            "game_ids",
+            "occupancy",
+        ):
+            setattr(self, name, getattr(self, name)[keep])
+
+    def to_state(self, row: int) -> BoardState:
+        """Return the compact snapshot of a game, as
+        :py:meth:`src.board.Board.to_state` would give it.
+
+        Args:
+            row (int): The row of the game in the arrays.
+
+        Returns:
+            BoardState: The snapshot.
+        """
+        state = BoardState(self.players)
+        state.data[0] = self.to_move[row]
+        state.data[1] = sum(
+            1 << idx for idx, flag in enumerate(self.captured[row].tolist()) if flag
+        )
+        state.roll_counts[:] = self.roll_counts[row]
+        positions, tied, pinned = state.positions, state.tied, state.pinned
+        tied[:] = -1
+        for idx in range(self.number_of_players):
+            entries = sorted(
+                (alias, int(partner >= 0), int(partner < 0 and pins != 0))
+                for alias, partner, pins in zip(
+                    self.positions[row, idx].tolist(),
+                    self.partners[row, idx].tolist(),
+                    self.pins[row, idx].tolist(),
+                )
+            )
+            for slot, (alias, is_tied, is_pinned) in enumerate(entries):
+                positions[idx, slot] = alias
+                pinned[idx, slot] = is_pinned
+                if is_tied and tied[idx, slot] == -1:
+                    tied[idx, slot] = slot + 1
+                    tied[idx, slot + 1] = slot
+        return state
+
+    def report(self) -> SimulationReport:
+        """Return the totals of the games played so far.
+
+        Returns:
+            SimulationReport: The totals, without the time.
+        """
+        report = SimulationReport(self.number_of_players)
+        report.games = self.games
+        report.turns = int(self.turns.sum())
+        report.moves = int(self.moves.sum())
+        winners = self.finish_order[:, 0]
+        report.unfinished = int((winners == -1).sum())
+        report.wins = np.bincount(
+            winners[winners >= 0], minlength=self.number_of_players
+        ).tolist()
+        return report
+
+
+class EngineMismatchError(Exception):
+    """Raised by :py:func:`validate` when the batched and the scalar engine
+    disagree."""
+
+
+class _QueuedRollSource(RollSource):
+    """Hands out the throws put in its queue, so that a scalar board rolls what a
+    batched game rolled."""
+
+    def __init__(self):
+        self.queue = deque()
+
+    def throw(self) -> int:
+        return self.queue.popleft()
+
+
+def validate(games: int = 100, number_of_players: int = 2, seed=0) -> int:
+    """Play a batch of games and replay every decision on a scalar
+    :py:class:`src.board.Board` per game, checking that both engines agree on
+    the rolls, on the legal moves and on the position after every move.
+
+    Args:
+        games (int, optional): The number of games. Defaults to 100.
+        number_of_players (int, optional): The number of players. Defaults to 2.
+        seed (optional): The seed of the batch. Defaults to 0.
+
+    Raises:
+        EngineMismatchError: If the engines disagree.
+
+    Returns:
+        int: The number of moves checked.
+    """
+    batch = BatchedGames(games, number_of_players, seed=seed)
+    batch.throw_log = {}
+    sources = [_QueuedRollSource() for _ in range(games)]
+    boards = [Board(batch.players, roll_source=source) for source in sources]
+    checked = 0
+
+    def sync_throws():
+        for game, throws in batch.throw_log.items():
+            sources[game].queue.extend(throws)
+        batch.throw_log.clear()
+
+    while batch.active.any():
+        starting = batch.game_ids[batch.active & batch.new_turn]
+        batch.start_turns()
+        sync_throws()
+        for game in starting.tolist():
+            boards[game].kawade()
+        moves = batch.legal_moves()
+        active = np.flatnonzero(batch.active)
+        if not np.array_equal(batch.occupancy, batch._occupancy()):
+            raise EngineMismatchError("The occupancy of the batch is out of date.")
+        expected = {}
+        for row in active.tolist():
+            game = batch.game_ids[row]
+            board = boards[game]
+            player = batch.players[batch.to_move[row]]
+            state = board.to_state(player)
+            if state != batch.to_state(row):
+                raise EngineMismatchError(
+                    f"Game {game}: the board is at {state}, the batch at "
+                    f"{batch.to_state(row)}."
+                )
+            legal_moves = {}
+            for legal_move in board.legal_moves(player):
+                initial = legal_move.move.initial
+                key = (
+                    initial.row * COLS + initial.col,
+                    legal_move.piece.name == "TiedPiece",
+                    legal_move.roll,
+                    bool(legal_move.move.tying_move),
+                )
+                legal_moves.setdefault(key, legal_move)
+            batch_moves = set()
+            for slot, value, tying in zip(*np.nonzero(moves[row])):
+                seat = batch.to_move[row]
+                square = batch.path_squares[seat, batch.positions[row, seat, slot]]
+                is_tied = batch.partners[row, seat, slot] >= 0
+                batch_moves.add(
+                    (int(square), bool(is_tied), ROLL_VALUES[value], bool(tying))
+                )
+            if batch_moves != set(legal_moves):
+                raise EngineMismatchError(
+                    f"Game {game}: the board has the legal moves "
+                    f"{sorted(legal_moves)}, the batch {sorted(batch_moves)}."
+                )
+            expected[game] = (player, legal_moves)
+
+        positions = batch.positions.copy()
+        partners = batch.partners.copy()
+        to_move = batch.to_move.copy()
+        batch.advance(moves)
+        sync_throws()
+        for row in active.tolist():
+            game = batch.game_ids[row]
+            player, legal_moves = expected[game]
+            board = boards[game]
+            choice = batch.last_choice[row]
+            if choice >= 0:
+                slot, value, tying = np.unravel_index(choice, _MOVE_SHAPE)
+                seat = to_move[row]
+                square = batch.path_squares[seat, positions[row, seat, slot]]
+                is_tied = partners[row, seat, slot] >= 0
+                legal_move = legal_moves[
+                    (int(square), bool(is_tied), ROLL_VALUES[value], bool(tying))
+                ]
+                board.move(legal_move.piece, legal_move.move)
+                checked += 1
+            if batch.new_turn[row] or not batch.active[row]:
+                board.roll = []
+                board.clear_enemy_pieces_with_player_tied_piece(player)
+        batch._compact()
+    return checked
+
+
+def main(argv: Optional[List[str]] = None):
+    """Play a batch of games from the command line and print its report."""
+    parser = argparse.ArgumentParser(
+        description="Play Chowka Bhara games in lockstep with random moves."
+    )
+    parser.add_argument("--games", type=int, default=10000)
+    parser.add_argument("--players", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-turns", type=int, default=DEFAULT_MAX_TURNS)
+    parser.add_argument(
+        "--validate",
+        action="store_true",
+        help="Check the games against the scalar engine instead.",
+    )
+    args = parser.parse_args(argv)
+    if args.validate:
+        checked = validate(args.games, args.players, args.seed)
+        print(f"{checked} moves agree with the scalar engine.")
+        return
+    games = BatchedGames(
+        args.games, args.players, seed=args.seed, max_turns=args.max_turns
+    )
+    print(games.play())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+from typing import List
+
+from constants import SAFE_MASK
+from piece import PieceColor
+
+# The bit of every color in the color masks of a square, by color name.
+COLOR_BITS = {color.name: 1 << color.value for color in PieceColor}
+COLORS = len(PieceColor)
+
+
+class Bitboards:
+    """The squares of a board holding the pieces of every color, as 49-bit masks
+    with the bit 1 << (row * COLS + col) of every such square set.
+
+    The masks are kept up to date by :py:meth:`src.square.Square.add_piece` and
+    :py:meth:`src.square.Square.remove_piece` of the squares of the board, which
+    toggle the bit of a square when the first piece of a kind and color arrives
+    on it or the last one leaves. Masks are indexed by the color's
+    :py:class:`src.piece.PieceColor` value.
+    """
+
+    __slots__ = ("single", "tied")
+
+    def __init__(self):
+        # The squares with a single piece of every color.
+        self.single: List[int] = [0] * COLORS
+        # The squares with a TiedPiece of every color.
+        self.tied: List[int] = [0] * COLORS
+
+    def toggle(self, tied: bool, color_index: int, bit: int):
+        """Flip the bit of a square in a mask.
+
+        Args:
+            tied (bool): Whether the mask is the TiedPiece mask.
+            color_index (int): The color's PieceColor value.
+            bit (int): The bit of the square.
+        """
+        if tied:
+            self.tied[color_index] ^= bit
+        else:
+            self.single[color_index] ^= bit
+
+    def occupied(self, color_index: int) -> int:
+        """Return the mask of the squares with a piece of the given color.
+
+        Args:
+            color_index (int): The color's PieceColor value.
+
+        Returns:
+            int: The mask.
+        """
+        return self.single[color_index] | self.tied[color_index]
+
+    def held(self, color_index: int) -> int:
+        """Return the mask of the squares where the TiedPieces of the given color
+        hold up the single pieces of the other colors: squares that are not safe
+        houses with a TiedPiece and no single piece of the color.
+
+        Args:
+            color_index (int): The color's PieceColor value.
+
+        Returns:
+            int: The mask.
+        """
+        return self.tied[color_index] & ~self.single[color_index] & ~SAFE_MASK
+
+    def __repr__(self) -> str:
+        return f"Bitboards(single={self.single}, tied={self.tied})"
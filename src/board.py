@@ -1,29 +1,348 @@
-from typing import Optional, Tuple
+from typing import Iterator, List, Optional, Tuple
+from bitboards import Bitboards
 from constants import *
-from move import Move
-from square import InvalidAliasException, Square
+from move import LegalMove, Move
+from square import COORDINATES, InvalidAliasException, Square
 from piece import Piece, PieceColor, TiedPiece
-import numpy as np
+from state import BoardState
+from paths import get_path_tables
+from rolls import RandomRollSource, RollSource
+from zobrist import HASH_MASK, PINNED, SINGLE, TIED, get_zobrist_keys
+from undo import (
+    ADD_PIECE,
+    APPEND_ROLL,
+    MISSING,
+    REMOVE_PIECE,
+    REMOVE_ROLL,
+    SET_ATTR,
+    SET_ITEM,
+    UndoRecord,
+)
+
+
+# The bit of the fruit square, which only holds pieces that have fruited.
+FRUIT_BIT = 1 << (ROWS // 2 * COLS + COLS // 2)
 
 
 class Board:
-    def __init__(self, players: list[PieceColor]):
+    def __init__(
+        self, players: list[PieceColor], roll_source: Optional[RollSource] = None
+    ):
         self._create_squares()
 
         self.players = players
         self.player_captured_flags = {player: False for player in self.players}
         self.number_of_players = len(self.players)
+        self.player_index = {player: idx for idx, player in enumerate(self.players)}
+        self.zobrist_keys = get_zobrist_keys(self.number_of_players)
         self._generate_player_paths()
-
-        self._generate_alias_to_row_col()
-
-        self._generate_row_col_to_alias()
         self._add_pieces()
 
-        self.roll = None
+        self._roll = []
         self.enemy_piece_with_player_tied_piece = {
             player: [] for player in self.players
         }
+        self.changed_squares = set()
+        self.undo_stack = []
+        self._undo = None
+        self.defer_bonus_rolls = False
+        self.bonus_rolls = 0
+        self.roll_source = roll_source or RandomRollSource()
+        self.zobrist = self.compute_zobrist()
+        self.compute_bitboards()
+        self.compute_blockers()
+        self.compute_counters()
+
+    @classmethod
+    def from_state(
+        cls, state: BoardState, roll_source: Optional[RollSource] = None
+    ) -> "Board":
+        """Create a board holding the position of the given compact state.
+
+        Args:
+            state (BoardState): The state to load.
+            roll_source (Optional[RollSource], optional): The source of the board's
+                rolls. Defaults to a RandomRollSource.
+
+        Returns:
+            Board: The board.
+        """
+        board = cls(players=state.players, roll_source=roll_source)
+        board._create_squares()
+        board.roll = state.roll
+        captured = state.captured
+        positions = state.positions.tolist()
+        tied = state.tied.tolist()
+        pinned = state.pinned.tolist()
+        pinned_pieces = []
+        for idx, player in enumerate(board.players):
+            board.player_captured_flags[player] = bool(captured[idx])
+            for slot, alias in enumerate(positions[idx]):
+                partner = tied[idx][slot]
+                if partner != -1 and partner < slot:
+                    continue
+                piece = Piece(player)
+                piece.position = piece.home_position + alias
+                if partner != -1:
+                    partner_piece = Piece(player)
+                    partner_piece.position = piece.position
+                    piece = TiedPiece(player, piece.position, [piece, partner_piece])
+                elif pinned[idx][slot]:
+                    piece.set_with_enemy_tied_piece()
+                    pinned_pieces.append(piece)
+                row, col = board.get_alias_to_row_col(piece.position)
+                board.squares[row][col].add_piece(piece)
+        for piece in pinned_pieces:
+            row, col = board.get_alias_to_row_col(piece.position)
+            for enemy_piece in board.squares[row][col].pieces:
+                if enemy_piece.name == "TiedPiece" and enemy_piece.color != piece.color:
+                    board.enemy_piece_with_player_tied_piece[enemy_piece.color].append(
+                        piece
+                    )
+        board.zobrist = board.compute_zobrist()
+        board.compute_bitboards()
+        board.compute_blockers()
+        board.compute_counters()
+        return board
+
+    @property
+    def roll(self) -> List[int]:
+        """The pending roll of the player to move."""
+        return self._roll
+
+    @roll.setter
+    def roll(self, roll: List[int]):
+        keys = self.zobrist_keys.roll
+        self.zobrist = (
+            self.zobrist
+            - sum(keys[value] for value in self._roll)
+            + sum(keys[value] for value in roll)
+        ) & HASH_MASK
+        self._roll = roll
+
+    def compute_zobrist(self) -> int:
+        """Compute the Zobrist hash of the board from scratch, without the player
+        to move. The board keeps its hash in :py:attr:`zobrist` up to date on every
+        move, so this is only needed after changing the squares directly.
+
+        Returns:
+            int: The hash.
+        """
+        keys = self.zobrist_keys
+        zobrist = sum(keys.roll[value] for value in self._roll)
+        for player in self.players:
+            if self.player_captured_flags[player]:
+                zobrist += keys.captured[self.player_index[player]]
+        for row in self.squares:
+            for square in row:
+                for piece in square.pieces:
+                    zobrist += self._piece_key(square, piece)
+        return zobrist & HASH_MASK
+
+    def compute_bitboards(self):
+        """Build the board's :py:class:`src.bitboards.Bitboards` from scratch and
+        attach the squares to them, so that they keep the masks up to date from
+        now on."""
+        self.bitboards = Bitboards()
+        for row in self.squares:
+            for square in row:
+                square.attach(self.bitboards)
+
+    def compute_blockers(self):
+        """Index the squares that hold up single pieces from scratch. The board
+        keeps the index up to date on every move, so this is only needed after
+        changing the squares directly.
+
+        A square that is not a safe house holds up the single pieces of a player
+        when an enemy has a TiedPiece on it and no single piece to go with it
+        (see :py:meth:`src.bitboards.Bitboards.held`). :py:attr:`holders` has,
+        for every flat square index, a bitmask of the indices of the players
+        whose TiedPieces hold it, and :py:attr:`next_blocked` has, for every
+        player index and path position, the next path position that is held by
+        an enemy (or GRID_OFFSET if there is none), so that the squares a single
+        piece passes are checked in O(1).
+        """
+        self.holders = [0] * SQUARES
+        for idx, player in enumerate(self.players):
+            held = self.bitboards.held(PieceColor[player].value)
+            for flat in range(SQUARES):
+                if held >> flat & 1:
+                    self.holders[flat] |= 1 << idx
+        self.next_blocked = []
+        for idx in range(self.number_of_players):
+            next_blocked = [GRID_OFFSET] * (PLACES_TO_FRUIT + 1)
+            following = GRID_OFFSET
+            for position in range(PLACES_TO_FRUIT, -1, -1):
+                next_blocked[position] = following
+                flat = self.paths.alias_to_square[idx * GRID_OFFSET + position]
+                if self.holders[flat] & ~(1 << idx):
+                    following = position
+            self.next_blocked.append(next_blocked)
+
+    def _update_holders(self, square: Square, piece: Piece | TiedPiece):
+        """Update the index of the held squares after a piece was added to or
+        removed from a square.
+
+        Args:
+            square (Square): The square.
+            piece (Piece | TiedPiece): The piece.
+        """
+        color_bit = 1 << piece.color_index
+        if not square.tied_colors & color_bit and piece.name != "TiedPiece":
+            return
+        flat = square.row * COLS + square.col
+        idx = self.player_index[piece.color]
+        held = bool(
+            square.tied_colors & ~square.single_colors & color_bit
+            and not square.is_safe_house
+        )
+        before = self.holders[flat]
+        if held == bool(before >> idx & 1):
+            return
+        after = before ^ (1 << idx)
+        self.holders[flat] = after
+        for other in range(self.number_of_players):
+            mask = ~(1 << other)
+            if bool(before & mask) != bool(after & mask):
+                self._index_blocked_positions(
+                    other, self.paths.square_to_alias[other][flat] % GRID_OFFSET
+                )
+
+    def compute_counters(self):
+        """Count the pieces of every player on each stretch of its path from
+        scratch. The board keeps the counters up to date on every move (including
+        captures and undone moves), so this is only needed after changing the
+        squares directly.
+
+        The counters are dicts by player color, read in O(1):
+
+        - :py:attr:`at_home`: the pieces on the player's home square.
+        - :py:attr:`on_outer_loop`: the pieces on the rest of the outer loop.
+        - :py:attr:`in_inner_ring`: the pieces on the inner squares before the
+          fruit.
+        - :py:attr:`fruited`: the pieces on the fruit square.
+        - :py:attr:`tied_pairs`: the player's TiedPieces.
+        - :py:attr:`places_covered`: the number of places the player's pieces
+          have covered along its path.
+        - :py:attr:`players_finished`: the number of players with every piece on
+          the fruit square.
+
+        A TiedPiece counts as its two pieces everywhere but in tied_pairs.
+        """
+        self.at_home = dict.fromkeys(self.players, 0)
+        self.on_outer_loop = dict.fromkeys(self.players, 0)
+        self.in_inner_ring = dict.fromkeys(self.players, 0)
+        self.fruited = dict.fromkeys(self.players, 0)
+        self.tied_pairs = dict.fromkeys(self.players, 0)
+        self.places_covered = dict.fromkeys(self.players, 0)
+        self.players_finished = 0
+        for row in self.squares:
+            for square in row:
+                for piece in square.pieces:
+                    self._count_piece(square, piece, 1)
+
+    def _count_piece(self, square: Square, piece: Piece | TiedPiece, delta: int):
+        """Update the counters of :py:meth:`compute_counters` after a piece was
+        added to (delta 1) or removed from (delta -1) a square. The stretch of the
+        path is told by the square rather than by the piece's position, which
+        changes after the piece is added.
+
+        Args:
+            square (Square): The square.
+            piece (Piece | TiedPiece): The piece.
+            delta (int): 1 or -1.
+        """
+        color = piece.color
+        position = (
+            self.paths.row_col_to_alias[self.player_index[color]][
+                square.row * COLS + square.col
+            ]
+            % GRID_OFFSET
+        )
+        pieces = delta
+        if piece.name == "TiedPiece":
+            self.tied_pairs[color] += delta
+            pieces = 2 * delta
+        self.places_covered[color] += pieces * position
+        if position == 0:
+            self.at_home[color] += pieces
+        elif position <= PLACES_BEFORE_INNER:
+            self.on_outer_loop[color] += pieces
+        elif position < PLACES_TO_FRUIT:
+            self.in_inner_ring[color] += pieces
+        else:
+            finished = self.fruited[color] == PIECES_PER_PLAYER
+            self.fruited[color] += pieces
+            if (self.fruited[color] == PIECES_PER_PLAYER) != finished:
+                self.players_finished += -1 if finished else 1
+
+    def _index_blocked_positions(self, idx: int, position: int):
+        """Update :py:attr:`next_blocked` of the player with the given index for the
+        path positions before the given one, after the square at that position
+        changed.
+
+        Args:
+            idx (int): The player index.
+            position (int): The path position of the changed square.
+        """
+        next_blocked = self.next_blocked[idx]
+        alias_to_square = self.paths.alias_to_square
+        offset = idx * GRID_OFFSET
+        mask = ~(1 << idx)
+        following = (
+            position
+            if self.holders[alias_to_square[offset + position]] & mask
+            else next_blocked[position]
+        )
+        for earlier in range(position - 1, -1, -1):
+            next_blocked[earlier] = following
+            if self.holders[alias_to_square[offset + earlier]] & mask:
+                break
+
+    def position_hash(self, to_move: PieceColor) -> int:
+        """Return the Zobrist hash of the position, i.e. of the board and the player
+        to move, in O(1).
+
+        Args:
+            to_move (PieceColor): The player to move.
+
+        Returns:
+            int: The hash.
+        """
+        return (
+            self.zobrist + self.zobrist_keys.to_move[self.player_index[to_move]]
+        ) & HASH_MASK
+
+    def _piece_key(self, square: Square, piece: Piece | TiedPiece) -> int:
+        """Return the Zobrist key of the given piece on the given square.
+
+        Args:
+            square (Square): The square the piece is on.
+            piece (Piece | TiedPiece): The piece.
+
+        Returns:
+            int: The key.
+        """
+        if piece.name == "TiedPiece":
+            kind = TIED
+        elif piece.with_enemy_tied_piece:
+            kind = PINNED
+        else:
+            kind = SINGLE
+        return self.zobrist_keys.pieces[self.player_index[piece.color]][kind][
+            square.row * COLS + square.col
+        ]
+
+    def to_state(self, to_move: PieceColor) -> BoardState:
+        """Return a compact snapshot of the board.
+
+        Args:
+            to_move (PieceColor): The player to move.
+
+        Returns:
+            BoardState: The snapshot.
+        """
+        return BoardState.from_board(self, to_move)
 
     def _create_squares(self):
         """Generate the 49 squares (7 rows and 7 columns) on the game board.
@@ -66,46 +385,16 @@ class Board:
 
         Here, player 2 starts at 100 and follows the squares labeled 101, 102, and
         so on.
+
+        The grids, along with the other path lookup tables, are built once per
+        number of players by :py:func:`src.paths.get_path_tables` and shared by
+        every board.
         """
-        if self.number_of_players == 2:
-            rotate_grid_by = 2
-        elif self.number_of_players > 2:
-            rotate_grid_by = 1
+        self.paths = get_path_tables(self.number_of_players)
         self.grid = {
-            player: np.rot90(BASE_GRID, idx * rotate_grid_by) + idx * GRID_OFFSET
-            for idx, player in enumerate(self.players)
+            player: self.paths.grids[idx] for idx, player in enumerate(self.players)
         }
 
-    def _generate_alias_to_row_col(self):
-        """Should be called only after the invocation of self._generate_player_paths().
-        This method generates a map from a squares alias to its (row, col) position
-        on the board. Since different player's alias for a square is different,
-        this is a many to one mapping.
-
-        For example, square 0 for player 1 is square 112 for player 2 in a two player game,
-        both 0 and 112 point to the square at (6,3)."""
-        self.alias_to_row_col = {}
-        for player in self.players:
-            for row in range(ROWS):
-                for col in range(COLS):
-                    self.alias_to_row_col[self.grid[player][row, col]] = (row, col)
-
-    def _generate_row_col_to_alias(self):
-        """Should be called only after the invocation of self._generate_player_paths().
-        This method generates a map Player-keyed map of what its alias for a square
-        at (row, col) is.
-
-        For example, the square at (6, 3) is square 0 for player 1 and 112 for
-        player 2 in a two player game.
-        """
-        self.row_col_to_alias = {player: {} for player in self.players}
-        for player in self.players:
-            for row in range(ROWS):
-                for col in range(COLS):
-                    self.row_col_to_alias[player][(row, col)] = self.grid[player][
-                        row, col
-                    ]
-
     def _add_pieces(self):
         """Calls the _add_pieces_for_player method for each player."""
         for player in self.players:
@@ -119,11 +408,12 @@ class Board:
             color (PieceColor): The Player's color.
             testing (bool, optional): Used to add pieces during debugging. Defaults to False.
         """
-        home_alias = PieceColor[color].value
-        home_square = np.where(self.grid[color] == home_alias * GRID_OFFSET)
-        self.squares[home_square[0][0]][home_square[1][0]] = Square(
-            row=home_square[0][0],
-            col=home_square[1][0],
+        home_row, home_col = self.get_alias_to_row_col(
+            PieceColor[color].value * GRID_OFFSET
+        )
+        self.squares[home_row][home_col] = Square(
+            row=home_row,
+            col=home_col,
             pieces=[Piece(color) for _ in range(PIECES_PER_PLAYER)],
         )
         # Testing
@@ -175,92 +465,354 @@ class Board:
         initial = move.initial
         final = move.final
         tying_move = move.tying_move
+        initial_square = self.squares[initial.row][initial.col]
+        final_square = self.squares[final.row][final.col]
         if not tying_move:
-            move_length = (
-                self.row_col_to_alias[piece.color][(final.row, final.col)]
-                - self.row_col_to_alias[piece.color][(initial.row, initial.col)]
-            )
+            move_length = self.get_row_col_to_alias(
+                piece.color, final.row, final.col
+            ) - self.get_row_col_to_alias(piece.color, initial.row, initial.col)
             # Move piece to final position
-            self.squares[initial.row][initial.col].remove_piece(piece)
-            self.squares[final.row][final.col].add_piece(piece)
+            self._remove_piece(initial_square, piece)
+            self._add_piece(final_square, piece)
+            self._record_attr(piece, "position")
             piece.move(move_length)
-            if self.squares[final.row][final.col].has_enemy_tied_piece(piece.color):
-                piece.set_with_enemy_tied_piece()
-                for enemypiece in self.squares[final.row][final.col].pieces:
+            if final_square.has_enemy_tied_piece(piece.color):
+                self._set_with_enemy_tied_piece(piece, final_square, True)
+                for enemypiece in final_square.pieces:
                     if enemypiece.name == "TiedPiece":
-                        if self.enemy_piece_with_player_tied_piece[enemypiece.color]:
-                            self.enemy_piece_with_player_tied_piece[
-                                enemypiece.color
-                            ].append(piece)
-                        else:
-                            self.enemy_piece_with_player_tied_piece[
-                                enemypiece.color
-                            ] = [piece]
+                        self._record_item(
+                            self.enemy_piece_with_player_tied_piece, enemypiece.color
+                        )
+                        self.enemy_piece_with_player_tied_piece[enemypiece.color] = (
+                            self.enemy_piece_with_player_tied_piece[enemypiece.color]
+                            or []
+                        ) + [piece]
             move_length_to_remove = (
                 2 * move_length if piece.name == "TiedPiece" else move_length
             )
-            self.roll.remove(move_length_to_remove)
+            self._remove_roll(move_length_to_remove)
         else:
             # Remove the piece
-            self.squares[initial.row][initial.col].remove_piece(piece)
+            self._remove_piece(initial_square, piece)
             # Find the other piece to tie with and remove that too
-            other_piece = self.squares[initial.row][
-                initial.col
-            ].get_other_single_team_piece(piece)
-            self.squares[initial.row][initial.col].remove_piece(other_piece)
-            self.squares[final.row][final.col].add_piece(
+            other_piece = initial_square.get_other_single_team_piece(piece)
+            self._remove_piece(initial_square, other_piece)
+            self._add_piece(
+                final_square,
                 TiedPiece(
                     piece.color,
-                    self.row_col_to_alias[piece.color][(final.row, final.col)],
+                    self.get_row_col_to_alias(piece.color, final.row, final.col),
                     [piece, other_piece],
-                )
+                ),
             )
-            self.roll.remove(2)
+            self._remove_roll(2)
         # Capture
-        if not self.squares[final.row][final.col].is_safe_house:
-            enemy_pieces = self.squares[final.row][final.col].get_enemy_pieces(
-                piece.color
-            )
-            for enemy_piece in enemy_pieces:
-                if not (enemy_piece.name == "TiedPiece" and piece.name == "Piece"):
-                    home_row, home_col = self.get_alias_to_row_col(
-                        enemy_piece.home_position
+        for enemy_piece in self.captured_pieces(piece, move):
+            home_row, home_col = self.get_alias_to_row_col(enemy_piece.home_position)
+            self._remove_piece(final_square, enemy_piece)
+            if enemy_piece.name == "TiedPiece":
+                for enemy_piece_component_piece in enemy_piece.pieces:
+                    self._add_piece(
+                        self.squares[home_row][home_col],
+                        enemy_piece_component_piece,
                     )
-                    self.squares[final.row][final.col].remove_piece(enemy_piece)
-                    if enemy_piece.name == "TiedPiece":
-                        for enemy_piece_component_piece in enemy_piece.pieces:
-                            self.squares[home_row][home_col].add_piece(
-                                enemy_piece_component_piece
-                            )
-                    else:
-                        self.squares[home_row][home_col].add_piece(enemy_piece)
-                    self.player_captured_flags[piece.color] = True
-                    enemy_piece.moved = False
-                    enemy_piece.return_to_home()
-                    self.kawade()
+            else:
+                self._add_piece(self.squares[home_row][home_col], enemy_piece)
+            self._capture(piece.color, enemy_piece)
+            if self.defer_bonus_rolls:
+                self._record_attr(self, "bonus_rolls")
+                self.bonus_rolls += 1
+            else:
+                self.kawade()
         # If a Single Piece is on a square with an enemy TiedPiece, then it can
-        # be captured when the TiedPiece moves.
-        if piece.name == "TiedPiece" and (
-            not self.squares[initial.row][initial.col].is_safe_house
-        ):
-            enemy_pieces = self.squares[initial.row][initial.col].get_enemy_pieces(
-                piece.color
-            )
+        # be captured when the TiedPiece moves. Enemy TiedPieces left on the
+        # square are captured too, and split like on the final square.
+        if piece.name == "TiedPiece" and (not initial_square.is_safe_house):
+            enemy_pieces = initial_square.get_enemy_pieces(piece.color)
             for enemy_piece in enemy_pieces:
                 home_row, home_col = self.get_alias_to_row_col(
                     enemy_piece.home_position
                 )
-                self.squares[initial.row][initial.col].remove_piece(enemy_piece)
-                self.squares[home_row][home_col].add_piece(enemy_piece)
-                self.player_captured_flags[piece.color] = True
-                enemy_piece.moved = False
-                enemy_piece.return_to_home()
+                self._remove_piece(initial_square, enemy_piece)
+                if enemy_piece.name == "TiedPiece":
+                    for enemy_piece_component_piece in enemy_piece.pieces:
+                        self._add_piece(
+                            self.squares[home_row][home_col],
+                            enemy_piece_component_piece,
+                        )
+                else:
+                    self._add_piece(self.squares[home_row][home_col], enemy_piece)
+                self._capture(piece.color, enemy_piece)
 
+        self._record_attr(piece, "moved")
         piece.moved = True
+        self._record_attr(piece, "moves")
         piece.clear_moves()
 
+    def captured_pieces(
+        self, piece: Piece | TiedPiece, move: Move
+    ) -> List[Piece | TiedPiece]:
+        """Return the enemy pieces the given move captures on its final square. A
+        piece captures the enemy pieces on a final square that is not a safe house,
+        except that a single piece does not capture enemy TiedPieces; they hold it
+        up instead.
+
+        Args:
+            piece (Piece | TiedPiece): The Piece to move.
+            move (Move): The move, one of the piece's legal moves.
+
+        Returns:
+            List[Piece | TiedPiece]: The captured pieces.
+        """
+        final_square = self.squares[move.final.row][move.final.col]
+        if final_square.is_safe_house:
+            return []
+        return [
+            enemy_piece
+            for enemy_piece in final_square.get_enemy_pieces(piece.color)
+            if not (enemy_piece.name == "TiedPiece" and piece.name == "Piece")
+        ]
+
+    def _capture(self, color: PieceColor, enemy_piece: Piece | TiedPiece):
+        """Set the capture flag of the given player and send the captured enemy
+        piece home. The piece must already be on its home square.
+
+        Args:
+            color (PieceColor): The capturing player's color.
+            enemy_piece (Piece | TiedPiece): The captured piece.
+        """
+        self._record_item(self.player_captured_flags, color)
+        if not self.player_captured_flags[color]:
+            self.zobrist = (
+                self.zobrist + self.zobrist_keys.captured[self.player_index[color]]
+            ) & HASH_MASK
+        self.player_captured_flags[color] = True
+        self._record_attr(enemy_piece, "moved")
+        enemy_piece.moved = False
+        for component_piece in (
+            enemy_piece.pieces if enemy_piece.name == "TiedPiece" else [enemy_piece]
+        ):
+            self._record_attr(component_piece, "position")
+        enemy_piece.return_to_home()
+
+    def make_move(self, piece: Piece | TiedPiece, move: Move) -> UndoRecord:
+        """Apply a move like :py:meth:`move` does, recording every change it makes
+        on the undo stack so that :py:meth:`unmake_move` can revert it.
+
+        Args:
+            piece (Piece | TiedPiece): The Piece to move.
+            move (Move): The move to be applied to the piece.
+
+        Returns:
+            UndoRecord: The changes made by the move.
+        """
+        return self._make(UndoRecord(piece, move, self.zobrist), self.move, piece, move)
+
+    def make_roll(self, values: List[int]) -> UndoRecord:
+        """Add the given values to the roll on the undo stack, like
+        :py:meth:`kawade` does at random. If bonus rolls are pending (see
+        :py:attr:`defer_bonus_rolls`), the values are used as one of them.
+
+        Args:
+            values (List[int]): The rolled values.
+
+        Returns:
+            UndoRecord: The changes made by the roll.
+        """
+        return self._make(UndoRecord(zobrist=self.zobrist), self._add_roll, values)
+
+    def make_end_turn(self, color: PieceColor) -> UndoRecord:
+        """End the turn of the given player on the undo stack, dropping the rest of
+        its roll and clearing the flags of the enemy pieces held by its
+        TiedPieces.
+
+        Args:
+            color (PieceColor): The player whose turn ends.
+
+        Returns:
+            UndoRecord: The changes made by ending the turn.
+        """
+        return self._make(UndoRecord(zobrist=self.zobrist), self._end_turn, color)
+
+    def _make(self, record: UndoRecord, action, *args) -> UndoRecord:
+        """Call action with the given arguments, recording its changes in the
+        given record and pushing the record on the undo stack.
+
+        Returns:
+            UndoRecord: The record.
+        """
+        self._undo = record
+        try:
+            action(*args)
+        finally:
+            self._undo = None
+        self.undo_stack.append(record)
+        return record
+
+    def _add_roll(self, values: List[int]):
+        """Add the given values to the roll, using up a pending bonus roll.
+
+        Args:
+            values (List[int]): The rolled values.
+        """
+        if self.bonus_rolls:
+            self._record_attr(self, "bonus_rolls")
+            self.bonus_rolls -= 1
+        for value in values:
+            self._append_roll(value)
+
+    def _end_turn(self, color: PieceColor):
+        """Drop the rest of the roll and clear the flags of the enemy pieces held by
+        the TiedPieces of the given player.
+
+        Args:
+            color (PieceColor): The player whose turn ends.
+        """
+        while self._roll:
+            self._remove_roll(self._roll[-1])
+        self.clear_enemy_pieces_with_player_tied_piece(color)
+
+    def unmake_move(self) -> UndoRecord:
+        """Revert the last change pushed on the undo stack by :py:meth:`make_move`,
+        :py:meth:`make_roll` or :py:meth:`make_end_turn`.
+
+        Returns:
+            UndoRecord: The reverted changes.
+        """
+        record = self.undo_stack.pop()
+        for change in reversed(record.changes):
+            kind = change[0]
+            if kind == ADD_PIECE:
+                self._remove_piece(change[1], change[2])
+            elif kind == REMOVE_PIECE:
+                self._add_piece(change[1], change[2], change[3])
+            elif kind == SET_ATTR:
+                if change[3] is MISSING:
+                    delattr(change[1], change[2])
+                else:
+                    setattr(change[1], change[2], change[3])
+            elif kind == SET_ITEM:
+                change[1][change[2]] = change[3]
+            elif kind == APPEND_ROLL:
+                self._roll.pop()
+            elif kind == REMOVE_ROLL:
+                self._roll.insert(change[2], change[1])
+        self.zobrist = record.zobrist
+        return record
+
+    def _add_piece(
+        self, square: Square, piece: Piece | TiedPiece, index: Optional[int] = None
+    ):
+        """Add a piece to a square, recording the change when a move is being
+        recorded.
+
+        Args:
+            square (Square): The square to add the piece to.
+            piece (Piece | TiedPiece): The piece to add.
+            index (Optional[int], optional): The index in the square's pieces to
+                insert the piece at. Defaults to None, which appends the piece.
+        """
+        square.add_piece(piece, index)
+        self._update_holders(square, piece)
+        self._count_piece(square, piece, 1)
+        self.changed_squares.add((square.row, square.col))
+        self.zobrist = (self.zobrist + self._piece_key(square, piece)) & HASH_MASK
+        if self._undo is not None:
+            self._undo.changes.append((ADD_PIECE, square, piece))
+
+    def _remove_piece(self, square: Square, piece: Piece | TiedPiece):
+        """Remove a piece from a square, recording the change when a move is being
+        recorded.
+
+        Args:
+            square (Square): The square to remove the piece from.
+            piece (Piece | TiedPiece): The piece to remove.
+        """
+        if self._undo is not None:
+            self._undo.changes.append(
+                (REMOVE_PIECE, square, piece, square.pieces.index(piece))
+            )
+        square.remove_piece(piece)
+        self._update_holders(square, piece)
+        self._count_piece(square, piece, -1)
+        self.changed_squares.add((square.row, square.col))
+        self.zobrist = (self.zobrist - self._piece_key(square, piece)) & HASH_MASK
+
+    def _append_roll(self, value: int):
+        """Append a value to the roll, recording the change when a move is being
+        recorded.
+
+        Args:
+            value (int): The rolled value.
+        """
+        self._roll.append(value)
+        self.zobrist = (self.zobrist + self.zobrist_keys.roll[value]) & HASH_MASK
+        if self._undo is not None:
+            self._undo.changes.append((APPEND_ROLL, value))
+
+    def _remove_roll(self, value: int):
+        """Remove a value from the roll, recording the change when a move is being
+        recorded.
+
+        Args:
+            value (int): The used roll value.
+        """
+        index = self._roll.index(value)
+        del self._roll[index]
+        self.zobrist = (self.zobrist - self.zobrist_keys.roll[value]) & HASH_MASK
+        if self._undo is not None:
+            self._undo.changes.append((REMOVE_ROLL, value, index))
+
+    def _set_with_enemy_tied_piece(
+        self, piece: Piece, square: Optional[Square], value: bool
+    ):
+        """Set or clear the with enemy TiedPiece flag of a piece, keeping the hash
+        of the board up to date.
+
+        Args:
+            piece (Piece): The piece.
+            square (Optional[Square]): The square the piece is on, or None when it
+                is not on a square of its own (e.g. it has been tied).
+            value (bool): The new value of the flag.
+        """
+        self._record_attr(piece, "with_enemy_tied_piece")
+        if square is not None:
+            self.zobrist -= self._piece_key(square, piece)
+        if value:
+            piece.set_with_enemy_tied_piece()
+        else:
+            piece.clear_with_enemy_tied_piece()
+        if square is not None:
+            self.zobrist = (self.zobrist + self._piece_key(square, piece)) & HASH_MASK
+
+    def _record_attr(self, obj: object, name: str):
+        """Record the current value of an attribute that is about to change when a
+        move is being recorded.
+
+        Args:
+            obj (object): The object whose attribute changes.
+            name (str): The name of the attribute.
+        """
+        if self._undo is not None:
+            self._undo.changes.append(
+                (SET_ATTR, obj, name, getattr(obj, name, MISSING))
+            )
+
+    def _record_item(self, mapping: dict, key):
+        """Record the current value of a dict item that is about to change when a
+        move is being recorded.
+
+        Args:
+            mapping (dict): The dict whose item changes.
+            key: The key of the item.
+        """
+        if self._undo is not None:
+            self._undo.changes.append((SET_ITEM, mapping, key, mapping[key]))
+
     def valid_move(self, piece: Piece | TiedPiece, move: Move) -> bool:
-        """Checks whether a move is valid.
+        """Checks whether a move is valid, i.e. equal to one of the piece's moves
+        calculated by :py:meth:`calc_moves`, with a lookup of its final square. The
+        squares of the move may be coordinates or squares.
 
         Args:
             piece (Piece | TiedPiece): The Piece to move.
@@ -269,7 +821,12 @@ class Board:
         Returns:
             bool: Whether the move is valid.
         """
-        return move in piece.moves
+        final = COORDINATES[move.final.row][move.final.col]
+        for tying_move in (False, True):
+            valid_move = piece.moves.get((final, tying_move))
+            if valid_move is not None and valid_move == move:
+                return True
+        return False
 
     def set_capture_flag(self, player: PieceColor):
         """Sets the a player's capture flag enabling them to move to the inner
@@ -278,6 +835,10 @@ class Board:
         Args:
             player (PieceColor): The player whose capture flag is to be set.
         """
+        if not self.player_captured_flags[player]:
+            self.zobrist = (
+                self.zobrist + self.zobrist_keys.captured[self.player_index[player]]
+            ) & HASH_MASK
         self.player_captured_flags[player] = True
 
     def get_alias_to_row_col(self, alias: int) -> Tuple[int, int]:
@@ -292,13 +853,86 @@ class Board:
         Returns:
             Tuple[int, int]: The (row, col) of the square.
         """
-        if alias not in self.alias_to_row_col:
-            raise InvalidAliasException
-        else:
-            return self.alias_to_row_col[alias]
+        row_col = (
+            self.paths.alias_to_row_col[alias]
+            if 0 <= alias < len(self.paths.alias_to_row_col)
+            else None
+        )
+        if row_col is None:
+            raise InvalidAliasException(alias)
+        return row_col
+
+    def get_row_col_to_alias(self, player: PieceColor, row: int, col: int) -> int:
+        """Return the given player's alias of the square at row and col.
+
+        For example, the square at (6, 3) is square 0 for player 1 and 112 for
+        player 2 in a two player game.
+
+        Args:
+            player (PieceColor): The player's color.
+            row (int): The row of the square.
+            col (int): The col of the square.
 
-    def can_move(self, player) -> bool:
-        return True
+        Returns:
+            int: The player's alias of the square.
+        """
+        return self.paths.row_col_to_alias[self.player_index[player]][row * COLS + col]
+
+    def can_move(self, player: PieceColor) -> bool:
+        """Check whether the given player can make any move with the current roll.
+
+        Args:
+            player (PieceColor): The player's color.
+
+        Returns:
+            bool: True if the player has at least one legal move.
+        """
+        return next(self._generate_legal_moves(player), None) is not None
+
+    def legal_moves(self, player: PieceColor) -> List[LegalMove]:
+        """Generate every legal move of the given player for the current roll.
+        Identical pieces stacked on the same square yield their moves once, and
+        every roll value is tried once however many times it was rolled.
+
+        Args:
+            player (PieceColor): The player's color.
+
+        Returns:
+            List[LegalMove]: The legal moves as (piece, roll, move) tuples.
+        """
+        return list(self._generate_legal_moves(player))
+
+    def _generate_legal_moves(self, player: PieceColor) -> Iterator[LegalMove]:
+        """Lazily generate the legal moves of the given player, see
+        :py:meth:`legal_moves`.
+
+        Args:
+            player (PieceColor): The player's color.
+
+        Yields:
+            LegalMove: The legal moves as (piece, roll, move) tuples.
+        """
+        if not self.roll:
+            return
+        rolls = sorted(set(self.roll))
+        # Only the squares with a piece of the player that has not fruited, in
+        # the order of the rows and columns.
+        occupied = self.bitboards.occupied(PieceColor[player].value) & ~FRUIT_BIT
+        while occupied:
+            bit = occupied & -occupied
+            occupied ^= bit
+            flat = bit.bit_length() - 1
+            square = self.squares[flat // COLS][flat % COLS]
+            seen = set()
+            for piece in square.pieces:
+                if piece.color != player:
+                    continue
+                kind = (piece.name, piece.with_enemy_tied_piece)
+                if kind in seen:
+                    continue
+                seen.add(kind)
+                for places, move in self._generate_piece_moves(piece, rolls):
+                    yield LegalMove(piece, places, move)
 
     def calc_moves(self, piece: Piece):
         """Calculate which of moves from the roll the given Piece at row and col
@@ -309,10 +943,32 @@ class Board:
             piece (Piece): The piece whose moves are to be calculated.
         """
         piece.clear_moves()
+        rolls = sorted(self.roll) if piece.name == "Piece" else self.roll
+        for _, move in self._generate_piece_moves(piece, rolls):
+            piece.add_move(move)
+
+    def _generate_piece_moves(
+        self, piece: Piece | TiedPiece, rolls: List[int]
+    ) -> Iterator[Tuple[int, Move]]:
+        """Generate the moves the given piece can undertake with the given roll
+        values.
+
+        Args:
+            piece (Piece | TiedPiece): The piece whose moves are to be generated.
+            rolls (List[int]): The roll values to try. For a Piece, they must be
+                sorted in increasing order.
+
+        Yields:
+            Tuple[int, Move]: The roll value used by the move and the move.
+        """
         if piece.is_fruit():
             return
         row, col = self.get_alias_to_row_col(piece.position)
+        initial = COORDINATES[row][col]
         color = piece.color
+        destinations = self.paths.destination_row_col[self.player_index[color]][
+            piece.position % GRID_OFFSET
+        ]
         if piece.name == "Piece" and not piece.with_enemy_tied_piece:
             can_tie = (
                 True
@@ -326,14 +982,14 @@ class Board:
                 if self.player_captured_flags[color]
                 else piece.final_outer_position
             )
-            for places in sorted(self.roll):
+            for places in rolls:
                 if (
                     self.intermediate_squares_have_enemy_tied_pieces(piece, places)
                     == False
                 ):
                     pos = piece.position + places
                     if pos <= can_go_till:
-                        final_row, final_col = self.get_alias_to_row_col(pos)
+                        final_row, final_col = destinations[places]
                         if (
                             (pos % GRID_OFFSET)
                             <= PLACES_BEFORE_INNER  # if still in the outer loop
@@ -346,47 +1002,41 @@ class Board:
                                 or self.squares[final_row][final_col].is_safe_house
                             )
                         ) or (pos % GRID_OFFSET > PLACES_BEFORE_INNER):
-                            move_to_add = Move(
-                                Square(row=row, col=col),
-                                Square(row=final_row, col=final_col),
+                            yield places, Move(
+                                initial, COORDINATES[final_row][final_col]
                             )
-                            piece.add_move(move_to_add)
                     if (
                         places == 2
                         and can_tie
                         and (piece.position % GRID_OFFSET > PLACES_BEFORE_INNER)
                     ):
-                        final_row, final_col = self.get_alias_to_row_col(
-                            piece.position + 1
-                        )
-                        final_Square = Square(row=final_row, col=final_col)
-                        if not final_Square.is_safe_house:
-                            move_to_add = Move(
-                                initial=Square(row=row, col=col),
-                                final=Square(row=final_row, col=final_col),
-                                tying_move=True,
+                        final_row, final_col = destinations[1]
+                        final = COORDINATES[final_row][final_col]
+                        if not final.is_safe_house:
+                            yield places, Move(
+                                initial=initial, final=final, tying_move=True
                             )
-                            piece.add_move(move_to_add)
+                    if pos > can_go_till:
+                        # The larger roll values overshoot as well.
+                        break
                 else:
                     break
         if piece.name == "TiedPiece":
             can_go_till = piece.fruit_position
-            for places in self.roll:
+            for places in rolls:
                 if places % 2 == 0:
                     pos = piece.position + places // 2
                     if pos <= can_go_till:
-                        final_row, final_col = self.get_alias_to_row_col(pos)
-                        move_to_add = Move(
-                            Square(row=row, col=col),
-                            Square(row=final_row, col=final_col),
-                        )
-                        piece.add_move(move_to_add)
+                        final_row, final_col = destinations[places // 2]
+                        yield places, Move(initial, COORDINATES[final_row][final_col])
 
     def intermediate_squares_have_enemy_tied_pieces(
         self, piece: Piece, places: int
     ) -> bool:
-        """Checks whether there are any enemy TiedPieces between the piece's location
-        and its intended final location.
+        """Checks whether an enemy TiedPiece holds up the piece between its location
+        and its intended final location, i.e. whether one of the squares it passes
+        is not a safe house and has an enemy TiedPiece without a single piece of
+        the same color. Looked up in :py:attr:`next_blocked` in O(1).
 
         Args:
             piece (Piece): The piece whose path should be checked.
@@ -396,55 +1046,23 @@ class Board:
             bool: True if there is a enemy TiedPiece between the piece's position
             and its position advanced by places.
         """
-        for intermediate_place in range(1, places):
-            intermediate_row, intermediate_col = self.get_alias_to_row_col(
-                intermediate_place + piece.position
-            )
-            if (intermediate_row, intermediate_col) not in SAFE_HOUSES and self.squares[
-                intermediate_row
-            ][intermediate_col].has_enemy_tied_piece(piece.color):
-                print("Here")
-                intermediate_Tied_Piece = [
-                    Tied_Piece
-                    for Tied_Piece in self.squares[intermediate_row][
-                        intermediate_col
-                    ].pieces
-                    if Tied_Piece.color != piece.color
-                ][0]
-                if not self.squares[intermediate_row][
-                    intermediate_col
-                ].has_single_team_piece(intermediate_Tied_Piece.color):
-                    print("3Here")
-                    return True
-        return False
+        position = piece.position % GRID_OFFSET
+        return (
+            self.next_blocked[self.player_index[piece.color]][position]
+            < position + places
+        )
 
-    def kawade(self, testing: bool = False):
+    def kawade(self):
         """This method generates the rolls for the current player and adds it to the
         roll vector of the Board instance. If a player rolls 4, 6, or 12, the player
         gets to re roll.
 
-        Args:
-            testing (bool, optional): Used during testing to generate a given roll.
-                Defaults to False.
+        The rolls are drawn from the board's :py:attr:`roll_source`; pass a
+        :py:class:`src.rolls.FixedRollSource` to the board to get given rolls
+        during testing.
         """
-        if not testing:
-            roll = np.random.choice(
-                a=[1, 2, 3, 4, 5, 6, 12],
-                p=[6 / 64, 15 / 64, 20 / 64, 15 / 64, 6 / 64, 1 / 64, 1 / 64],
-            )
-            if self.roll:
-                self.roll.append(roll)
-            else:
-                self.roll = [roll]
-            while self.roll[-1] in [4, 6, 12]:
-                self.roll.append(
-                    np.random.choice(
-                        a=[1, 2, 3, 4, 5, 6, 12],
-                        p=[6 / 64, 15 / 64, 20 / 64, 15 / 64, 6 / 64, 1 / 64, 1 / 64],
-                    )
-                )
-        else:
-            self.roll = [2]
+        for value in self.roll_source.kawade():
+            self._append_roll(value)
 
     def clear_enemy_pieces_with_player_tied_piece(self, color: PieceColor):
         """Clear the flag on all enemy pieces that are on the same square the
@@ -455,11 +1073,19 @@ class Board:
         """
         if self.enemy_piece_with_player_tied_piece[color]:
             for piece in self.enemy_piece_with_player_tied_piece[color]:
-                piece.clear_with_enemy_tied_piece()
+                row, col = self.get_alias_to_row_col(piece.position)
+                square = self.squares[row][col]
+                self._set_with_enemy_tied_piece(
+                    piece,
+                    square if any(p is piece for p in square.pieces) else None,
+                    False,
+                )
+            self._record_item(self.enemy_piece_with_player_tied_piece, color)
             self.enemy_piece_with_player_tied_piece[color] = None
 
     def has_player_finished(self, player: PieceColor) -> bool:
-        """Checks whether all of the given player's pieces are in the finish square.
+        """Checks whether all of the given player's pieces are in the finish square,
+        in O(1) with the :py:attr:`fruited` counter.
 
         Args:
             player (PieceColor): The player's color.
@@ -467,10 +1093,4 @@ class Board:
         Returns:
             bool: Whether all of the player's pieces are in the finish square.
         """
-        fruited_pieces = 0
-        for piece in self.squares[ROWS // 2][COLS // 2].pieces:
-            if piece.color == player:
-                fruited_pieces += 1 if piece.name == "Piece" else 2
-        if fruited_pieces == PIECES_PER_PLAYER:
-            return True
-        return False
+        return self.fruited[player] == PIECES_PER_PLAYER
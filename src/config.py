@@ -2,10 +2,14 @@ import pygame
 import os
 from theme import Theme
 from sound import Sound
+from textures import TextureCache
+from overlays import OverlayCache
+from stack_sprites import StackSpriteCache
 
 
 class Config:
-    """The rendering configuration for the game. Handles the theme, font, and sounds."""
+    """The rendering configuration for the game. Handles the theme, font, sounds,
+    piece textures, square sprites and highlight overlays."""
 
     def __init__(self):
         self.themes = list(Theme.__members__.keys())
@@ -14,6 +18,9 @@ class Config:
         self.font = pygame.font.SysFont("monospace", 18, bold=True)
         self.move_sound = Sound(os.path.join("assets/sounds/move.wav"))
         self.capture_sound = Sound(os.path.join("assets/sounds/capture.wav"))
+        self.textures = TextureCache()
+        self.stack_sprites = StackSpriteCache(self.textures)
+        self.overlays = OverlayCache()
 
     def change_theme(self):
         """Change the theme to the next theme in the :py:class:`src.theme.Theme` Enum."""
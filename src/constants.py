@@ -10,6 +10,8 @@ SQSIZE = WIDTH // ROWS
 
 LINE_WIDTH = 5
 
+FPS = 60
+
 BG_COLOR = (24, 24, 24)
 LINE_COLOR = (25, 65, 124)
 CROSS_COLOR = (66, 66, 66)
@@ -372,6 +374,9 @@ SAFE_HOUSES = [
     (6, 3),
     (6, 6),
 ]
+# The safe houses as a mask with the bit 1 << (row * COLS + col) of every safe
+# house set.
+SAFE_MASK = sum(1 << (row * COLS + col) for row, col in SAFE_HOUSES)
 
 BASE_GRID = np.array(
     [
@@ -389,3 +394,12 @@ GRID_OFFSET = 100
 
 PLACES_BEFORE_INNER = 23
 PLACES_TO_FRUIT = 48
+
+ROLL_VALUES = (1, 2, 3, 4, 5, 6, 12)
+# The chance of every value of ROLL_VALUES in 64ths, and the values that give
+# another throw.
+ROLL_WEIGHTS = (6, 15, 20, 15, 6, 1, 1)
+REROLL_VALUES = (4, 6, 12)
+# The version of the game rules, stored with game records and tablebases. Bump it
+# whenever a rule change makes old records replay differently.
+RULE_VERSION = 3
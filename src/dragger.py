@@ -4,13 +4,19 @@ import pygame
 from constants import SQSIZE
 from move import Move
 from piece import Piece
-from square import Square
+from square import Coordinate
+from piece_sprites import PieceSprites
 
 
 class Dragger:
-    """The Dragger class to handle the dragging of pieces."""
+    """The Dragger class to handle the dragging of pieces.
 
-    def __init__(self):
+    Args:
+        sprites (PieceSprites): The rendering side of the pieces.
+    """
+
+    def __init__(self, sprites: PieceSprites):
+        self.sprites = sprites
         self.piece = None
         self.dragging = False
         self.mouseX = 0
@@ -26,16 +32,14 @@ class Dragger:
         Args:
             surface (pygame.Surface): The pygame surface to draw on.
         """
-        # texture
-        self.piece.set_texture(size=128)
-        texture = self.piece.texture
         # img
-        img = pygame.image.load(texture)
+        img = self.sprites.texture(self.piece, size=128)
         # rect
         img_center = (self.mouseX, self.mouseY)
-        self.piece.texture_rect = img.get_rect(center=img_center)
+        rect = img.get_rect(center=img_center)
+        self.sprites.set_rect(self.piece, rect)
         # blit
-        surface.blit(img, self.piece.texture_rect)
+        surface.blit(img, rect)
 
     # other methods
 
@@ -72,22 +76,27 @@ class Dragger:
         self.dragging = False
 
     def get_move_from_initial_final(
-        self, initial: Square, final: Square
+        self, initial: Coordinate, final: Coordinate, prefer_tying: bool = False
     ) -> Move | None:
-        """Given an initial square and a final square, check in the piece's moves list
-        for a move with the given initial and final squares and return it if present,
-        else return None.
+        """Given an initial square and a final square, look up the piece's move to the
+        final square and return it if it starts on the initial square, else return
+        None. A single piece may reach the same square with a move and with a tying
+        move; then the preferred one is returned.
 
         Args:
-            initial (Square): The initial square.
-            final (Square): The final square.
+            initial (Coordinate): The initial square.
+            final (Coordinate): The final square.
+            prefer_tying (bool, optional): Whether to return the tying move when
+                both exist. Defaults to False.
 
         Returns:
             Move | None:
              - Move: If a move with the initial and final squares is present, return it.
              - None: Else, return None.
         """
-        for move in self.piece.moves:
-            if move.initial == initial and move.final == final:
+        final = Coordinate(final.row, final.col)
+        for tying_move in (prefer_tying, not prefer_tying):
+            move = self.piece.moves.get((final, tying_move))
+            if move is not None and move.initial == initial:
                 return move
         return None
@@ -0,0 +1,24 @@
+"""The headless rules engine of Chowka Bhara.
+
+The engine is made of :py:class:`src.board.Board`, :py:class:`src.square.Square`,
+:py:class:`src.piece.Piece`, :py:class:`src.piece.TiedPiece` and
+:py:class:`src.move.Move`. None of these import pygame, so games can be simulated
+in processes that have no display and never initialize SDL. Rendering state
+(textures and rects) is kept on the UI side by
+:py:class:`src.piece_sprites.PieceSprites`.
+"""
+
+from board import Board
+from move import Move
+from piece import Piece, PieceColor, TiedPiece
+from square import InvalidAliasException, Square
+
+__all__ = [
+    "Board",
+    "InvalidAliasException",
+    "Move",
+    "Piece",
+    "PieceColor",
+    "Square",
+    "TiedPiece",
+]
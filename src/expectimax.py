@@ -0,0 +1,392 @@
+import time
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+from board import Board
+from constants import PIECES_PER_PLAYER, PLACES_TO_FRUIT
+from move import LegalMove
+from piece import PieceColor
+from policies import GreedyPolicy, Policy
+from rolls import get_roll_distribution
+
+# The value of a won and of a lost game. Heuristic values lie strictly between.
+WIN = 1.0
+LOSS = -1.0
+
+# The time (in s) kept aside from the budget of a move to unwind the search.
+TIME_MARGIN = 0.015
+
+# The kinds of transposition table entries.
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the time budget of a move is used up."""
+
+
+class ExpectimaxBot(Policy):
+    """A computer player that searches the game tree with expectimax.
+
+    Decision nodes are the moves of the player whose turn it is and chance nodes
+    are the rolls, both at the start of a turn and the bonus rolls after a
+    capture, over the exact distribution of
+    :py:func:`src.rolls.get_roll_distribution`. With more than two players the
+    opponents are assumed to play together against the bot (paranoid search),
+    which keeps the search two-sided so that chance nodes can be pruned with
+    Ballard's Star1 and Star2 algorithms.
+
+    The search deepens iteratively, one move at a time, until the time budget is
+    used up, and keeps a transposition table keyed by
+    :py:meth:`src.board.Board.position_hash` across the moves of a game, one for
+    every player the bot plays for.
+
+    Args:
+        time_budget (float, optional): The time (in s) the bot may think about a
+            move. Defaults to 0.2.
+        max_depth (int, optional): The maximum search depth in moves.
+            Defaults to 32.
+        roll_mass (float, optional): The probability mass of the rolls of chance
+            nodes; the most likely rolls are kept and their probabilities scaled
+            to sum to one. Defaults to 0.95.
+        probe (bool, optional): Whether to probe chance nodes (Star2) before
+            searching them. Defaults to True.
+        table_size (int, optional): The number of entries after which the
+            transposition table is cleared. Defaults to 2**18.
+    """
+
+    name = "expectimax"
+
+    def __init__(
+        self,
+        time_budget: float = 0.2,
+        max_depth: int = 32,
+        roll_mass: float = 0.95,
+        probe: bool = True,
+        table_size: int = 1 << 18,
+    ):
+        self.time_budget = time_budget
+        self.max_depth = max_depth
+        self.roll_mass = roll_mass
+        self.probe = probe
+        self.table_size = table_size
+        distribution = get_roll_distribution(roll_mass)
+        self.outcomes = list(
+            zip(distribution.normalized().tolist(), distribution.rolls)
+        )
+        self.tables: Dict[PieceColor, Dict[int, tuple]] = {}
+        self.table: Dict[int, Tuple[int, float, int, Optional[tuple]]] = {}
+        self.nodes = 0
+        self.depth = 0
+
+    def choose(
+        self,
+        board: Board,
+        player: PieceColor,
+        moves: List[LegalMove],
+        rng: Optional[np.random.Generator] = None,
+    ) -> LegalMove:
+        """Pick the move with the best expected value found within the time budget.
+        The board is searched in place and left as it was.
+
+        Args:
+            board (Board): The board.
+            player (PieceColor): The player to move.
+            moves (List[LegalMove]): The legal moves of the player. Never empty.
+            rng (Optional[np.random.Generator], optional): Unused, the search is
+                deterministic.
+
+        Returns:
+            LegalMove: The move to make.
+        """
+        moves = self._order(board, player, moves)
+        self.nodes = 0
+        self.depth = 0
+        if len(moves) == 1:
+            return moves[0]
+        # Values are for the bot's player, so every player gets its own table.
+        self.table = self.tables.setdefault(player, {})
+        if len(self.table) > self.table_size:
+            self.table.clear()
+
+        self._board = board
+        self._bot = player
+        self._player = player
+        self._deadline = time.perf_counter() + self.time_budget - TIME_MARGIN
+        board.defer_bonus_rolls = True
+        try:
+            for depth in range(1, self.max_depth + 1):
+                try:
+                    value, best = self._search_root(moves, depth)
+                except SearchTimeout:
+                    break
+                self.depth = depth
+                moves.insert(0, moves.pop(best))
+                if value >= WIN or value <= LOSS:
+                    break
+        finally:
+            board.defer_bonus_rolls = False
+        return moves[0]
+
+    def _search_root(self, moves: List[LegalMove], depth: int) -> Tuple[float, int]:
+        """Search the moves of the root to the given depth.
+
+        Args:
+            moves (List[LegalMove]): The ordered legal moves of the bot.
+            depth (int): The search depth in moves.
+
+        Returns:
+            Tuple[float, int]: The value of the best move and its index in moves.
+        """
+        alpha = LOSS
+        best = 0
+        for idx, legal_move in enumerate(moves):
+            value = self._after_move(legal_move, depth, alpha, WIN)
+            if value > alpha or idx == 0:
+                alpha = max(alpha, value)
+                best = idx
+        return alpha, best
+
+    def _value(self, depth: int, alpha: float, beta: float) -> float:
+        """Return the value for the bot of the board during the turn of
+        ``self._player``, searched to the given depth with the window
+        (alpha, beta).
+        """
+        board = self._board
+        self.nodes += 1
+        if self.nodes & 15 == 0 and time.perf_counter() > self._deadline:
+            raise SearchTimeout
+        if board.bonus_rolls:
+            return self._chance(depth, alpha, beta)
+        if depth <= 0:
+            return self.evaluate(board, self._bot)
+
+        player = self._player
+        moves = board.legal_moves(player) if board.roll else []
+        if not moves:
+            return self._end_turn(depth - 1, alpha, beta)
+
+        key = board.position_hash(player)
+        entry = self.table.get(key)
+        best_key = None
+        if entry is not None:
+            entry_depth, entry_value, entry_kind, best_key = entry
+            if entry_depth >= depth and (
+                entry_kind == EXACT
+                or (entry_kind == LOWER and entry_value >= beta)
+                or (entry_kind == UPPER and entry_value <= alpha)
+            ):
+                return entry_value
+
+        maximizing = player == self._bot
+        original_alpha, original_beta = alpha, beta
+        best_value = LOSS - 1 if maximizing else WIN + 1
+        best_move = None
+        for legal_move in self._order(board, player, moves, best_key):
+            value = self._after_move(legal_move, depth, alpha, beta)
+            if maximizing and value > best_value:
+                best_value, best_move = value, legal_move
+                alpha = max(alpha, value)
+            elif not maximizing and value < best_value:
+                best_value, best_move = value, legal_move
+                beta = min(beta, value)
+            if alpha >= beta:
+                break
+
+        if best_value <= original_alpha:
+            kind = UPPER
+        elif best_value >= original_beta:
+            kind = LOWER
+        else:
+            kind = EXACT
+        self.table[key] = (depth, best_value, kind, self.move_key(best_move))
+        return best_value
+
+    def _after_move(
+        self, legal_move: LegalMove, depth: int, alpha: float, beta: float
+    ) -> float:
+        """Return the value of the board after the given move of ``self._player``."""
+        board = self._board
+        board.make_move(legal_move.piece, legal_move.move)
+        try:
+            if board.has_player_finished(self._player):
+                return WIN if self._player == self._bot else LOSS
+            return self._value(depth - 1, alpha, beta)
+        finally:
+            board.unmake_move()
+
+    def _end_turn(self, depth: int, alpha: float, beta: float) -> float:
+        """Return the value of the board after the turn of ``self._player`` ends."""
+        board = self._board
+        player = self._player
+        board.make_end_turn(player)
+        self._player = self._next_player(player)
+        try:
+            if depth <= 0:
+                return self.evaluate(board, self._bot)
+            return self._chance(depth, alpha, beta)
+        finally:
+            self._player = player
+            board.unmake_move()
+
+    def _chance(self, depth: int, alpha: float, beta: float) -> float:
+        """Return the expected value of a roll of ``self._player``, pruned with
+        Star2 probing and Star1 bounds."""
+        board = self._board
+        outcomes = self.outcomes
+        lower = [LOSS] * len(outcomes)
+        upper = [WIN] * len(outcomes)
+        if self.probe:
+            maximizing = self._player == self._bot
+            for idx, (_, values) in enumerate(outcomes):
+                board.make_roll(values)
+                try:
+                    bound = self._probe(depth)
+                finally:
+                    board.unmake_move()
+                if bound is None:
+                    continue
+                if maximizing:
+                    lower[idx] = bound
+                else:
+                    upper[idx] = bound
+            lowest = sum(p * bound for (p, _), bound in zip(outcomes, lower))
+            if lowest >= beta:
+                return lowest
+            highest = sum(p * bound for (p, _), bound in zip(outcomes, upper))
+            if highest <= alpha:
+                return highest
+
+        searched = 0.0
+        rest_lower = sum(p * bound for (p, _), bound in zip(outcomes, lower))
+        rest_upper = sum(p * bound for (p, _), bound in zip(outcomes, upper))
+        for idx, (probability, values) in enumerate(outcomes):
+            rest_lower -= probability * lower[idx]
+            rest_upper -= probability * upper[idx]
+            child_alpha = (alpha - searched - rest_upper) / probability
+            child_beta = (beta - searched - rest_lower) / probability
+            if lower[idx] >= child_beta:
+                return searched + probability * lower[idx] + rest_lower
+            if upper[idx] <= child_alpha:
+                return searched + probability * upper[idx] + rest_upper
+            board.make_roll(values)
+            try:
+                value = self._value(
+                    depth, max(child_alpha, lower[idx]), min(child_beta, upper[idx])
+                )
+            finally:
+                board.unmake_move()
+            if value <= child_alpha:
+                return searched + probability * value + rest_upper
+            if value >= child_beta:
+                return searched + probability * value + rest_lower
+            searched += probability * value
+        return searched
+
+    def _probe(self, depth: int) -> Optional[float]:
+        """Search only the first move of ``self._player`` after a roll. Its value is
+        a lower bound of the roll's value when the bot moves and an upper bound
+        when an opponent moves.
+
+        Returns:
+            Optional[float]: The bound, or None if the player cannot move.
+        """
+        board = self._board
+        if board.bonus_rolls or depth <= 0:
+            return None
+        moves = board.legal_moves(self._player)
+        if not moves:
+            return None
+        entry = self.table.get(board.position_hash(self._player))
+        best_key = entry[3] if entry is not None else None
+        legal_move = self._order(board, self._player, moves, best_key)[0]
+        return self._after_move(legal_move, depth, LOSS, WIN)
+
+    def _next_player(self, player: PieceColor) -> PieceColor:
+        """Return the player after the given one that has not finished."""
+        board = self._board
+        players = board.players
+        idx = players.index(player)
+        for offset in range(1, len(players)):
+            candidate = players[(idx + offset) % len(players)]
+            if not board.has_player_finished(candidate):
+                return candidate
+        return player
+
+    @staticmethod
+    def _order(
+        board: Board,
+        player: PieceColor,
+        moves: List[LegalMove],
+        best_key: Optional[tuple] = None,
+    ) -> List[LegalMove]:
+        """Order the moves to search: the best move of the transposition table
+        first, then captures, tying moves and the moves using the largest rolls.
+        """
+        ordered = sorted(
+            moves,
+            key=lambda legal_move: GreedyPolicy.score(board, player, legal_move),
+            reverse=True,
+        )
+        if best_key is not None:
+            for idx, legal_move in enumerate(ordered):
+                if ExpectimaxBot.move_key(legal_move) == best_key:
+                    ordered.insert(0, ordered.pop(idx))
+                    break
+        return ordered
+
+    @staticmethod
+    def move_key(legal_move: Optional[LegalMove]) -> Optional[tuple]:
+        """Return a key identifying a move across transpositions."""
+        if legal_move is None:
+            return None
+        move = legal_move.move
+        return (
+            legal_move.piece.name,
+            move.initial.row,
+            move.initial.col,
+            move.final.row,
+            move.final.col,
+            bool(move.tying_move),
+        )
+
+    @staticmethod
+    def evaluate(board: Board, player: PieceColor) -> float:
+        """Return the heuristic value of the board for the given player: its
+        progress minus the progress of its strongest opponent that has not
+        finished, see :py:meth:`progress`.
+
+        Args:
+            board (Board): The board.
+            player (PieceColor): The player.
+
+        Returns:
+            float: The value, strictly between LOSS and WIN.
+        """
+        progress = ExpectimaxBot.progress(board)
+        opponents = [
+            progress[color]
+            for color in board.players
+            if color != player and progress[color] < 1.0
+        ]
+        return 0.99 * (progress[player] - max(opponents, default=0.0))
+
+    @staticmethod
+    def progress(board: Board) -> Dict[PieceColor, float]:
+        """Return the progress of every player: the fraction of the path its pieces
+        have covered (see :py:attr:`src.board.Board.places_covered`), weighted by
+        0.9, plus 0.1 once it has captured a piece (which opens the inner squares).
+        A player that has finished has a progress of 1.
+
+        Args:
+            board (Board): The board.
+
+        Returns:
+            Dict[PieceColor, float]: The progress of every player, between 0 and 1.
+        """
+        full = PIECES_PER_PLAYER * PLACES_TO_FRUIT
+        return {
+            color: 0.9 * places / full + 0.1 * board.player_captured_flags[color]
+            for color, places in board.places_covered.items()
+        }
@@ -1,9 +1,8 @@
 from enum import Enum
-from typing import Tuple
+from typing import Dict, List, Tuple
 import pygame
 from constants import (
     SQSIZE,
-    IMG_CENTERS,
     ROWS,
     COLS,
     SAFE_HOUSES,
@@ -16,7 +15,10 @@ from dragger import Dragger
 from piece import PieceColor
 from config import Config
 from square import Square
-import numpy as np
+from theme import Theme
+from renderer import DirtyRenderer
+from overlays import HighlightKind
+from piece_sprites import PieceSprites
 
 
 class Game:
@@ -32,10 +34,14 @@ class Game:
         self.current_stage = self.game_stages[self.game_stage_id]
         self.hovered_sqr = None
         self.board = Board(players=self.players)
-        self.dragger = Dragger()
         self.config = Config()
-        self.player_has_finished = []
+        self.config.textures.preload(self.players)
+        self.sprites = PieceSprites(self.config.textures)
+        self.dragger = Dragger(self.sprites)
         self.running = True
+        self._bg_layers: Dict[Theme, pygame.Surface] = {}
+        self._bg_layer = None
+        self.renderer = DirtyRenderer(self)
 
     def show_bg(self, surface: pygame.Surface):
         """Shows the background on the given pygame surface.
@@ -43,11 +49,30 @@ class Game:
         Args:
             surface (pygame.Surface): The pygame surface to draw the background on.
         """
-        theme = self.config.theme
-        surface.fill(theme.value.light)
-        self._draw_lines(surface, theme.value.dark)
-        self._draw_safe_houses(surface, theme.value.dark)
-        self._draw_letter_markings(surface, theme.value.dark)
+        if self._bg_layer is None:
+            self._bg_layer = self._get_bg_layer(self.config.theme)
+        surface.blit(self._bg_layer, (0, 0))
+
+    def _get_bg_layer(self, theme: Theme) -> pygame.Surface:
+        """Return the prerendered background of the given theme, rendering it on
+        its first use.
+
+        Args:
+            theme (Theme): The theme of the background.
+
+        Returns:
+            pygame.Surface: The background surface.
+        """
+        if theme not in self._bg_layers:
+            layer = pygame.Surface((WIDTH, HEIGHT))
+            if pygame.display.get_surface() is not None:
+                layer = layer.convert()
+            layer.fill(theme.value.light)
+            self._draw_lines(layer, theme.value.dark)
+            self._draw_safe_houses(layer, theme.value.dark)
+            self._draw_letter_markings(layer, theme.value.dark)
+            self._bg_layers[theme] = layer
+        return self._bg_layers[theme]
 
     def show_pieces(self, surface: pygame.Surface):
         """Draws the piece on the given surface at their respective positions.
@@ -57,22 +82,25 @@ class Game:
         """
         for row in range(ROWS):
             for col in range(COLS):
-                if self.board.squares[row][col].has_pieces:
-                    pieces = self.board.squares[row][col].pieces
-
-                    for piece_idx, piece in enumerate(pieces):
-                        if piece is not self.dragger.piece:
-                            piece.set_texture(size=80)
-                            img = pygame.image.load(piece.texture)
-                            img = pygame.transform.rotozoom(
-                                img, 0, 1 / np.sqrt(len(pieces))
-                            )
-                            img_center = (
-                                col * SQSIZE + IMG_CENTERS[len(pieces)][piece_idx][0],
-                                row * SQSIZE + IMG_CENTERS[len(pieces)][piece_idx][1],
-                            )
-                            piece.texture_rect = img.get_rect(center=img_center)
-                            surface.blit(img, piece.texture_rect)
+                self.show_square_pieces(surface, row, col)
+
+    def show_square_pieces(self, surface: pygame.Surface, row: int, col: int):
+        """Draws the pieces on the square at row and col on the given surface.
+
+        Args:
+            surface (pygame.Surface): The pygame surface to draw the pieces on.
+            row (int): The row of the square.
+            col (int): The col of the square.
+        """
+        pieces = self.board.squares[row][col].pieces
+        self.sprites.update_square(row, col, pieces)
+        if not pieces:
+            return
+        sprite, rects = self.config.stack_sprites.get(pieces, skip=self.dragger.piece)
+        for piece, rect in zip(pieces, rects):
+            if piece is not self.dragger.piece:
+                self.sprites.set_rect(piece, rect.move(col * SQSIZE, row * SQSIZE))
+        surface.blit(sprite, (col * SQSIZE, row * SQSIZE))
 
     def show_hover(self, surface: pygame.Surface):
         """Shows the hovered square.
@@ -81,17 +109,10 @@ class Game:
             surface (pygame.Surface): The surface to show the hovered square.
         """
         if self.hovered_sqr:
-            # color
-            color = (180, 180, 180)
-            # rect
-            rect = (
-                self.hovered_sqr.col * SQSIZE,
-                self.hovered_sqr.row * SQSIZE,
-                SQSIZE,
-                SQSIZE,
+            overlay = self.config.overlays.get(self.config.theme, HighlightKind.HOVER)
+            surface.blit(
+                overlay, (self.hovered_sqr.col * SQSIZE, self.hovered_sqr.row * SQSIZE)
             )
-            # blit
-            pygame.draw.rect(surface, color, rect, width=3)
 
     def next_turn(self):
         """If the current player has made all their moves (the board's roll vector
@@ -101,7 +122,7 @@ class Game:
         if not self.board.roll:
             self.board.clear_enemy_pieces_with_player_tied_piece(self.next_player)
             self.next_player_id = (self.next_player_id + 1) % self.number_of_players
-            while self.next_player_id in self.player_has_finished:
+            while self.board.has_player_finished(self.players[self.next_player_id]):
                 self.next_player_id = (self.next_player_id + 1) % self.number_of_players
             self.next_player = self.players[self.next_player_id]
 
@@ -121,11 +142,19 @@ class Game:
             row (int): The row of the square.
             col (int): The col of the square.
         """
-        self.hovered_sqr = self.board.squares[row][col]
+        hovered_sqr = self.board.squares[row][col]
+        if hovered_sqr is self.hovered_sqr:
+            return
+        if self.hovered_sqr is not None:
+            self.renderer.mark_square(self.hovered_sqr.row, self.hovered_sqr.col)
+        self.hovered_sqr = hovered_sqr
+        self.renderer.mark_square(row, col)
 
     def change_theme(self):
         """Changes the game theme."""
         self.config.change_theme()
+        self._bg_layer = None
+        self.renderer.mark_all()
 
     def play_sound(self, captured: bool = False):
         """Play the move sound when a piece is moved and the capture sound when
@@ -246,18 +275,19 @@ class Game:
             piece = self.dragger.piece
 
             # loop all valid moves
-            for move in piece.moves:
-                # color
-                color = (*theme.value.dark, 100)
-                # rect
-                rect = (
-                    move.final.col * SQSIZE,
-                    move.final.row * SQSIZE,
-                    SQSIZE,
-                    SQSIZE,
-                )
+            for move in piece.moves.values():
+                # kind, by the capture rule of Board.move
+                if move.tying_move:
+                    kind = HighlightKind.TYING
+                elif self.board.captured_pieces(piece, move):
+                    kind = HighlightKind.CAPTURE
+                else:
+                    kind = HighlightKind.LEGAL
                 # blit
-                self.draw_rect_alpha(surface, color, rect)
+                surface.blit(
+                    self.config.overlays.get(theme, kind),
+                    (move.final.col * SQSIZE, move.final.row * SQSIZE),
+                )
 
     def draw_rect_alpha(
         self,
@@ -276,12 +306,24 @@ class Game:
         pygame.draw.rect(shape_surf, color, shape_surf.get_rect())
         surface.blit(shape_surf, rect)
 
-    def is_over(self):
-        return (
-            True
-            if (len(self.player_has_finished) == (self.number_of_players - 1))
-            else False
-        )
+    def is_over(self) -> bool:
+        """Check whether all but one player have finished, in O(1) with the board's
+        :py:attr:`src.board.Board.players_finished` counter.
+
+        Returns:
+            bool: True if the game is over.
+        """
+        return self.board.players_finished >= self.number_of_players - 1
+
+    @property
+    def player_has_finished(self) -> List[int]:
+        """The :py:class:`piece.PieceColor` values of the players that have
+        finished, read from the board's counters."""
+        return [
+            PieceColor[player].value
+            for player in self.players
+            if self.board.has_player_finished(player)
+        ]
 
 
 class GameStage(Enum):
@@ -1,11 +1,17 @@
+import argparse
 import sys
 import time
+from typing import Dict, List, Optional
+import numpy as np
 import pygame
 from constants import *
 from game import Game
 from move import Move
-from square import Square
-from piece import PieceColor
+from square import Coordinate
+from piece import Piece, PieceColor, TiedPiece
+from policies import GreedyPolicy, Policy
+from simulate import POLICIES
+from scheduler import FrameScheduler
 
 pygame.init()
 screen = pygame.display.set_mode((WIDTH, HEIGHT))
@@ -14,11 +20,22 @@ screen.fill(BG_COLOR)
 
 
 class Main:
-    def __init__(self):
+    def __init__(
+        self,
+        fps: int = FPS,
+        idle_wait: bool = True,
+        computer_players: Optional[Dict[PieceColor, Policy]] = None,
+        number_of_players: int = 2,
+    ):
         pygame.init()
         self.screen = pygame.display.set_mode((WIDTH, HEIGHT))
         pygame.display.set_caption("Chowka Bhara")
-        self.game = Game(number_of_players=2)  # Can be between 2 and 4 players.
+        # Can be between 2 and 4 players.
+        self.game = Game(number_of_players=number_of_players)
+        self.scheduler = FrameScheduler(fps=fps, idle_wait=idle_wait)
+        # The players whose moves are picked by a policy instead of the mouse.
+        self.computer_players = computer_players or {}
+        self.rng = np.random.default_rng()
 
     def mainloop(self):
         """The main loop of the game."""
@@ -26,52 +43,38 @@ class Main:
         game = self.game
         board = self.game.board
         dragger = self.game.dragger
+        scheduler = self.scheduler
         pygame.display.set_caption(f"Chowka Bhara: Roll for player {game.next_player}")
 
         while True:
-            game.show_bg(screen)
-            game.show_moves(screen)
-            game.show_pieces(screen)
-
-            if dragger.dragging:
-                dragger.update_blit(screen)
+            events = scheduler.events(
+                animating=dragger.dragging
+                or game.renderer.is_dirty
+                or self.computer_to_move()
+            )
             if game.running:
-                for event in pygame.event.get():
+                for event in events:
                     if event.type == pygame.QUIT:
                         pygame.quit()
                         sys.exit()
                     elif event.type == pygame.MOUSEBUTTONDOWN:
                         if game.current_stage == "ROLL":
-                            board.kawade()
-                            pygame.display.set_caption(
-                                f"Chowka Bhara: Player {game.next_player} - Make Move! {board.roll}"
-                            )
-                            if board.can_move(game.next_player):
-                                game.current_stage = "MAKE_MOVE"
-                            else:
-                                board.roll = []
-                                game.next_turn()
-                                game.current_stage = "ROLL"
-                                pygame.display.set_caption(
-                                    f"Chowka Bhara: Player has no moves. Roll for player {game.next_player}"
-                                )
+                            if game.next_player not in self.computer_players:
+                                self.roll()
                         elif game.current_stage == "MAKE_MOVE":
                             dragger.update_mouse(event.pos)
                             clicked_row = dragger.mouseY // SQSIZE
                             clicked_col = dragger.mouseX // SQSIZE
                             if board.squares[clicked_row][clicked_col].has_pieces():
-                                for piece in board.squares[clicked_row][
-                                    clicked_col
-                                ].pieces:
-                                    if piece.texture_rect.collidepoint(event.pos):
-                                        selected_piece = piece
-                                        if selected_piece.color == game.next_player:
-                                            board.calc_moves(selected_piece)
-                                            dragger.save_initial(event.pos)
-                                            dragger.drag_piece(selected_piece)
-                                            game.show_bg(screen)
-                                            game.show_moves(screen)
-                                            game.show_pieces(screen)
+                                for piece in game.sprites.pieces_at(
+                                    board.squares[clicked_row][clicked_col].pieces,
+                                    event.pos,
+                                ):
+                                    selected_piece = piece
+                                    if selected_piece.color == game.next_player:
+                                        board.calc_moves(selected_piece)
+                                        dragger.save_initial(event.pos)
+                                        dragger.drag_piece(selected_piece)
                     elif event.type == pygame.MOUSEMOTION:
                         if game.current_stage == "MAKE_MOVE":
                             motion_row = event.pos[1] // SQSIZE
@@ -79,68 +82,23 @@ class Main:
                             game.set_hover(motion_row, motion_col)
                             if dragger.dragging:
                                 dragger.update_mouse(event.pos)
-                                game.show_bg(screen)
-                                game.show_moves(screen)
-                                game.show_pieces(screen)
-                                game.show_hover(screen)
-                                dragger.update_blit(screen)
                     elif event.type == pygame.MOUSEBUTTONUP:
                         if game.current_stage == "MAKE_MOVE" and dragger.dragging:
                             dragger.update_mouse(event.pos)
                             released_row = dragger.mouseY // SQSIZE
                             released_col = dragger.mouseX // SQSIZE
-                            initial = Square(
-                                row=dragger.initial_row, col=dragger.initial_col
-                            )
-                            final = Square(row=released_row, col=released_col)
-                            move = Move(initial=initial, final=final)
-
-                            if board.valid_move(dragger.piece, move):
-                                move = dragger.get_move_from_initial_final(
-                                    move.initial, move.final
-                                )
-                                if board.squares[released_row][
-                                    released_col
-                                ].has_enemy_piece(game.next_player) and (
-                                    not board.squares[released_row][
-                                        released_col
-                                    ].is_safe_house
-                                ):
-                                    captured = True
-                                else:
-                                    captured = False
-                                board.move(dragger.piece, move)
-                                player_has_finished = board.has_player_finished(
-                                    game.next_player
-                                )
-                                if player_has_finished:
-                                    game.player_has_finished.append(
-                                        PieceColor[game.next_player].value
-                                    )
-                                    pygame.display.set_caption(
-                                        f"Chowka Bhara: Player {game.next_player} has finished."
-                                    )
-                                # if not final.is_safe_house:
-                                game.play_sound(captured)
-                                game.show_bg(screen)
-                                game.show_pieces(screen)
-                                game.next_turn()
-                                if game.is_over():
-                                    game.running = False
-                                    game.current_stage = "GAME_OVER"
-                                    pygame.display.set_caption(
-                                        f"Chowka Bhara: Game Over"
-                                    )
-
-                        if len(board.roll) == 0:
-                            game.current_stage = "ROLL"
-                            pygame.display.set_caption(
-                                f"Chowka Bhara: Roll for player {game.next_player}"
-                            )
-                        else:
-                            pygame.display.set_caption(
-                                f"Chowka Bhara: Player {game.next_player} - Make Move! {board.roll}"
+                            # Holding shift picks the tying move where a move
+                            # and a tying move end on the same square.
+                            move = dragger.get_move_from_initial_final(
+                                Coordinate(dragger.initial_row, dragger.initial_col),
+                                Coordinate(released_row, released_col),
+                                prefer_tying=bool(
+                                    pygame.key.get_mods() & pygame.KMOD_SHIFT
+                                ),
                             )
+                            if move is not None:
+                                self.play_move(dragger.piece, move)
+                        self.update_stage()
                         dragger.undrag_piece()
                     elif event.type == pygame.KEYDOWN and event.key == pygame.K_e:
                         board.roll = []
@@ -149,14 +107,146 @@ class Main:
                         pygame.display.set_caption(
                             f"Chowka Bhara: Player skipped. Roll for player {game.next_player}"
                         )
+                if self.computer_to_move():
+                    self.play_computer_move()
             else:
                 pygame.display.set_caption(f"Chowka Bhara: Game Over")
-                for event in pygame.event.get():
+                for event in events:
                     if event.type == pygame.QUIT:
                         pygame.quit()
                         sys.exit()
-            pygame.display.update()
+            dirty_rects = game.renderer.render(screen)
+            if dirty_rects:
+                pygame.display.update(dirty_rects)
+
+    def play_move(self, piece: Piece | TiedPiece, move: Move):
+        """Make a move of the player whose turn it is and advance the game.
+
+        Args:
+            piece (Piece | TiedPiece): The Piece to move.
+            move (Move): The move to be applied to the piece.
+        """
+        game = self.game
+        board = game.board
+        captured = bool(board.captured_pieces(piece, move))
+        board.move(piece, move)
+        if board.has_player_finished(game.next_player):
+            pygame.display.set_caption(
+                f"Chowka Bhara: Player {game.next_player} has finished."
+            )
+        # if not final.is_safe_house:
+        game.play_sound(captured)
+        game.next_turn()
+        if game.is_over():
+            game.running = False
+            game.current_stage = "GAME_OVER"
+            pygame.display.set_caption(f"Chowka Bhara: Game Over")
+
+    def roll(self):
+        """Throw the cowries for the player whose turn it is, and move on to their
+        move or, if they cannot move, to the next player's roll."""
+        game = self.game
+        board = game.board
+        board.kawade()
+        pygame.display.set_caption(
+            f"Chowka Bhara: Player {game.next_player} - Make Move! {board.roll}"
+        )
+        if board.can_move(game.next_player):
+            game.current_stage = "MAKE_MOVE"
+        else:
+            board.roll = []
+            game.next_turn()
+            game.current_stage = "ROLL"
+            pygame.display.set_caption(
+                f"Chowka Bhara: Player has no moves. Roll for player {game.next_player}"
+            )
+
+    def update_stage(self):
+        """Move on to the next roll when the player whose turn it is has used their
+        roll or cannot move."""
+        game = self.game
+        board = game.board
+        if len(board.roll) == 0:
+            game.current_stage = "ROLL"
+            pygame.display.set_caption(
+                f"Chowka Bhara: Roll for player {game.next_player}"
+            )
+        elif game.running and not board.can_move(game.next_player):
+            board.roll = []
+            game.next_turn()
+            game.current_stage = "ROLL"
+            pygame.display.set_caption(
+                f"Chowka Bhara: Player has no moves. Roll for player {game.next_player}"
+            )
+        else:
+            pygame.display.set_caption(
+                f"Chowka Bhara: Player {game.next_player} - Make Move! {board.roll}"
+            )
+
+    def computer_to_move(self) -> bool:
+        """Check whether a computer player has to roll or make a move.
+
+        Returns:
+            bool: True if it is the turn of a computer player to roll or to make a
+            move.
+        """
+        game = self.game
+        return (
+            game.running
+            and game.current_stage in ("ROLL", "MAKE_MOVE")
+            and game.next_player in self.computer_players
+        )
+
+    def play_computer_move(self):
+        """Let the computer player whose turn it is roll, or let its policy make a
+        move."""
+        game = self.game
+        if game.current_stage == "ROLL":
+            self.roll()
+            return
+        player = game.next_player
+        moves = game.board.legal_moves(player)
+        if moves:
+            choice = self.computer_players[player].choose(
+                game.board, player, moves, self.rng
+            )
+            self.play_move(choice.piece, choice.move)
+        self.update_stage()
+
+
+def main(argv: Optional[List[str]] = None):
+    """Start the game from the command line."""
+    parser = argparse.ArgumentParser(description="Play Chowka Bhara.")
+    parser.add_argument(
+        "--players",
+        type=int,
+        default=2,
+        choices=range(2, len(PieceColor) + 1),
+        help="The number of players.",
+    )
+    parser.add_argument(
+        "--computer",
+        nargs="+",
+        default=[],
+        metavar="COLOR[=POLICY]",
+        help=(
+            "The players played by the computer, with their policy, one of "
+            f"{', '.join(sorted(POLICIES))} (defaults to {GreedyPolicy.name})."
+        ),
+    )
+    args = parser.parse_args(argv)
+    players = list(PieceColor.__members__.keys())[: args.players]
+    computer_players = {}
+    for spec in args.computer:
+        color, _, name = spec.partition("=")
+        name = name or GreedyPolicy.name
+        if color not in players:
+            parser.error(f"{color!r} is not one of the players {', '.join(players)}.")
+        if name not in POLICIES:
+            parser.error(f"{name!r} is not one of the policies.")
+        computer_players[color] = POLICIES[name]()
+    Main(computer_players=computer_players, number_of_players=args.players).mainloop()
 
 
-main = Main()
-main.mainloop()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+import time
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+from board import Board
+from expectimax import TIME_MARGIN, ExpectimaxBot, SearchTimeout
+from move import LegalMove
+from piece import PieceColor
+
+# The search modes of MaxNBot.
+MAXN = "maxn"
+PARANOID = "paranoid"
+
+# The weight every player that has not finished gets on top of its progress in
+# the heuristic values, so that players without progress keep a share.
+BASE_SHARE = 0.05
+
+
+class MaxNBot(ExpectimaxBot):
+    """A computer player for games of three or four players, searching with max-n
+    or with the paranoid reduction.
+
+    In max-n mode the value of a node is a vector with a value for every player,
+    and every player picks the move that is best for itself. The values of a
+    vector are non-negative and sum to one (a player that finishes gets 1), which
+    allows shallow pruning: a player stops searching its moves once it has
+    secured so much that the player choosing between it and its siblings cannot
+    get more than from a sibling. The bound is carried through the chance nodes
+    of the rolls like Star1, with the values of the outcomes not searched yet
+    bounded by 0 and 1.
+
+    In paranoid mode the opponents are assumed to play together against the bot,
+    which is the two-sided search of :py:class:`src.expectimax.ExpectimaxBot`.
+
+    Both modes deepen iteratively within the time budget, order the moves with
+    captures and tying moves first and keep a transposition table across the
+    moves of a game.
+
+    Args:
+        mode (str, optional): MAXN or PARANOID. Defaults to MAXN.
+        time_budget (float, optional): The time (in s) the bot may think about a
+            move. Defaults to 0.3.
+        **kwargs: The other arguments of ExpectimaxBot.
+
+    Raises:
+        ValueError: If the mode is not supported.
+    """
+
+    name = "maxn"
+
+    def __init__(self, mode: str = MAXN, time_budget: float = 0.3, **kwargs):
+        if mode not in (MAXN, PARANOID):
+            raise ValueError(f"Unsupported search mode {mode!r}.")
+        super().__init__(time_budget=time_budget, **kwargs)
+        self.mode = mode
+        # The values of max-n do not depend on the bot's player, so all of them
+        # share a table of (depth, values or None if pruned, best move key).
+        self.vector_table: Dict[int, Tuple[int, Optional[List[float]], tuple]] = {}
+
+    def choose(
+        self,
+        board: Board,
+        player: PieceColor,
+        moves: List[LegalMove],
+        rng: Optional[np.random.Generator] = None,
+    ) -> LegalMove:
+        """Pick the best move for the player found within the time budget. The
+        board is searched in place and left as it was.
+
+        Args:
+            board (Board): The board.
+            player (PieceColor): The player to move.
+            moves (List[LegalMove]): The legal moves of the player. Never empty.
+            rng (Optional[np.random.Generator], optional): Unused, the search is
+                deterministic.
+
+        Returns:
+            LegalMove: The move to make.
+        """
+        if self.mode == PARANOID:
+            return super().choose(board, player, moves, rng)
+
+        moves = self._order(board, player, moves)
+        self.nodes = 0
+        self.depth = 0
+        if len(moves) == 1:
+            return moves[0]
+        if len(self.vector_table) > self.table_size:
+            self.vector_table.clear()
+
+        self._board = board
+        self._bot = player
+        self._player = player
+        self._deadline = time.perf_counter() + self.time_budget - TIME_MARGIN
+        board.defer_bonus_rolls = True
+        try:
+            for depth in range(1, self.max_depth + 1):
+                try:
+                    values, best = self._search_root_vector(moves, depth)
+                except SearchTimeout:
+                    break
+                self.depth = depth
+                moves.insert(0, moves.pop(best))
+                if values[board.player_index[player]] >= 1.0:
+                    break
+        finally:
+            board.defer_bonus_rolls = False
+        return moves[0]
+
+    def _search_root_vector(
+        self, moves: List[LegalMove], depth: int
+    ) -> Tuple[List[float], int]:
+        """Search the moves of the root to the given depth.
+
+        Args:
+            moves (List[LegalMove]): The ordered legal moves of the bot.
+            depth (int): The search depth in moves.
+
+        Returns:
+            Tuple[List[float], int]: The values of the best move and its index in
+            moves.
+        """
+        owner = self._board.player_index[self._bot]
+        best_values = None
+        best = 0
+        for idx, legal_move in enumerate(moves):
+            bound = best_values[owner] if best_values is not None else None
+            values = self._after_move_vector(legal_move, depth, owner, bound)
+            if best_values is None or values[owner] > best_values[owner]:
+                best_values, best = values, idx
+        return best_values, best
+
+    def _vector(self, depth: int, owner: Optional[int], bound: Optional[float]):
+        """Return the values of the board during the turn of ``self._player``,
+        searched to the given depth.
+
+        The values only matter if the value of player ``owner`` (an index into the
+        board's players) is above bound. Otherwise the search may stop early and
+        return values whose owner's value is at most bound.
+        """
+        board = self._board
+        self.nodes += 1
+        if self.nodes & 15 == 0 and time.perf_counter() > self._deadline:
+            raise SearchTimeout
+        if board.bonus_rolls:
+            return self._chance_vector(depth, owner, bound)
+        if depth <= 0:
+            return self.evaluate_vector(board)
+
+        player = self._player
+        moves = board.legal_moves(player) if board.roll else []
+        if not moves:
+            return self._end_turn_vector(depth - 1, owner, bound)
+
+        key = board.position_hash(player)
+        entry = self.vector_table.get(key)
+        best_key = None
+        if entry is not None:
+            entry_depth, entry_values, best_key = entry
+            if entry_depth >= depth and entry_values is not None:
+                return entry_values
+
+        me = board.player_index[player]
+        # Consecutive moves of a player keep the bound of its earlier choice.
+        inherited = bound if owner == me else None
+        best_values = None
+        best_move = None
+        pruned = False
+        for legal_move in self._order(board, player, moves, best_key):
+            child_bound = inherited
+            if best_values is not None and (
+                child_bound is None or best_values[me] > child_bound
+            ):
+                child_bound = best_values[me]
+            values = self._after_move_vector(legal_move, depth, me, child_bound)
+            if best_values is None or values[me] > best_values[me]:
+                best_values, best_move = values, legal_move
+            # Shallow pruning: the owner gets at most 1 - best_values[me] here.
+            if bound is not None and owner != me and best_values[me] >= 1.0 - bound:
+                pruned = True
+                break
+
+        if inherited is not None and best_values[me] <= inherited:
+            pruned = True
+        self.vector_table[key] = (
+            depth,
+            None if pruned else best_values,
+            self.move_key(best_move),
+        )
+        return best_values
+
+    def _after_move_vector(
+        self,
+        legal_move: LegalMove,
+        depth: int,
+        owner: Optional[int],
+        bound: Optional[float],
+    ) -> List[float]:
+        """Return the values of the board after the given move of
+        ``self._player``."""
+        board = self._board
+        board.make_move(legal_move.piece, legal_move.move)
+        try:
+            if board.has_player_finished(self._player):
+                values = [0.0] * len(board.players)
+                values[board.player_index[self._player]] = 1.0
+                return values
+            return self._vector(depth - 1, owner, bound)
+        finally:
+            board.unmake_move()
+
+    def _end_turn_vector(
+        self, depth: int, owner: Optional[int], bound: Optional[float]
+    ) -> List[float]:
+        """Return the values of the board after the turn of ``self._player``
+        ends."""
+        board = self._board
+        player = self._player
+        board.make_end_turn(player)
+        self._player = self._next_player(player)
+        try:
+            if depth <= 0:
+                return self.evaluate_vector(board)
+            return self._chance_vector(depth, owner, bound)
+        finally:
+            self._player = player
+            board.unmake_move()
+
+    def _chance_vector(
+        self, depth: int, owner: Optional[int], bound: Optional[float]
+    ) -> List[float]:
+        """Return the expected values of a roll of ``self._player``. The search
+        stops once the owner's expected value cannot exceed bound, even if every
+        roll left gave it a value of 1."""
+        board = self._board
+        expected = [0.0] * len(board.players)
+        rest = 1.0
+        for probability, roll in self.outcomes:
+            rest -= probability
+            child_bound = None
+            if owner is not None and bound is not None:
+                child_bound = (bound - expected[owner] - rest) / probability
+                if child_bound >= 1.0:
+                    return expected
+            board.make_roll(roll)
+            try:
+                values = self._vector(depth, owner, child_bound)
+            finally:
+                board.unmake_move()
+            for idx, value in enumerate(values):
+                expected[idx] += probability * value
+            if child_bound is not None and values[owner] <= child_bound:
+                return expected
+        return expected
+
+    @staticmethod
+    def evaluate_vector(board: Board) -> List[float]:
+        """Return the heuristic values of the board for every player: the shares
+        of the players that have not finished in their total progress (see
+        :py:meth:`src.expectimax.ExpectimaxBot.progress`), each with a base share
+        of BASE_SHARE.
+
+        Args:
+            board (Board): The board.
+
+        Returns:
+            List[float]: The values, in the order of the board's players. They are
+            non-negative and sum to one.
+        """
+        progress = ExpectimaxBot.progress(board)
+        weights = [
+            BASE_SHARE + progress[color] if progress[color] < 1.0 else 0.0
+            for color in board.players
+        ]
+        total = sum(weights)
+        return [weight / total for weight in weights]
+
+    def __repr__(self) -> str:
+        return f"MaxNBot(mode={self.mode!r}, time_budget={self.time_budget})"
@@ -0,0 +1,392 @@
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+from board import Board
+from expectimax import TIME_MARGIN, ExpectimaxBot
+from move import LegalMove
+from piece import PieceColor
+from policies import GreedyPolicy, Policy, RandomPolicy
+from rolls import RandomRollSource
+from state import BoardState
+
+# The kinds of nodes of the search tree.
+DECISION = 0  # The player to move picks one of its legal moves.
+CHANCE = 1  # The player to move throws the cowries, for a turn or a bonus roll.
+TERMINAL = 2  # All but one player have finished.
+
+
+class _Node:
+    """A node of the search tree, reached by a sequence of moves and rolls from
+    the root. Its board is rebuilt on every visit by making them again.
+
+    Args:
+        kind (int): DECISION, CHANCE or TERMINAL.
+        player (int): The index of the player to move.
+    """
+
+    __slots__ = ("kind", "player", "visits", "totals", "children", "untried")
+
+    def __init__(self, kind: int, player: int):
+        self.kind = kind
+        self.player = player
+        self.visits = 0
+        # The sum of the rewards of every player over the visits.
+        self.totals: Optional[List[float]] = None
+        # The children by move key (decision nodes) or by sorted roll (chance
+        # nodes).
+        self.children: Dict[tuple, _Node] = {}
+        # The keys of the moves of a decision node that have no child yet.
+        self.untried: Optional[List[tuple]] = None
+
+
+class MCTSBot(Policy):
+    """A computer player that searches the game tree with Monte Carlo tree search,
+    for any number of players.
+
+    Every iteration walks down the tree from the current position: decision nodes
+    pick their move with UCT for the player to move, and chance nodes, for the
+    roll at the start of a turn and for the bonus rolls after a capture, throw
+    the cowries. The first node not in the tree yet is added, a rollout plays a
+    few turns from it with the rollout policy, and the reward of every player is
+    added to the nodes on the way (max-n backup, so that every player maximizes
+    its own reward). The moves are made on the board with
+    :py:meth:`src.board.Board.make_move` and undone after every iteration.
+
+    With more than one worker the search is root-parallel: every worker process
+    searches its own tree for the same move with its own seed, and the visit
+    counts of the root moves are summed before the most visited one is picked.
+    The worker processes are started with the bot, and their searches stop at a
+    deadline taken when the move is asked for.
+
+    Args:
+        time_budget (Optional[float], optional): The time (in s) the bot may think
+            about a move. Defaults to 0.3.
+        iterations (Optional[int], optional): The number of iterations of every
+            worker per move, if limited. Defaults to None.
+        exploration (float, optional): The UCT exploration constant. Rewards are
+            between 0 and 1. Defaults to 0.7.
+        rollout_policy (Optional[Policy], optional): The policy of the players in
+            the rollouts. Defaults to RandomPolicy.
+        rollout_turns (int, optional): The number of turns a rollout plays before
+            the position is evaluated. Defaults to 4.
+        workers (int, optional): The number of searches run in parallel, one in
+            this process and the rest in worker processes. 0 uses every CPU.
+            Defaults to 1.
+
+    Raises:
+        ValueError: If neither a time budget nor a number of iterations is given.
+    """
+
+    name = "mcts"
+
+    def __init__(
+        self,
+        time_budget: Optional[float] = 0.3,
+        iterations: Optional[int] = None,
+        exploration: float = 0.7,
+        rollout_policy: Optional[Policy] = None,
+        rollout_turns: int = 4,
+        workers: int = 1,
+    ):
+        if time_budget is None and iterations is None:
+            raise ValueError("Give a time budget, a number of iterations or both.")
+        self.time_budget = time_budget
+        self.iterations = iterations
+        self.exploration = exploration
+        self.rollout_policy = rollout_policy or RandomPolicy()
+        self.rollout_turns = rollout_turns
+        self.workers = workers or os.cpu_count() or 1
+        self.simulations = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.start()
+
+    def __getstate__(self) -> dict:
+        # Only the settings are sent to the worker processes.
+        return {
+            name: value
+            for name, value in self.__dict__.items()
+            if not name.startswith("_")
+        }
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self._executor = None
+
+    def start(self):
+        """Start the worker processes, if the bot has more than one worker and they
+        are not running yet. A copy of the bot made by pickling, e.g. for the worker
+        processes of :py:func:`src.simulate.simulate`, starts its own on its first
+        move."""
+        if self.workers > 1 and self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers - 1)
+            # Processes are only spawned on demand, so give every one of them a
+            # task and wait for it.
+            for future in [
+                self._executor.submit(time.monotonic) for _ in range(self.workers - 1)
+            ]:
+                future.result()
+
+    def choose(
+        self,
+        board: Board,
+        player: PieceColor,
+        moves: List[LegalMove],
+        rng: Optional[np.random.Generator] = None,
+    ) -> LegalMove:
+        """Pick the most visited move of the search. The board is searched in place
+        and left as it was.
+
+        Args:
+            board (Board): The board.
+            player (PieceColor): The player to move.
+            moves (List[LegalMove]): The legal moves of the player. Never empty.
+            rng (Optional[np.random.Generator], optional): The random number
+                generator the seeds of the searches are drawn from. Defaults to
+                fresh entropy.
+
+        Returns:
+            LegalMove: The move to make.
+        """
+        # The monotonic clock is system-wide, so the worker processes can be given
+        # the deadline. They stop a margin before this process, so that their
+        # results are sent by the time its own search ends.
+        deadline = (
+            time.monotonic() + self.time_budget - TIME_MARGIN
+            if self.time_budget is not None
+            else math.inf
+        )
+        self.simulations = 0
+        if len(moves) == 1:
+            return moves[0]
+        rng = rng if rng is not None else np.random.default_rng()
+        seeds = rng.integers(1 << 63, size=self.workers).tolist()
+
+        futures = []
+        if self.workers > 1:
+            self.start()
+            state = board.to_state(player)
+            futures = [
+                self._executor.submit(
+                    _search_state, self, state, seed, deadline - TIME_MARGIN
+                )
+                for seed in seeds[1:]
+            ]
+        statistics, simulations = self.search(board, player, seeds[0], deadline)
+        for future in futures:
+            worker_statistics, worker_simulations = future.result()
+            simulations += worker_simulations
+            for key, (visits, total) in worker_statistics.items():
+                merged_visits, merged_total = statistics.get(key, (0, 0.0))
+                statistics[key] = (merged_visits + visits, merged_total + total)
+        self.simulations = simulations
+
+        def rank(legal_move: LegalMove) -> Tuple[int, float]:
+            visits, total = statistics.get(ExpectimaxBot.move_key(legal_move), (0, 0))
+            return visits, total / visits if visits else 0.0
+
+        return max(moves, key=rank)
+
+    def search(
+        self,
+        board: Board,
+        player: PieceColor,
+        seed: int,
+        deadline: Optional[float] = None,
+    ) -> Tuple[Dict[tuple, Tuple[int, float]], int]:
+        """Search the moves of the given player within the budget.
+
+        Args:
+            board (Board): The board, with the roll of the player.
+            player (PieceColor): The player to move.
+            seed (int): The seed of the search's rolls and rollouts.
+            deadline (Optional[float], optional): The time.monotonic() time at
+                which to stop. Defaults to the time budget from now.
+
+        Returns:
+            Tuple[Dict[tuple, Tuple[int, float]], int]: The number of visits and
+            the total reward of the player of every searched root move, by
+            :py:meth:`src.expectimax.ExpectimaxBot.move_key`, and the number of
+            iterations.
+        """
+        self._board = board
+        self._rolls = RandomRollSource(seed)
+        self._rng = np.random.default_rng(seed)
+        self._turns_ended = 0
+        root = _Node(DECISION, board.players.index(player))
+        if deadline is None:
+            deadline = (
+                time.monotonic() + self.time_budget - TIME_MARGIN
+                if self.time_budget is not None
+                else math.inf
+            )
+        base = len(board.undo_stack)
+        board.defer_bonus_rolls = True
+        iterations = 0
+        try:
+            while (
+                self.iterations is None or iterations < self.iterations
+            ) and time.monotonic() < deadline:
+                try:
+                    self._iterate(root)
+                finally:
+                    while len(board.undo_stack) > base:
+                        board.unmake_move()
+                iterations += 1
+        finally:
+            board.defer_bonus_rolls = False
+        statistics = {
+            key: (child.visits, child.totals[root.player])
+            for key, child in root.children.items()
+        }
+        return statistics, iterations
+
+    def _iterate(self, root: _Node):
+        """Run one iteration: select a path, expand it by a node, roll out from it
+        and back the rewards up the path."""
+        board = self._board
+        node = root
+        path = [root]
+        while node.kind != TERMINAL:
+            player = board.players[node.player]
+            if node.kind == CHANCE:
+                roll = tuple(sorted(self._rolls.kawade()))
+                board.make_roll(list(roll))
+                key = roll
+            else:
+                moves = {
+                    ExpectimaxBot.move_key(legal_move): legal_move
+                    for legal_move in board.legal_moves(player)
+                }
+                if node.untried is None:
+                    # Expand the most promising moves first.
+                    node.untried = sorted(
+                        moves,
+                        key=lambda key: GreedyPolicy.score(board, player, moves[key]),
+                    )
+                if node.untried:
+                    key = node.untried.pop()
+                else:
+                    key = self._select(node)
+                legal_move = moves[key]
+                board.make_move(legal_move.piece, legal_move.move)
+            kind, player = self._settle(player)
+            child = node.children.get(key)
+            if child is None:
+                child = _Node(kind, board.players.index(player))
+                node.children[key] = child
+                path.append(child)
+                break
+            node = child
+            path.append(node)
+
+        rewards = self._rollout(path[-1])
+        for node in path:
+            node.visits += 1
+            if node.totals is None:
+                node.totals = list(rewards)
+            else:
+                for idx, reward in enumerate(rewards):
+                    node.totals[idx] += reward
+
+    def _select(self, node: _Node) -> tuple:
+        """Return the key of the child of a fully expanded decision node with the
+        highest upper confidence bound for the node's player."""
+        player = node.player
+        scale = self.exploration * math.sqrt(math.log(node.visits))
+
+        def bound(item: Tuple[tuple, _Node]) -> float:
+            child = item[1]
+            return child.totals[player] / child.visits + scale / math.sqrt(child.visits)
+
+        return max(node.children.items(), key=bound)[0]
+
+    def _settle(self, player: PieceColor) -> Tuple[int, PieceColor]:
+        """Make the turn changes that follow from the board after a move or roll of
+        the given player, and return the kind of node reached and the player to
+        move.
+
+        A player that has finished or cannot move with what is left of its roll
+        ends its turn, and the next player that has not finished throws the
+        cowries.
+        """
+        board = self._board
+        finished = board.has_player_finished(player)
+        if not finished:
+            if board.bonus_rolls:
+                return CHANCE, player
+            if board.roll and board.can_move(player):
+                return DECISION, player
+        # The bonus rolls of a finishing capture are dropped with the turn.
+        while board.bonus_rolls:
+            board.make_roll([])
+        board.make_end_turn(player)
+        self._turns_ended += 1
+        if board.players_finished >= len(board.players) - 1:
+            return TERMINAL, player
+        idx = board.players.index(player)
+        for offset in range(1, len(board.players)):
+            candidate = board.players[(idx + offset) % len(board.players)]
+            if not board.has_player_finished(candidate):
+                return CHANCE, candidate
+        return TERMINAL, player
+
+    def _rollout(self, node: _Node) -> List[float]:
+        """Play rollout_turns turns from the board of the given node with the
+        rollout policy, and return the reward of every player."""
+        board = self._board
+        kind, player = node.kind, board.players[node.player]
+        self._turns_ended = 0
+        while kind != TERMINAL and self._turns_ended < self.rollout_turns:
+            if kind == CHANCE:
+                board.make_roll(self._rolls.kawade())
+            else:
+                moves = board.legal_moves(player)
+                legal_move = self.rollout_policy.choose(board, player, moves, self._rng)
+                board.make_move(legal_move.piece, legal_move.move)
+            kind, player = self._settle(player)
+        return self.rewards(board)
+
+    @staticmethod
+    def rewards(board: Board) -> List[float]:
+        """Return the reward of every player for the board: 1 for a player that has
+        finished and otherwise the value of
+        :py:meth:`src.expectimax.ExpectimaxBot.evaluate` scaled to between 0 and
+        1.
+
+        Args:
+            board (Board): The board.
+
+        Returns:
+            List[float]: The rewards, in the order of the board's players.
+        """
+        return [
+            1.0
+            if board.has_player_finished(player)
+            else 0.5 + 0.5 * ExpectimaxBot.evaluate(board, player)
+            for player in board.players
+        ]
+
+    def close(self):
+        """Shut the worker processes down."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __repr__(self) -> str:
+        return (
+            f"MCTSBot(time_budget={self.time_budget}, iterations={self.iterations}, "
+            f"workers={self.workers})"
+        )
+
+
+def _search_state(
+    bot: MCTSBot, state: BoardState, seed: int, deadline: float
+) -> Tuple[Dict[tuple, Tuple[int, float]], int]:
+    """Run a search of a worker process on the board of the given state, see
+    :py:meth:`MCTSBot.search`."""
+    board = Board.from_state(state)
+    return bot.search(board, state.players[state.to_move], seed, deadline)
@@ -1,15 +1,18 @@
 from dataclasses import dataclass
-from typing import Optional
+from typing import NamedTuple, Optional
 
 
-@dataclass
+@dataclass(slots=True)
 class Move:
     """A dataclass to represent a move. It contains a initial Square and a final
-    Square. A move that ties two piece together to create a TiedPiece needs a further
-    tying_move field to be passed with a value set at True."""
+    Square, as coordinates of :py:data:`src.square.COORDINATES`. A move that ties two
+    piece together to create a TiedPiece needs a further tying_move field to be
+    passed with a value set at True.
 
-    initial: "Square"
-    final: "Square"
+    Moves that start and end on the same squares are equal and hash alike."""
+
+    initial: "Coordinate"
+    final: "Coordinate"
     tying_move: Optional[bool] = False
 
     def __repr__(self):
@@ -17,3 +20,17 @@ class Move:
 
     def __eq__(self, other):
         return self.initial == other.initial and self.final == other.final
+
+    def __hash__(self):
+        return hash(
+            (self.initial.row, self.initial.col, self.final.row, self.final.col)
+        )
+
+
+class LegalMove(NamedTuple):
+    """A move a player can make with the current roll: the piece to move, the roll
+    value the move uses and the move itself."""
+
+    piece: "Piece"
+    roll: int
+    move: Move
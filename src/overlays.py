@@ -0,0 +1,66 @@
+from enum import Enum
+from typing import Dict, Tuple
+import pygame
+
+from constants import SQSIZE
+from theme import Theme
+
+
+class HighlightKind(Enum):
+    """Enum of the kinds of square highlights drawn over the board."""
+
+    LEGAL = 1  # a square the dragged piece can move to
+    TYING = 2  # a square the dragged piece can be tied on
+    CAPTURE = 3  # a square where the dragged piece captures enemy pieces
+    HOVER = 4  # the square under the mouse
+
+
+class OverlayCache:
+    """A cache of the ``SQSIZE x SQSIZE`` highlight overlays of every theme, so that
+    drawing the highlights of a drag allocates no surfaces."""
+
+    def __init__(self):
+        self._overlays: Dict[Tuple[Theme, HighlightKind], pygame.Surface] = {}
+
+    def get(self, theme: Theme, kind: HighlightKind) -> pygame.Surface:
+        """Return the overlay of the given kind for the given theme, drawing it on
+        its first use.
+
+        Args:
+            theme (Theme): The current theme.
+            kind (HighlightKind): The kind of highlight.
+
+        Returns:
+            pygame.Surface: The overlay surface.
+        """
+        overlay = self._overlays.get((theme, kind))
+        if overlay is None:
+            overlay = self._overlays[(theme, kind)] = self._draw(theme, kind)
+        return overlay
+
+    @staticmethod
+    def _draw(theme: Theme, kind: HighlightKind) -> pygame.Surface:
+        """Draw the overlay of the given kind for the given theme.
+
+        Args:
+            theme (Theme): The theme of the overlay.
+            kind (HighlightKind): The kind of highlight.
+
+        Returns:
+            pygame.Surface: The overlay surface.
+        """
+        overlay = pygame.Surface((SQSIZE, SQSIZE), pygame.SRCALPHA)
+        rect = overlay.get_rect()
+        if kind == HighlightKind.LEGAL:
+            pygame.draw.rect(overlay, (*theme.value.dark, 100), rect)
+        elif kind == HighlightKind.TYING:
+            pygame.draw.rect(overlay, (*theme.value.dark, 100), rect)
+            pygame.draw.rect(overlay, (*theme.value.dark, 200), rect, width=6)
+        elif kind == HighlightKind.CAPTURE:
+            pygame.draw.rect(overlay, (*theme.value.dark, 100), rect)
+            pygame.draw.rect(overlay, (200, 60, 60, 200), rect, width=6)
+        elif kind == HighlightKind.HOVER:
+            pygame.draw.rect(overlay, (180, 180, 180), rect, width=3)
+        if pygame.display.get_surface() is not None:
+            overlay = overlay.convert_alpha()
+        return overlay
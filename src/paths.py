@@ -0,0 +1,112 @@
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional, Tuple
+import numpy as np
+
+from constants import (
+    BASE_GRID,
+    COLS,
+    GRID_OFFSET,
+    PLACES_TO_FRUIT,
+    ROLL_VALUES,
+    SQUARES,
+)
+
+MAX_STEPS = max(ROLL_VALUES)
+
+
+@dataclass(frozen=True)
+class PathTables:
+    """The precomputed lookup tables of the players' paths in a game with a given
+    number of players. Tables are built once per player count by
+    :py:func:`get_path_tables` and shared by every board.
+
+    The player index used by the tables is the player's position in the list of
+    players of the game. Squares are indexed either by (row, col) or by their flat
+    index ``row * COLS + col``; the arrays are read-only.
+
+    Args:
+        number_of_players (int): The number of players.
+        grids (np.ndarray): A players x ROWS x COLS array of the alias every
+            player has for every square.
+        alias_to_square (np.ndarray): The flat index of the square of every alias,
+            or -1 for aliases that are not on the board.
+        square_to_alias (np.ndarray): A players x SQUARES array of the alias every
+            player has for every flat square index.
+        destination (np.ndarray): A players x (PLACES_TO_FRUIT + 1) x
+            (MAX_STEPS + 1) array of the flat index of the square a piece reaches
+            from a path position after k steps, or -1 when it overshoots the
+            fruit square.
+        alias_to_row_col (Tuple[Optional[Tuple[int, int]], ...]): The (row, col) of
+            every alias, or None.
+        row_col_to_alias (Tuple[Tuple[int, ...], ...]): The alias every player
+            has for every flat square index.
+        destination_row_col (Tuple[Tuple[Tuple[Optional[Tuple[int, int]], ...], ...], ...]):
+            The (row, col) counterpart of destination, with None in place of -1.
+    """
+
+    number_of_players: int
+    grids: np.ndarray
+    alias_to_square: np.ndarray
+    square_to_alias: np.ndarray
+    destination: np.ndarray
+    alias_to_row_col: Tuple[Optional[Tuple[int, int]], ...]
+    row_col_to_alias: Tuple[Tuple[int, ...], ...]
+    destination_row_col: Tuple[Tuple[Tuple[Optional[Tuple[int, int]], ...], ...], ...]
+
+
+@lru_cache(maxsize=None)
+def get_path_tables(number_of_players: int) -> PathTables:
+    """Return the path lookup tables of a game with the given number of players.
+    The tables are built on the first call for a player count and shared after.
+
+    Player 2's grid is rotated by 180º when there are two players and every
+    following player's grid by a further 90º when there are more.
+
+    Args:
+        number_of_players (int): The number of players.
+
+    Returns:
+        PathTables: The lookup tables.
+    """
+    rotate_grid_by = 2 if number_of_players <= 2 else 1
+    grids = np.stack(
+        [
+            np.rot90(BASE_GRID, idx * rotate_grid_by) + idx * GRID_OFFSET
+            for idx in range(number_of_players)
+        ]
+    )
+    square_to_alias = grids.reshape(number_of_players, SQUARES).astype(np.int16)
+    alias_to_square = np.full(number_of_players * GRID_OFFSET, -1, dtype=np.int16)
+    for idx in range(number_of_players):
+        alias_to_square[square_to_alias[idx]] = np.arange(SQUARES)
+
+    destination = np.full(
+        (number_of_players, PLACES_TO_FRUIT + 1, MAX_STEPS + 1), -1, dtype=np.int16
+    )
+    for idx in range(number_of_players):
+        for position in range(PLACES_TO_FRUIT + 1):
+            steps = min(MAX_STEPS, PLACES_TO_FRUIT - position)
+            destination[idx, position, : steps + 1] = alias_to_square[
+                idx * GRID_OFFSET + position : idx * GRID_OFFSET + position + steps + 1
+            ]
+
+    for array in (grids, square_to_alias, alias_to_square, destination):
+        array.setflags(write=False)
+
+    def row_col(square: int) -> Optional[Tuple[int, int]]:
+        return None if square == -1 else divmod(square, COLS)
+
+    return PathTables(
+        number_of_players=number_of_players,
+        grids=grids,
+        alias_to_square=alias_to_square,
+        square_to_alias=square_to_alias,
+        destination=destination,
+        alias_to_row_col=tuple(row_col(square) for square in alias_to_square.tolist()),
+        row_col_to_alias=tuple(tuple(aliases) for aliases in square_to_alias.tolist()),
+        destination_row_col=tuple(
+            tuple(tuple(row_col(square) for square in steps) for steps in positions)
+            for positions in destination.tolist()
+        ),
+    )
@@ -1,39 +1,32 @@
 from __future__ import annotations
 from enum import Enum
-import os
-from typing import List, Optional
+from typing import Dict, List, Tuple
 from constants import PLACES_TO_FRUIT, PLACES_BEFORE_INNER, GRID_OFFSET
-import pygame
 
 from move import Move
 
 
 class Piece:
-    """The piece class represents the piece on the board.
+    """The piece class represents the piece on the board. Pieces hold no rendering
+    state; their textures and rects live in :py:class:`src.piece_sprites.PieceSprites`.
 
     Args:
         color (PieceColor): The color of the piece.
-        texture (str): The path to the texture for the piece.
-        texture_rect (pygame.Rect, optional): The rect of the texture for the piece.
     """
 
-    def __init__(
-        self,
-        color: PieceColor,
-        texture: Optional[str] = None,
-        texture_rect: Optional[pygame.Rect] = None,
-    ):
+    def __init__(self, color: PieceColor):
         self.color = color
-        self.texture = texture
-        self.texture_rect = texture_rect
-        self.set_texture()
 
         self.name = "Piece"
-        self.home_position = PieceColor[self.color].value * GRID_OFFSET
+        self.color_index = PieceColor[self.color].value
+        self.home_position = self.color_index * GRID_OFFSET
         self.position = self.home_position * 1
         self.final_outer_position = self.home_position + PLACES_BEFORE_INNER
         self.fruit_position = self.home_position + PLACES_TO_FRUIT
-        self.moves = []
+        # The legal moves of the piece by their final square's coordinate and
+        # whether they are tying moves, as a single piece can reach the same
+        # square with a move and with a tying move.
+        self.moves: Dict[Tuple["Coordinate", bool], Move] = {}
         self.img_center = None
         self.with_enemy_tied_piece = False
 
@@ -67,16 +60,16 @@ class Piece:
         return self.position == self.fruit_position
 
     def add_move(self, move: Move):
-        """Adds a move to the pieces moves list.
+        """Adds a move to the pieces moves.
 
         Args:
-            move (Move): The move to add to the pieces moves list.
+            move (Move): The move to add to the pieces moves.
         """
-        self.moves.append(move)
+        self.moves[(move.final, bool(move.tying_move))] = move
 
     def clear_moves(self):
-        """Clears the pieces moves list."""
-        self.moves = []
+        """Clears the pieces moves."""
+        self.moves = {}
 
     def set_with_enemy_tied_piece(self):
         """Sets the with enemy TiedPiece Flag."""
@@ -93,14 +86,6 @@ class Piece:
         if not self.is_fruit():
             self.position = self.home_position * 1
 
-    def set_texture(self, size: int = 80):
-        """Set the path to the texture of the given size.
-
-        Args:
-            size (int, optional): The size of the texture to be used. Defaults to 80.
-        """
-        self.texture = os.path.join(f"assets/images/imgs-{size}px/{self.color}.png")
-
 
 class TiedPiece(Piece):
     def __init__(self, color: PieceColor, position: int, pieces: List[Piece]):
@@ -117,9 +102,6 @@ class TiedPiece(Piece):
             for piece in self.pieces:
                 piece.return_to_home()
 
-    def set_texture(self, size: int = 80):
-        self.texture = os.path.join(f"assets/images/imgs-{size}px/Tied{self.color}.png")
-
     def __repr__(self) -> str:
         return f"{self.name}({self.color=}: {self.position=} with {self.pieces=})"
 
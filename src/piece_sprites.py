@@ -0,0 +1,101 @@
+from typing import Dict, List, Optional, Tuple
+import pygame
+
+from piece import Piece, TiedPiece
+from textures import TextureCache
+
+
+class PieceSprites:
+    """The rendering side of the pieces. The pieces of the rules engine know
+    nothing about pygame; this adapter holds their textures and the rects they
+    were last drawn at, which are used to find the piece under the mouse.
+
+    The rect of a piece is dropped once the square it was last drawn on is drawn
+    without it and it has not been drawn elsewhere since, so that TiedPieces that
+    are untied or captured, which never come back, are not kept for the whole
+    game.
+
+    Args:
+        textures (TextureCache): The cache to take the piece textures from.
+    """
+
+    def __init__(self, textures: TextureCache):
+        self.textures = textures
+        self.rects: Dict[Piece | TiedPiece, pygame.Rect] = {}
+        # The square every piece with a rect was last drawn on, and the pieces
+        # last drawn on every square.
+        self._piece_squares: Dict[Piece | TiedPiece, Tuple[int, int]] = {}
+        self._square_pieces: Dict[Tuple[int, int], List[Piece | TiedPiece]] = {}
+
+    def texture(
+        self, piece: Piece | TiedPiece, size: int = 80, count: int = 1
+    ) -> pygame.Surface:
+        """Return the texture of the given piece.
+
+        Args:
+            piece (Piece | TiedPiece): The piece whose texture is requested.
+            size (int, optional): The size of the texture. Defaults to 80.
+            count (int, optional): The number of pieces on the piece's square.
+                Defaults to 1.
+
+        Returns:
+            pygame.Surface: The texture.
+        """
+        return self.textures.get(piece, size=size, count=count)
+
+    def set_rect(self, piece: Piece | TiedPiece, rect: pygame.Rect):
+        """Store the rect the given piece was drawn at.
+
+        Args:
+            piece (Piece | TiedPiece): The drawn piece.
+            rect (pygame.Rect): The rect of the piece's texture on the screen.
+        """
+        self.rects[piece] = rect
+
+    def update_square(self, row: int, col: int, pieces: List[Piece | TiedPiece]):
+        """Record the pieces of a square that is being drawn, and drop the rects of
+        the pieces drawn on it before that have left it and were not drawn on
+        another square since.
+
+        Args:
+            row (int): The row of the square.
+            col (int): The col of the square.
+            pieces (List[Piece | TiedPiece]): The pieces on the square.
+        """
+        square = (row, col)
+        for piece in self._square_pieces.get(square, []):
+            if piece not in pieces and self._piece_squares.get(piece) == square:
+                self.rects.pop(piece, None)
+                del self._piece_squares[piece]
+        self._square_pieces[square] = list(pieces)
+        for piece in pieces:
+            self._piece_squares[piece] = square
+
+    def get_rect(self, piece: Piece | TiedPiece) -> Optional[pygame.Rect]:
+        """Return the rect the given piece was last drawn at.
+
+        Args:
+            piece (Piece | TiedPiece): The piece.
+
+        Returns:
+            Optional[pygame.Rect]: The rect, or None if the piece was never drawn.
+        """
+        return self.rects.get(piece)
+
+    def pieces_at(
+        self, pieces: List[Piece | TiedPiece], pos: Tuple[int, int]
+    ) -> List[Piece | TiedPiece]:
+        """Return the pieces among the given ones that were drawn under pos.
+
+        Args:
+            pieces (List[Piece | TiedPiece]): The candidate pieces.
+            pos (Tuple[int, int]): The (x, y) screen position.
+
+        Returns:
+            List[Piece | TiedPiece]: The pieces under pos.
+        """
+        return [
+            piece
+            for piece in pieces
+            if piece in self.rects and self.rects[piece].collidepoint(pos)
+        ]
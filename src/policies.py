@@ -0,0 +1,89 @@
+from abc import ABC, abstractmethod
+from typing import List
+import numpy as np
+
+from board import Board
+from move import LegalMove
+from piece import PieceColor
+
+
+class Policy(ABC):
+    """A strategy that picks the move a player makes. Policies are used by the
+    headless simulation runner in :py:mod:`src.simulate` and must be picklable, so
+    that they can be sent to the worker processes.
+    """
+
+    name = "policy"
+
+    @abstractmethod
+    def choose(
+        self,
+        board: Board,
+        player: PieceColor,
+        moves: List[LegalMove],
+        rng: np.random.Generator,
+    ) -> LegalMove:
+        """Pick one of the given legal moves.
+
+        Args:
+            board (Board): The board, which must not be changed.
+            player (PieceColor): The player to move.
+            moves (List[LegalMove]): The legal moves of the player. Never empty.
+            rng (np.random.Generator): The random number generator of the game.
+
+        Returns:
+            LegalMove: The move to make.
+        """
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}()"
+
+
+class RandomPolicy(Policy):
+    """Picks a legal move uniformly at random."""
+
+    name = "random"
+
+    def choose(
+        self,
+        board: Board,
+        player: PieceColor,
+        moves: List[LegalMove],
+        rng: np.random.Generator,
+    ) -> LegalMove:
+        return moves[rng.integers(len(moves))]
+
+
+class GreedyPolicy(Policy):
+    """Picks the move that captures the most enemy pieces, preferring tying moves
+    and then the moves that use the largest roll. Ties are broken at random."""
+
+    name = "greedy"
+
+    def choose(
+        self,
+        board: Board,
+        player: PieceColor,
+        moves: List[LegalMove],
+        rng: np.random.Generator,
+    ) -> LegalMove:
+        scores = [self.score(board, player, move) for move in moves]
+        best = max(scores)
+        best_moves = [move for move, score in zip(moves, scores) if score == best]
+        return best_moves[rng.integers(len(best_moves))]
+
+    @staticmethod
+    def score(board: Board, player: PieceColor, legal_move: LegalMove) -> tuple:
+        """Return the sort key of a move, higher is better.
+
+        Args:
+            board (Board): The board.
+            player (PieceColor): The player to move.
+            legal_move (LegalMove): The move.
+
+        Returns:
+            tuple: The number of captured pieces, whether it is a tying move and
+            the roll value.
+        """
+        captures = len(board.captured_pieces(legal_move.piece, legal_move.move))
+        return captures, bool(legal_move.move.tying_move), legal_move.roll
@@ -0,0 +1,633 @@
+from collections import deque
+from dataclasses import dataclass
+from itertools import accumulate
+from typing import BinaryIO, Iterator, List, NamedTuple, Optional, Tuple
+
+from board import Board
+from constants import (
+    PLACES_TO_FRUIT,
+    REROLL_VALUES,
+    ROLL_VALUES,
+    ROLL_WEIGHTS,
+    RULE_VERSION,
+)
+from move import LegalMove
+from piece import PieceColor
+from rolls import RandomRollSource, RollSource
+
+# The first bytes of a game record file, followed by FORMAT_VERSION.
+MAGIC = b"CBGR"
+FORMAT_VERSION = 2
+# The format versions read_records reads. Version 1 stored every move as its index
+# in the legal moves.
+READABLE_FORMAT_VERSIONS = (1, 2)
+
+# The flags of a record.
+FLAG_SEEDED_ROLLS = 1  # The rolls are drawn by RandomRollSource(seed), not stored.
+FLAG_PASSES = 2  # Players may end a turn while they still have legal moves.
+FLAG_MOVE_INDEX = 4  # Moves are stored as their index in Board.legal_moves.
+
+# The events of a turn stored with path aliases, after the throws of its start.
+_EVENT_MOVE = 0  # A move follows.
+_EVENT_END = 1  # The turn ends.
+_EVENT_KAWADE = 2  # The throws of a bonus roll follow. Only with stored rolls.
+
+_ROLL_TOTAL = sum(ROLL_WEIGHTS)
+_ROLL_STARTS = (0,) + tuple(accumulate(ROLL_WEIGHTS))[:-1]
+_ROLL_INDEX = {value: idx for idx, value in enumerate(ROLL_VALUES)}
+
+
+class RecordFormatError(Exception):
+    """Raised when a game record file or a record is malformed."""
+
+
+def _write_varint(value: int) -> bytes:
+    """Encode a non-negative int as a little-endian base-128 varint."""
+    encoded = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            encoded.append(byte | 0x80)
+        else:
+            encoded.append(byte)
+            return bytes(encoded)
+
+
+def _read_varint(data: bytes, offset: int) -> Tuple[int, int]:
+    """Decode the varint at the given offset of data.
+
+    Returns:
+        Tuple[int, int]: The value and the offset of the next byte.
+    """
+    value = 0
+    shift = 0
+    while True:
+        if offset >= len(data):
+            raise RecordFormatError("Truncated varint.")
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, offset
+        shift += 7
+
+
+class RecordedMove(NamedTuple):
+    """A move of a record stored with path aliases, which identifies it without a
+    board.
+
+    Args:
+        position (int): The path alias (0 to PLACES_TO_FRUIT - 1) the piece moves
+            from.
+        tied (bool): Whether the piece is a TiedPiece.
+        roll (int): The roll value the move uses.
+        tying (bool): Whether the move ties the piece with another one.
+    """
+
+    position: int
+    tied: bool
+    roll: int
+    tying: bool
+
+    @classmethod
+    def from_legal_move(cls, legal_move: LegalMove) -> "RecordedMove":
+        """Return the recorded form of a legal move.
+
+        Args:
+            legal_move (LegalMove): The legal move.
+
+        Returns:
+            RecordedMove: The recorded move.
+        """
+        piece = legal_move.piece
+        return cls(
+            position=piece.position - piece.home_position,
+            tied=piece.name == "TiedPiece",
+            roll=legal_move.roll,
+            tying=bool(legal_move.move.tying_move),
+        )
+
+
+class RecordedTurn(NamedTuple):
+    """A turn of a record stored with path aliases.
+
+    Args:
+        throws (List[List[int]]): The throws of every roll of the turn, the first
+            at its start and the others bonus rolls after captures. Empty when the
+            rolls are drawn from the record's seed.
+        moves (List[RecordedMove]): The moves of the turn, in order.
+    """
+
+    throws: List[List[int]]
+    moves: List[RecordedMove]
+
+
+class _RecordingRollSource(RollSource):
+    """Hands out the throws of another roll source and records them in a writer."""
+
+    def __init__(self, source: RollSource, writer: "GameRecordWriter"):
+        self.source = source
+        self.writer = writer
+
+    def throw(self) -> int:
+        value = self.source.throw()
+        self.writer.record_throw(value)
+        return value
+
+
+class _Decoder(RollSource):
+    """Decodes the symbols of a record's payload in the order they were recorded.
+    As a roll source it hands out the stored throws."""
+
+    def __init__(self, payload: bytes):
+        self.state = int.from_bytes(payload, "little")
+
+    def throw(self) -> int:
+        slot = self.state % _ROLL_TOTAL
+        idx = 0
+        while idx + 1 < len(_ROLL_STARTS) and _ROLL_STARTS[idx + 1] <= slot:
+            idx += 1
+        self.state = (
+            ROLL_WEIGHTS[idx] * (self.state // _ROLL_TOTAL) + slot - _ROLL_STARTS[idx]
+        )
+        return ROLL_VALUES[idx]
+
+    def choice(self, count: int) -> int:
+        self.state, idx = divmod(self.state, count)
+        return idx
+
+
+class _StoredRollSource(RollSource):
+    """Hands out the decoded throws of a turn during a replay."""
+
+    def __init__(self):
+        self.queue = deque()
+
+    def throw(self) -> int:
+        if not self.queue:
+            raise RecordFormatError("The record has too few throws.")
+        return self.queue.popleft()
+
+
+@dataclass
+class GameRecord:
+    """A recorded game.
+
+    Args:
+        number_of_players (int): The number of players.
+        turns (int): The number of turns played.
+        seed (Optional[int]): The seed of the RandomRollSource the rolls were
+            drawn from, or None when the rolls are stored in the payload.
+        passes (bool): Whether players may end a turn while they can still move.
+        payload (bytes): The encoded rolls and moves.
+        rule_version (int, optional): The version of the rules the game was played
+            with. Defaults to RULE_VERSION.
+        move_index (bool, optional): Whether the moves are stored as their index in
+            :py:meth:`src.board.Board.legal_moves` instead of with path aliases.
+            Defaults to False.
+    """
+
+    number_of_players: int
+    turns: int
+    seed: Optional[int]
+    passes: bool
+    payload: bytes
+    rule_version: int = RULE_VERSION
+    move_index: bool = False
+
+    def to_bytes(self) -> bytes:
+        """Encode the record, prefixed with its length.
+
+        Returns:
+            bytes: The encoded record.
+        """
+        flags = (
+            (FLAG_SEEDED_ROLLS if self.seed is not None else 0)
+            | (FLAG_PASSES if self.passes else 0)
+            | (FLAG_MOVE_INDEX if self.move_index else 0)
+        )
+        body = bytes((self.rule_version, self.number_of_players, flags))
+        if self.seed is not None:
+            body += _write_varint(self.seed)
+        body += _write_varint(self.turns) + self.payload
+        return _write_varint(len(body)) + body
+
+    @classmethod
+    def from_bytes(
+        cls, body: bytes, format_version: int = FORMAT_VERSION
+    ) -> "GameRecord":
+        """Decode the body of a record, without its length prefix.
+
+        Args:
+            body (bytes): The body of the record.
+            format_version (int, optional): The format version of the file the
+                record is read from. Defaults to FORMAT_VERSION.
+
+        Returns:
+            GameRecord: The record.
+        """
+        if len(body) < 3:
+            raise RecordFormatError("Truncated record header.")
+        rule_version, number_of_players, flags = body[0], body[1], body[2]
+        offset = 3
+        seed = None
+        if flags & FLAG_SEEDED_ROLLS:
+            seed, offset = _read_varint(body, offset)
+        turns, offset = _read_varint(body, offset)
+        return cls(
+            number_of_players=number_of_players,
+            turns=turns,
+            seed=seed,
+            passes=bool(flags & FLAG_PASSES),
+            payload=body[offset:],
+            rule_version=rule_version,
+            move_index=format_version == 1 or bool(flags & FLAG_MOVE_INDEX),
+        )
+
+
+class ReplayedMove(NamedTuple):
+    """A move of a replayed game, yielded after it is made on the board."""
+
+    turn: int
+    player: PieceColor
+    move: LegalMove
+    board: Board
+
+
+class GameRecordWriter:
+    """Writes games to a binary stream as they are played, one record per game.
+
+    A record holds a header (rule version, number of players, seed and number of
+    turns) and a payload. The payload packs every throw and move into one integer
+    with range coding, so that a throw costs its entropy (about 2.4 bits). When the
+    rolls come from a seeded RandomRollSource only the seed is stored.
+
+    A move is stored as a :py:class:`RecordedMove`, i.e. with the path alias of its
+    piece, and every turn as a sequence of moves, bonus rolls and its end, so that
+    a record can be decoded with :py:func:`decode` without a board and replayed
+    under later rules. This costs about 12 bits a move. With move_index, a move is
+    stored as its index in :py:meth:`src.board.Board.legal_moves` instead, which
+    costs log2 of the number of legal moves (nothing when it is forced), but only
+    replays with the rules and the move order it was recorded with.
+
+    The game must be played turn by turn like :py:func:`src.simulate.play_game`
+    does: a :py:meth:`src.board.Board.kawade` at the start of every turn, then
+    moves until the roll is used up, the player cannot move or has finished.
+
+    Usage::
+
+        writer = GameRecordWriter(file)
+        writer.start_game(2, seed=seed)
+        board = Board(players, roll_source=RandomRollSource(seed))
+        ... writer.record_move(board.legal_moves(player), move) before each move
+        ... writer.end_turn() after each turn
+        writer.end_game()
+
+    Args:
+        stream (BinaryIO): The binary stream to write to.
+        move_index (bool, optional): Whether to store the moves as their index in
+            the legal moves. Defaults to False.
+    """
+
+    def __init__(self, stream: BinaryIO, move_index: bool = False):
+        self.stream = stream
+        self.stream.write(MAGIC + bytes((FORMAT_VERSION,)))
+        self.move_index = move_index
+        self._record: Optional[GameRecord] = None
+        self._symbols: List[Tuple[int, int, int]] = []
+        # Whether the turn has a move yet, and whether the last throw was rerolled.
+        self._turn_moved = False
+        self._rerolling = False
+
+    def start_game(
+        self, number_of_players: int, seed: Optional[int] = None, passes: bool = False
+    ):
+        """Start recording a game.
+
+        Args:
+            number_of_players (int): The number of players.
+            seed (Optional[int], optional): The seed of the game's
+                RandomRollSource, if its rolls are to be replayed from the seed.
+                Defaults to None, which stores the rolls.
+            passes (bool, optional): Whether players may end a turn while they can
+                still move. Defaults to False.
+        """
+        self._record = GameRecord(
+            number_of_players=number_of_players,
+            turns=0,
+            seed=seed,
+            passes=passes,
+            payload=b"",
+            move_index=self.move_index,
+        )
+        self._symbols = []
+        self._turn_moved = False
+        self._rerolling = False
+
+    def roll_source(self, source: RollSource) -> RollSource:
+        """Wrap the roll source of the recorded board so that its throws are
+        recorded. Not needed when the game is recorded with a seed.
+
+        Args:
+            source (RollSource): The roll source.
+
+        Returns:
+            RollSource: The recording roll source.
+        """
+        return _RecordingRollSource(source, self)
+
+    def record_throw(self, value: int):
+        """Record a throw.
+
+        Args:
+            value (int): The thrown value.
+        """
+        if self._record.seed is None:
+            if not self.move_index and self._turn_moved and not self._rerolling:
+                self._record_event(_EVENT_KAWADE)
+            self._rerolling = value in REROLL_VALUES
+            idx = _ROLL_INDEX[value]
+            self._symbols.append((_ROLL_STARTS[idx], ROLL_WEIGHTS[idx], _ROLL_TOTAL))
+
+    def record_move(self, moves: List[LegalMove], move: LegalMove):
+        """Record a move, before it is made.
+
+        Args:
+            moves (List[LegalMove]): The legal moves of the player.
+            move (LegalMove): The chosen move.
+        """
+        if self.move_index:
+            idx = next(
+                idx for idx, legal_move in enumerate(moves) if legal_move is move
+            )
+            self._record_choice(idx, len(moves))
+            return
+        recorded = RecordedMove.from_legal_move(move)
+        self._record_event(_EVENT_MOVE)
+        self._symbols += [
+            (recorded.position, 1, PLACES_TO_FRUIT),
+            (int(recorded.tied), 1, 2),
+            (_ROLL_INDEX[recorded.roll], 1, len(ROLL_VALUES)),
+            (int(recorded.tying), 1, 2),
+        ]
+        self._turn_moved = True
+
+    def record_pass(self, moves: List[LegalMove]):
+        """Record that the player ends their turn while they can still move. Only
+        allowed when the game was started with passes.
+
+        Args:
+            moves (List[LegalMove]): The legal moves of the player.
+        """
+        if not self._record.passes:
+            raise ValueError("The game was not started with passes.")
+        if self.move_index:
+            self._record_choice(len(moves), len(moves))
+
+    def _record_choice(self, idx: int, count: int):
+        """Record the choice of the idx-th of count moves."""
+        if self._record.passes:
+            count += 1
+        if count > 1:
+            self._symbols.append((idx, 1, count))
+
+    def _record_event(self, event: int):
+        """Record an event of a turn stored with path aliases."""
+        events = 2 if self._record.seed is not None else 3
+        self._symbols.append((event, 1, events))
+
+    def end_turn(self):
+        """Record the end of a turn."""
+        if not self.move_index:
+            self._record_event(_EVENT_END)
+        self._record.turns += 1
+        self._turn_moved = False
+        self._rerolling = False
+
+    def end_game(self) -> GameRecord:
+        """Encode the recorded game and write it to the stream.
+
+        Returns:
+            GameRecord: The written record.
+        """
+        record = self._record
+        # Range coding with an unbounded state: symbols are encoded in reverse so
+        # that they decode in the recorded order.
+        state = 0
+        for start, frequency, total in reversed(self._symbols):
+            state = (state // frequency) * total + start + state % frequency
+        record.payload = state.to_bytes((state.bit_length() + 7) // 8, "little")
+        self.stream.write(record.to_bytes())
+        self._record = None
+        self._symbols = []
+        return record
+
+    def abort_game(self):
+        """Drop the game being recorded without writing it, e.g. when it failed."""
+        self._record = None
+        self._symbols = []
+
+    def close(self):
+        """Close the stream."""
+        self.stream.close()
+
+    def __enter__(self) -> "GameRecordWriter":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_records(stream: BinaryIO) -> Iterator[GameRecord]:
+    """Read the records of a game record file one by one, without loading the
+    whole file.
+
+    Args:
+        stream (BinaryIO): The binary stream to read from.
+
+    Raises:
+        RecordFormatError: If the stream is not a game record file of a supported
+            version, or is truncated.
+
+    Yields:
+        Iterator[GameRecord]: The records.
+    """
+    header = stream.read(len(MAGIC) + 1)
+    if header[: len(MAGIC)] != MAGIC or len(header) != len(MAGIC) + 1:
+        raise RecordFormatError("Not a game record file.")
+    format_version = header[-1]
+    if format_version not in READABLE_FORMAT_VERSIONS:
+        raise RecordFormatError(f"Unsupported format version {format_version}.")
+    while True:
+        length = 0
+        shift = 0
+        while True:
+            byte = stream.read(1)
+            if not byte:
+                if shift:
+                    raise RecordFormatError("Truncated record length.")
+                return
+            length |= (byte[0] & 0x7F) << shift
+            shift += 7
+            if not byte[0] & 0x80:
+                break
+        body = stream.read(length)
+        if len(body) != length:
+            raise RecordFormatError("Truncated record.")
+        yield GameRecord.from_bytes(body, format_version)
+
+
+def decode(record: GameRecord) -> Iterator[RecordedTurn]:
+    """Decode the turns of a record stored with path aliases, without a board.
+
+    Args:
+        record (GameRecord): The record.
+
+    Raises:
+        RecordFormatError: If the record stores the moves as indices, which only
+            decode on a board, or is malformed.
+
+    Yields:
+        Iterator[RecordedTurn]: Every turn.
+    """
+    if record.move_index:
+        raise RecordFormatError("The record stores its moves as legal move indices.")
+    decoder = _Decoder(record.payload)
+    events = 2 if record.seed is not None else 3
+    for _ in range(record.turns):
+        turn = RecordedTurn(throws=[], moves=[])
+        if record.seed is None:
+            turn.throws.append(decoder.kawade())
+        while True:
+            event = decoder.choice(events)
+            if event == _EVENT_END:
+                break
+            if event == _EVENT_KAWADE:
+                turn.throws.append(decoder.kawade())
+                continue
+            position = decoder.choice(PLACES_TO_FRUIT)
+            tied = bool(decoder.choice(2))
+            roll = ROLL_VALUES[decoder.choice(len(ROLL_VALUES))]
+            tying = bool(decoder.choice(2))
+            turn.moves.append(RecordedMove(position, tied, roll, tying))
+        yield turn
+    if decoder.state:
+        raise RecordFormatError("The record has data left after the last turn.")
+
+
+def replay(record: GameRecord) -> Iterator[ReplayedMove]:
+    """Replay a recorded game on a new board, move by move.
+
+    Records stored with path aliases replay under the current rules whatever rules
+    they were played with, as long as every move is still legal. Records stored
+    with legal move indices only replay under the rules they were played with.
+
+    Args:
+        record (GameRecord): The record.
+
+    Raises:
+        RecordFormatError: If the record stores legal move indices and was
+            written for other rules, or does not decode to legal moves.
+
+    Yields:
+        Iterator[ReplayedMove]: Every move, after it is made on the board.
+    """
+    if record.move_index:
+        yield from _replay_move_indices(record)
+        return
+    players = list(PieceColor.__members__.keys())[: record.number_of_players]
+    rolls = _StoredRollSource()
+    board = Board(
+        players=players,
+        roll_source=rolls if record.seed is None else RandomRollSource(record.seed),
+    )
+    finished = []
+    seat = 0
+    for turn, recorded_turn in enumerate(decode(record)):
+        if len(finished) == record.number_of_players - 1:
+            raise RecordFormatError("The record has turns after the end of the game.")
+        player = players[seat]
+        for throws in recorded_turn.throws:
+            rolls.queue.extend(throws)
+        board.kawade()
+        for recorded_move in recorded_turn.moves:
+            if seat in finished:
+                raise RecordFormatError(f"Turn {turn} has moves after {player} won.")
+            legal_move = next(
+                (
+                    legal_move
+                    for legal_move in board.legal_moves(player)
+                    if RecordedMove.from_legal_move(legal_move) == recorded_move
+                ),
+                None,
+            )
+            if legal_move is None:
+                raise RecordFormatError(
+                    f"Turn {turn}: {recorded_move} is not a legal move."
+                )
+            board.move(legal_move.piece, legal_move.move)
+            yield ReplayedMove(turn, player, legal_move, board)
+            if board.has_player_finished(player):
+                finished.append(seat)
+        if (
+            not record.passes
+            and seat not in finished
+            and board.roll
+            and board.legal_moves(player)
+        ):
+            raise RecordFormatError(f"Turn {turn} ends while {player} can move.")
+        if rolls.queue:
+            raise RecordFormatError(f"Turn {turn} has throws left.")
+        board.roll = []
+        board.clear_enemy_pieces_with_player_tied_piece(player)
+        if len(finished) == record.number_of_players - 1:
+            continue
+        seat = (seat + 1) % record.number_of_players
+        while seat in finished:
+            seat = (seat + 1) % record.number_of_players
+
+
+def _replay_move_indices(record: GameRecord) -> Iterator[ReplayedMove]:
+    """Replay a record that stores its moves as legal move indices, see
+    :py:func:`replay`."""
+    if record.rule_version != RULE_VERSION:
+        raise RecordFormatError(
+            f"The record was played with rule version {record.rule_version}."
+        )
+    decoder = _Decoder(record.payload)
+    players = list(PieceColor.__members__.keys())[: record.number_of_players]
+    board = Board(
+        players=players,
+        roll_source=decoder if record.seed is None else RandomRollSource(record.seed),
+    )
+    finished = []
+    seat = 0
+    for turn in range(record.turns):
+        player = players[seat]
+        board.kawade()
+        while board.roll:
+            moves = board.legal_moves(player)
+            if not moves:
+                break
+            if len(moves) == 1 and not record.passes:
+                idx = 0
+            else:
+                idx = decoder.choice(len(moves) + record.passes)
+            if idx == len(moves):
+                break
+            legal_move = moves[idx]
+            board.move(legal_move.piece, legal_move.move)
+            yield ReplayedMove(turn, player, legal_move, board)
+            if board.has_player_finished(player):
+                finished.append(seat)
+                break
+        board.roll = []
+        board.clear_enemy_pieces_with_player_tied_piece(player)
+        if len(finished) == record.number_of_players - 1:
+            break
+        seat = (seat + 1) % record.number_of_players
+        while seat in finished:
+            seat = (seat + 1) % record.number_of_players
+    if decoder.state:
+        raise RecordFormatError("The record has data left after the last turn.")
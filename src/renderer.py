@@ -0,0 +1,167 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, List, Optional, Set, Tuple
+import pygame
+
+from constants import COLS, ROWS, SQSIZE
+
+if TYPE_CHECKING:
+    from game import Game
+
+
+class DirtyRenderer:
+    """Renders the game by repainting only the board squares that changed since
+    the previous frame.
+
+    Squares are marked dirty by :py:meth:`src.board.Board.move` (moves and
+    captures), by :py:meth:`src.game.Game.set_hover` and by the renderer itself
+    when the dragged piece, its sprite or its move highlights change.
+
+    Args:
+        game (Game): The game to render.
+    """
+
+    def __init__(self, game: Game):
+        self.game = game
+        self.dirty: Set[Tuple[int, int]] = set()
+        self.full = True
+        self._dragged = None
+        self._drag_origin = None
+        self._highlighted: Set[Tuple[int, int]] = set()
+        self._sprite_rect_drawn = None
+
+    @property
+    def is_dirty(self) -> bool:
+        """Check whether anything has to be repainted on the next frame.
+
+        Returns:
+            bool: True if the next call to :py:meth:`render` will repaint something.
+        """
+        self._collect_changes()
+        return self.full or bool(self.dirty)
+
+    def mark_square(self, row: int, col: int):
+        """Mark the square at row and col to be repainted.
+
+        Args:
+            row (int): The row of the square.
+            col (int): The col of the square.
+        """
+        self.dirty.add((row, col))
+
+    def mark_rect(self, rect: pygame.Rect):
+        """Mark every square that the given rect overlaps to be repainted.
+
+        Args:
+            rect (pygame.Rect): The rect in screen coordinates.
+        """
+        self.dirty.update(self._squares_in_rect(rect))
+
+    def mark_all(self):
+        """Mark the whole board to be repainted."""
+        self.full = True
+
+    def render(self, surface: pygame.Surface) -> List[pygame.Rect]:
+        """Repaint the dirty squares of the board on the given surface.
+
+        Args:
+            surface (pygame.Surface): The pygame surface to draw on.
+
+        Returns:
+            List[pygame.Rect]: The repainted rects, to be passed on to
+            ``pygame.display.update``.
+        """
+        self._collect_changes()
+        game = self.game
+        if self.full:
+            game.show_bg(surface)
+            game.show_moves(surface)
+            game.show_pieces(surface)
+            game.show_hover(surface)
+            if game.dragger.dragging:
+                game.dragger.update_blit(surface)
+            rects = [surface.get_rect()]
+        else:
+            rects = []
+            sprite_rect = self._sprite_rect()
+            for row, col in self.dirty:
+                rect = pygame.Rect(col * SQSIZE, row * SQSIZE, SQSIZE, SQSIZE)
+                surface.set_clip(rect)
+                game.show_bg(surface)
+                game.show_moves(surface)
+                game.show_square_pieces(surface, row, col)
+                game.show_hover(surface)
+                if sprite_rect is not None and sprite_rect.colliderect(rect):
+                    game.dragger.update_blit(surface)
+                rects.append(rect)
+            surface.set_clip(None)
+        self.full = False
+        self.dirty.clear()
+        return rects
+
+    def _collect_changes(self):
+        """Mark the squares changed by the board, the dragger and the move
+        highlights since the last frame."""
+        board = self.game.board
+        dragger = self.game.dragger
+        if board.changed_squares:
+            self.dirty.update(board.changed_squares)
+            board.changed_squares.clear()
+
+        if dragger.piece is not self._dragged:
+            if self._drag_origin is not None:
+                self.dirty.add(self._drag_origin)
+            self._dragged = dragger.piece
+            self._drag_origin = (
+                (dragger.initial_row, dragger.initial_col) if dragger.piece else None
+            )
+            if self._drag_origin is not None:
+                self.dirty.add(self._drag_origin)
+
+        highlighted = (
+            {(move.final.row, move.final.col) for move in dragger.piece.moves.values()}
+            if dragger.dragging
+            else set()
+        )
+        if highlighted != self._highlighted:
+            self.dirty.update(highlighted ^ self._highlighted)
+            self._highlighted = highlighted
+
+        sprite_rect = self._sprite_rect()
+        if sprite_rect != self._sprite_rect_drawn:
+            for rect in (sprite_rect, self._sprite_rect_drawn):
+                if rect is not None:
+                    self.mark_rect(rect)
+            self._sprite_rect_drawn = sprite_rect
+
+    def _sprite_rect(self) -> Optional[pygame.Rect]:
+        """Return the rect the dragged piece's sprite is drawn at.
+
+        Returns:
+            Optional[pygame.Rect]: The rect of the sprite, or None when no piece is
+            being dragged.
+        """
+        dragger = self.game.dragger
+        if not dragger.dragging:
+            return None
+        img = dragger.sprites.texture(dragger.piece, size=128)
+        return img.get_rect(center=(dragger.mouseX, dragger.mouseY))
+
+    @staticmethod
+    def _squares_in_rect(rect: pygame.Rect) -> Set[Tuple[int, int]]:
+        """Return the (row, col) of the board squares the given rect overlaps.
+
+        Args:
+            rect (pygame.Rect): The rect in screen coordinates.
+
+        Returns:
+            Set[Tuple[int, int]]: The overlapped squares.
+        """
+        first_row = max(rect.top // SQSIZE, 0)
+        last_row = min((rect.bottom - 1) // SQSIZE, ROWS - 1)
+        first_col = max(rect.left // SQSIZE, 0)
+        last_col = min((rect.right - 1) // SQSIZE, COLS - 1)
+        return {
+            (row, col)
+            for row in range(first_row, last_row + 1)
+            for col in range(first_col, last_col + 1)
+        }
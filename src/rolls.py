@@ -0,0 +1,202 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from fractions import Fraction
+from functools import lru_cache
+from itertools import combinations_with_replacement
+from math import factorial
+from typing import List, Sequence, Tuple
+import numpy as np
+
+from constants import REROLL_VALUES, ROLL_VALUES, ROLL_WEIGHTS
+
+# The probability of every value of ROLL_VALUES.
+ROLL_PROBABILITIES = tuple(weight / sum(ROLL_WEIGHTS) for weight in ROLL_WEIGHTS)
+
+# Every value of ROLL_VALUES repeated as many times as its weight, so that a
+# uniform index into the table draws a throw with the exact distribution.
+ROLL_TABLE = np.repeat(np.array(ROLL_VALUES, dtype=np.int64), ROLL_WEIGHTS)
+
+
+class RollSource(ABC):
+    """A source of the throws of the cowrie shells used by
+    :py:meth:`src.board.Board.kawade`."""
+
+    @abstractmethod
+    def throw(self) -> int:
+        """Return the value of a single throw.
+
+        Returns:
+            int: One of ROLL_VALUES.
+        """
+
+    def kawade(self) -> List[int]:
+        """Return the values of a throw and of its rerolls, i.e. throw again as long
+        as a value in REROLL_VALUES comes up.
+
+        Returns:
+            List[int]: The thrown values, in order.
+        """
+        values = [self.throw()]
+        while values[-1] in REROLL_VALUES:
+            values.append(self.throw())
+        return values
+
+
+class RandomRollSource(RollSource):
+    """Draws throws from a numpy Generator in blocks, looking them up in
+    :py:data:`ROLL_TABLE`, and hands them out from a buffer.
+
+    Args:
+        seed (optional): The seed of the Generator, e.g. an int or a
+            numpy.random.SeedSequence. Defaults to None, which seeds it from fresh
+            entropy.
+        block_size (int, optional): The number of throws drawn at once.
+            Defaults to 4096.
+    """
+
+    def __init__(self, seed=None, block_size: int = 4096):
+        self.rng = np.random.default_rng(seed)
+        self.block_size = block_size
+        self._buffer: List[int] = []
+        self._next = 0
+
+    def throw(self) -> int:
+        if self._next == len(self._buffer):
+            self._refill()
+        value = self._buffer[self._next]
+        self._next += 1
+        return value
+
+    def _refill(self):
+        """Draw the next block of throws."""
+        self._buffer = ROLL_TABLE[
+            self.rng.integers(len(ROLL_TABLE), size=self.block_size)
+        ].tolist()
+        self._next = 0
+
+
+class FixedRollSource(RollSource):
+    """Hands out the given throws in order, starting over after the last one. Used
+    to set up a given roll in tests and while debugging.
+
+    Args:
+        throws (Sequence[int]): The throws. Must not all be in REROLL_VALUES.
+    """
+
+    def __init__(self, throws: Sequence[int]):
+        self.throws = list(throws)
+        self._next = 0
+
+    def throw(self) -> int:
+        value = self.throws[self._next]
+        self._next = (self._next + 1) % len(self.throws)
+        return value
+
+
+@dataclass(frozen=True)
+class RollDistribution:
+    """The probability of every distinct roll a single :py:meth:`RollSource.kawade`
+    can give, i.e. of every multiset of the values of a throw and its rerolls.
+    The rolls are sorted from the most to the least likely; the arrays are
+    read-only.
+
+    Args:
+        rolls (Tuple[Tuple[int, ...], ...]): The sorted values of every roll.
+        counts (np.ndarray): A rolls x len(ROLL_VALUES) array of the number of
+            times each value is in every roll.
+        probabilities (np.ndarray): The exact probability of every roll.
+        mass (float): The total probability of the rolls, at most one since
+            unlikely rolls are left out.
+    """
+
+    rolls: Tuple[Tuple[int, ...], ...]
+    counts: np.ndarray
+    probabilities: np.ndarray
+    mass: float
+
+    def __len__(self) -> int:
+        return len(self.rolls)
+
+    def normalized(self) -> np.ndarray:
+        """Return the probabilities of the rolls scaled to sum to one.
+
+        Returns:
+            np.ndarray: The scaled probabilities.
+        """
+        return self.probabilities / self.mass
+
+
+@lru_cache(maxsize=None)
+def get_roll_distribution(
+    mass: float = 0.999,
+    values: Tuple[int, ...] = ROLL_VALUES,
+    weights: Tuple[int, ...] = ROLL_WEIGHTS,
+    rerolls: Tuple[int, ...] = REROLL_VALUES,
+) -> RollDistribution:
+    """Enumerate the distinct rolls of a turn and their exact probabilities, keeping
+    the most likely rolls until they hold the given probability mass. The
+    distribution is computed on the first call for a rule set and shared after.
+
+    A roll is a multiset of rerolled values plus the final value, which does not
+    give another throw. Its probability is the number of orders of the rerolled
+    values times the product of the probabilities of all of its values.
+
+    Args:
+        mass (float, optional): The probability mass to keep. Defaults to 0.999.
+        values (Tuple[int, ...], optional): The values of a throw. Defaults to
+            ROLL_VALUES.
+        weights (Tuple[int, ...], optional): The weights of the values. Defaults
+            to ROLL_WEIGHTS.
+        rerolls (Tuple[int, ...], optional): The values that give another throw.
+            Defaults to REROLL_VALUES.
+
+    Returns:
+        RollDistribution: The distribution.
+    """
+    probability = {
+        value: Fraction(weight, sum(weights)) for value, weight in zip(values, weights)
+    }
+    reroll_mass = sum(probability[value] for value in rerolls)
+    final_values = [value for value in values if value not in rerolls]
+
+    rolls = []
+    number_of_rerolls = 0
+    # Stop once the rolls with more rerolls cannot be needed to reach the mass.
+    while 1 - reroll_mass**number_of_rerolls < mass:
+        for rerolled in combinations_with_replacement(rerolls, number_of_rerolls):
+            orders = factorial(number_of_rerolls)
+            reroll_probability = Fraction(1)
+            for value in set(rerolled):
+                orders //= factorial(rerolled.count(value))
+            for value in rerolled:
+                reroll_probability *= probability[value]
+            for value in final_values:
+                rolls.append(
+                    (
+                        orders * reroll_probability * probability[value],
+                        tuple(sorted(rerolled + (value,))),
+                    )
+                )
+        number_of_rerolls += 1
+
+    rolls.sort(key=lambda roll: (-roll[0], roll[1]))
+    kept = []
+    kept_mass = Fraction(0)
+    for roll_probability, roll in rolls:
+        if kept_mass >= mass:
+            break
+        kept.append((roll_probability, roll))
+        kept_mass += roll_probability
+
+    counts = np.array(
+        [[roll.count(value) for value in values] for _, roll in kept], dtype=np.int8
+    )
+    probabilities = np.array([float(roll_probability) for roll_probability, _ in kept])
+    for array in (counts, probabilities):
+        array.setflags(write=False)
+    return RollDistribution(
+        rolls=tuple(roll for _, roll in kept),
+        counts=counts,
+        probabilities=probabilities,
+        mass=float(kept_mass),
+    )
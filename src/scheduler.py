@@ -0,0 +1,66 @@
+from typing import List
+import pygame
+
+from constants import FPS
+
+
+class FrameScheduler:
+    """Paces the main loop. While nothing is animating the scheduler blocks until
+    the next event arrives, otherwise it runs the loop at a fixed frame rate.
+
+    Args:
+        fps (int, optional): The target frame rate while animating. Defaults to FPS.
+        idle_wait (bool, optional): Whether to block on ``pygame.event.wait`` while
+            nothing is animating. When False, the loop always runs at the target
+            frame rate. Defaults to True.
+    """
+
+    def __init__(self, fps: int = FPS, idle_wait: bool = True):
+        self.fps = fps
+        self.idle_wait = idle_wait
+        self.clock = pygame.time.Clock()
+
+    def events(self, animating: bool) -> List[pygame.event.Event]:
+        """Wait for the next frame and return the events queued until then.
+
+        Args:
+            animating (bool): Whether something on the screen is changing without
+                user input, e.g. a piece being dragged or a pending repaint.
+
+        Returns:
+            List[pygame.event.Event]: The queued events, with consecutive mouse
+            motion coalesced into the last motion event.
+        """
+        if self.idle_wait and not animating:
+            events = [pygame.event.wait()]
+            events.extend(pygame.event.get())
+            # Restart the frame timer so that the idle time is not counted
+            # against the next frame.
+            self.clock.tick()
+        else:
+            self.clock.tick(self.fps)
+            events = pygame.event.get()
+        return self.coalesce_motion(events)
+
+    @staticmethod
+    def coalesce_motion(events: List[pygame.event.Event]) -> List[pygame.event.Event]:
+        """Drop every mouse motion event but the last one, as only the latest mouse
+        position is needed to draw a frame.
+
+        Args:
+            events (List[pygame.event.Event]): The events of a frame.
+
+        Returns:
+            List[pygame.event.Event]: The events without the stale motion events.
+        """
+        last_motion = None
+        for idx, event in enumerate(events):
+            if event.type == pygame.MOUSEMOTION:
+                last_motion = idx
+        if last_motion is None:
+            return events
+        return [
+            event
+            for idx, event in enumerate(events)
+            if event.type != pygame.MOUSEMOTION or idx == last_motion
+        ]
@@ -0,0 +1,413 @@
+import argparse
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+
+from board import Board
+from piece import PieceColor
+from expectimax import ExpectimaxBot
+from maxn import MaxNBot
+from mcts import MCTSBot
+from policies import GreedyPolicy, Policy, RandomPolicy
+from records import GameRecordWriter
+from rolls import RandomRollSource
+
+# The number of turns after which a game is abandoned as unfinished.
+DEFAULT_MAX_TURNS = 2000
+
+# The policies that can be picked by name on the command line.
+POLICIES = {
+    policy.name: policy
+    for policy in (RandomPolicy, GreedyPolicy, ExpectimaxBot, MaxNBot, MCTSBot)
+}
+
+
+@dataclass
+class GameResult:
+    """The outcome of a single simulated game.
+
+    Args:
+        finish_order (List[int]): The seats of the players in the order they
+            finished their pieces.
+        turns (int): The number of turns played.
+        moves (int): The number of moves made.
+        seed (Tuple[int, ...], optional): The entropy the game was played with.
+            Defaults to ().
+        error (Optional[str], optional): The error that stopped the game, if it
+            failed. Defaults to None.
+    """
+
+    finish_order: List[int]
+    turns: int
+    moves: int
+    seed: Tuple[int, ...] = ()
+    error: Optional[str] = None
+
+    @property
+    def winner(self) -> Optional[int]:
+        """The seat of the first player to finish, or None if nobody finished."""
+        return self.finish_order[0] if self.finish_order else None
+
+
+@dataclass
+class SimulationReport:
+    """The totals of a batch of simulated games.
+
+    Args:
+        number_of_players (int): The number of players of every game.
+        games (int, optional): The number of games played to the end or to the
+            maximum number of turns. Failed games are not counted. Defaults to 0.
+        turns (int, optional): The number of turns played. Defaults to 0.
+        moves (int, optional): The number of moves made. Defaults to 0.
+        unfinished (int, optional): The number of games abandoned after the
+            maximum number of turns. Defaults to 0.
+        failures (List[Tuple[Tuple[int, ...], str]], optional): The seed and the
+            error of every game that failed. Failed games count neither as
+            played nor as won nor as unfinished, so they do not skew the win
+            rates.
+        wins (List[int], optional): The number of games won by every seat.
+        seconds (float, optional): The wall clock time the games took.
+            Defaults to 0.0.
+    """
+
+    number_of_players: int
+    games: int = 0
+    turns: int = 0
+    moves: int = 0
+    unfinished: int = 0
+    failures: List[Tuple[Tuple[int, ...], str]] = field(default_factory=list)
+    wins: List[int] = field(default_factory=list)
+    seconds: float = 0.0
+
+    def __post_init__(self):
+        if not self.wins:
+            self.wins = [0] * self.number_of_players
+
+    def add(self, result: GameResult):
+        """Add the result of a game to the totals.
+
+        Args:
+            result (GameResult): The result of the game.
+        """
+        if result.error is not None:
+            self.failures.append((result.seed, result.error))
+            return
+        self.games += 1
+        self.turns += result.turns
+        self.moves += result.moves
+        if result.winner is None:
+            self.unfinished += 1
+        else:
+            self.wins[result.winner] += 1
+
+    def merge(self, other: "SimulationReport"):
+        """Add the totals of another report, e.g. of another worker, to this one.
+
+        Args:
+            other (SimulationReport): The report to merge.
+        """
+        self.games += other.games
+        self.turns += other.turns
+        self.moves += other.moves
+        self.unfinished += other.unfinished
+        self.failures += other.failures
+        self.wins = [
+            wins + other_wins for wins, other_wins in zip(self.wins, other.wins)
+        ]
+
+    @property
+    def games_per_second(self) -> float:
+        """The number of games played per second of wall clock time."""
+        return self.games / self.seconds if self.seconds else 0.0
+
+    @property
+    def turns_per_second(self) -> float:
+        """The number of turns played per second of wall clock time."""
+        return self.turns / self.seconds if self.seconds else 0.0
+
+    @property
+    def win_rates(self) -> List[float]:
+        """The fraction of the games won by every seat."""
+        return [wins / self.games if self.games else 0.0 for wins in self.wins]
+
+    def __str__(self) -> str:
+        rates = ", ".join(
+            f"seat {seat + 1}: {rate:.1%}" for seat, rate in enumerate(self.win_rates)
+        )
+        text = (
+            f"{self.games} games ({self.unfinished} unfinished), "
+            f"{len(self.failures)} failed, "
+            f"{self.turns} turns, {self.moves} moves in {self.seconds:.2f} s\n"
+            f"{self.games_per_second:.1f} games/s, "
+            f"{self.turns_per_second:.1f} turns/s\n"
+            f"win rates: {rates}"
+        )
+        for seed, error in self.failures:
+            text += f"\nfailed game {seed}: {error}"
+        return text
+
+
+def play_game(
+    number_of_players: int,
+    policies: Sequence[Policy],
+    seed: Tuple[int, ...],
+    max_turns: int = DEFAULT_MAX_TURNS,
+    writer: Optional[GameRecordWriter] = None,
+    keep_going: bool = False,
+) -> GameResult:
+    """Play a complete game without a display.
+
+    Turns go round the seats like in :py:class:`src.game.Game`, skipping players
+    that have finished, until a single player is left.
+
+    The record of a game that raises an exception, if any, is dropped. With
+    keep_going the game is then returned as failed, with its seed and the error,
+    so that a run of many games keeps the results of the others; otherwise the
+    exception propagates.
+
+    Args:
+        number_of_players (int): The number of players.
+        policies (Sequence[Policy]): The policy of every seat.
+        seed (Tuple[int, ...]): The entropy of the game's random number generators.
+        max_turns (int, optional): The number of turns after which the game is
+            abandoned. Defaults to DEFAULT_MAX_TURNS.
+        writer (Optional[GameRecordWriter], optional): The writer to record the
+            game with. Defaults to None.
+        keep_going (bool, optional): Whether to return a game that raises an
+            exception as failed instead of raising. Defaults to False.
+
+    Returns:
+        GameResult: The outcome of the game.
+    """
+    seed = tuple(seed)
+    policy_seed, roll_seed = np.random.SeedSequence(seed).spawn(2)
+    rng = np.random.default_rng(policy_seed)
+    # An int seed, so that records can replay the rolls from it.
+    roll_seed = int(roll_seed.generate_state(1)[0])
+
+    players = list(PieceColor.__members__.keys())[:number_of_players]
+    board = Board(players=players, roll_source=RandomRollSource(roll_seed))
+    if writer is not None:
+        writer.start_game(number_of_players, seed=roll_seed)
+    finish_order = []
+    seat = 0
+    turns = moves = 0
+    try:
+        while len(finish_order) < number_of_players - 1 and turns < max_turns:
+            player = players[seat]
+            turns += 1
+            board.kawade()
+            while board.roll:
+                legal_moves = board.legal_moves(player)
+                if not legal_moves:
+                    break
+                choice = policies[seat].choose(board, player, legal_moves, rng)
+                if writer is not None:
+                    writer.record_move(legal_moves, choice)
+                board.move(choice.piece, choice.move)
+                moves += 1
+                if board.has_player_finished(player):
+                    finish_order.append(seat)
+                    break
+            board.roll = []
+            board.clear_enemy_pieces_with_player_tied_piece(player)
+            if writer is not None:
+                writer.end_turn()
+            seat = (seat + 1) % number_of_players
+            while seat in finish_order:
+                seat = (seat + 1) % number_of_players
+    except Exception as error:
+        if writer is not None:
+            writer.abort_game()
+        if not keep_going:
+            raise
+        return GameResult(
+            finish_order=finish_order,
+            turns=turns,
+            moves=moves,
+            seed=seed,
+            error=f"{type(error).__name__}: {error}",
+        )
+    if writer is not None:
+        writer.end_game()
+    return GameResult(finish_order=finish_order, turns=turns, moves=moves, seed=seed)
+
+
+def _play_games(
+    number_of_players: int,
+    policies: Sequence[Policy],
+    seed: int,
+    first_game: int,
+    last_game: int,
+    max_turns: int,
+    record_dir: Optional[str] = None,
+    keep_going: bool = False,
+) -> SimulationReport:
+    """Play a chunk of games in a worker process.
+
+    Game i is seeded with (seed, i), so the results do not depend on how the
+    games are split between the workers. When record_dir is given, the games of
+    the chunk are recorded in a file of their own in it.
+
+    Returns:
+        SimulationReport: The totals of the chunk, without the time.
+    """
+    report = SimulationReport(number_of_players)
+    writer = None
+    if record_dir is not None:
+        writer = GameRecordWriter(
+            open(os.path.join(record_dir, f"games-{first_game:09d}.cbgr"), "wb")
+        )
+    try:
+        for game in range(first_game, last_game):
+            report.add(
+                play_game(
+                    number_of_players,
+                    policies,
+                    (seed, game),
+                    max_turns,
+                    writer,
+                    keep_going,
+                )
+            )
+    finally:
+        if writer is not None:
+            writer.close()
+    return report
+
+
+def simulate(
+    games: int,
+    number_of_players: int = 2,
+    policies: Optional[Sequence[Policy]] = None,
+    workers: Optional[int] = None,
+    seed: int = 0,
+    max_turns: int = DEFAULT_MAX_TURNS,
+    chunk_size: Optional[int] = None,
+    record_dir: Optional[str] = None,
+    keep_going: bool = False,
+) -> SimulationReport:
+    """Play a number of complete games, spread across a pool of worker processes.
+
+    Args:
+        games (int): The number of games to play.
+        number_of_players (int, optional): The number of players of every game.
+            Defaults to 2.
+        policies (Optional[Sequence[Policy]], optional): The policy of every seat,
+            or a single policy for all of them. Defaults to RandomPolicy.
+        workers (Optional[int], optional): The number of worker processes. 1 plays
+            the games in this process. Defaults to the number of CPUs.
+        seed (int, optional): The seed of the simulation. Defaults to 0.
+        max_turns (int, optional): The number of turns after which a game is
+            abandoned. Defaults to DEFAULT_MAX_TURNS.
+        chunk_size (Optional[int], optional): The number of games sent to a worker
+            at once. Defaults to about eight chunks per worker.
+        record_dir (Optional[str], optional): The directory to record the games
+            in, one file per chunk. Defaults to None, which does not record them.
+        keep_going (bool, optional): Whether to report the games that raise an
+            exception as failures and play on instead of raising. Defaults to
+            False.
+
+    Raises:
+        ValueError: If the number of players or of policies is not supported.
+
+    Returns:
+        SimulationReport: The totals of the games.
+    """
+    if not 2 <= number_of_players <= len(PieceColor):
+        raise ValueError(
+            f"The number of players must be between 2 and {len(PieceColor)}."
+        )
+    policies = list(policies) if policies else [RandomPolicy()]
+    if len(policies) == 1:
+        policies *= number_of_players
+    if len(policies) != number_of_players:
+        raise ValueError("Pass either one policy or one policy per player.")
+    workers = workers or os.cpu_count() or 1
+    chunk_size = chunk_size or max(1, math.ceil(games / (workers * 8)))
+    chunks = [
+        (first_game, min(first_game + chunk_size, games))
+        for first_game in range(0, games, chunk_size)
+    ]
+
+    report = SimulationReport(number_of_players)
+    start = time.perf_counter()
+    if workers == 1:
+        for first_game, last_game in chunks:
+            report.merge(
+                _play_games(
+                    number_of_players,
+                    policies,
+                    seed,
+                    first_game,
+                    last_game,
+                    max_turns,
+                    record_dir,
+                    keep_going,
+                )
+            )
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(
+                    _play_games,
+                    number_of_players,
+                    policies,
+                    seed,
+                    first_game,
+                    last_game,
+                    max_turns,
+                    record_dir,
+                    keep_going,
+                )
+                for first_game, last_game in chunks
+            ]
+            for future in futures:
+                report.merge(future.result())
+    report.seconds = time.perf_counter() - start
+    return report
+
+
+def main(argv: Optional[List[str]] = None):
+    """Run a simulation from the command line and print its report."""
+    parser = argparse.ArgumentParser(description="Play Chowka Bhara games headless.")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--players", type=int, default=2)
+    parser.add_argument(
+        "--policy",
+        nargs="+",
+        choices=sorted(POLICIES),
+        default=[RandomPolicy.name],
+        help="One policy for every seat, or one per seat.",
+    )
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-turns", type=int, default=DEFAULT_MAX_TURNS)
+    parser.add_argument(
+        "--record", default=None, help="The directory to record the games in."
+    )
+    parser.add_argument(
+        "--keep-going",
+        action="store_true",
+        help="Report the games that raise an error as failed instead of stopping.",
+    )
+    args = parser.parse_args(argv)
+    report = simulate(
+        args.games,
+        number_of_players=args.players,
+        policies=[POLICIES[name]() for name in args.policy],
+        workers=args.workers,
+        seed=args.seed,
+        max_turns=args.max_turns,
+        record_dir=args.record,
+        keep_going=args.keep_going,
+    )
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,53 @@
 from dataclasses import field, dataclass
-from typing import List, Optional
+from typing import List, NamedTuple, Optional
 from piece import Piece, PieceColor, TiedPiece
-from constants import COLS, SAFE_HOUSES
+from bitboards import COLOR_BITS, COLORS, Bitboards
+from constants import COLS, ROWS, SAFE_MASK
+
+
+class Coordinate(NamedTuple):
+    """The position of a square on the board, without its pieces. Coordinates are
+    immutable and hashable; the moves refer to the squares with the interned
+    coordinates of :py:data:`COORDINATES` rather than to the squares of the board,
+    which hold the pieces.
+
+    A coordinate compares equal to the square of the board at its position.
+
+    Args:
+        row (int): The row number of the square.
+        col (int): The column number of the square.
+    """
+
+    row: int
+    col: int
+
+    @property
+    def is_safe_house(self) -> bool:
+        """Check if the square is a safe house.
+
+        Returns:
+            bool: True if the square is a safe house.
+        """
+        return bool(SAFE_MASK >> (self.row * COLS + self.col) & 1)
+
+
+# The coordinate of every square of the board, by row and column.
+COORDINATES = tuple(
+    tuple(Coordinate(row, col) for col in range(COLS)) for row in range(ROWS)
+)
 
 
 @dataclass
 class Square:
     """The square class to represent the squares on the board.
 
+    Besides its pieces, a square keeps the number of single pieces and TiedPieces
+    of every color on it and masks of the colors that have any (see
+    :py:data:`src.bitboards.COLOR_BITS`), so that its queries are bitwise
+    operations that do not depend on the number of pieces stacked on it. The
+    squares of a board also keep the board's :py:class:`src.bitboards.Bitboards`
+    up to date.
+
     Args:
         row (int): The row number of the square.
         col (int): The column number of the square.
@@ -17,6 +57,25 @@ class Square:
     row: int
     col: int
     pieces: Optional[List[Piece]] = field(default_factory=list)
+    # The bit of the square in a mask of squares.
+    bit: int = field(init=False, repr=False)
+    # The colors with a single piece and with a TiedPiece on the square.
+    single_colors: int = field(init=False, repr=False)
+    tied_colors: int = field(init=False, repr=False)
+    # The masks of the board the square is on, if any.
+    bitboards: Optional[Bitboards] = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.bit = 1 << (self.row * COLS + self.col)
+        self.single_colors = 0
+        self.tied_colors = 0
+        self.bitboards = None
+        # The number of single pieces and TiedPieces of every color, at
+        # 2 * PieceColor value and 2 * PieceColor value + 1, created with the
+        # first piece since most squares of moves never hold one.
+        self._counts = None
+        for piece in self.pieces:
+            self._count(piece, 1)
 
     def __eq__(self, other):
         return self.row == other.row and self.col == other.col
@@ -28,7 +87,7 @@ class Square:
         Returns:
             bool: True if the square is a safe house.
         """
-        return (self.row, self.col) in SAFE_HOUSES
+        return bool(SAFE_MASK & self.bit)
 
     def has_pieces(self) -> bool:
         """Check if the square has pieces.
@@ -36,7 +95,7 @@ class Square:
         Returns:
             bool: True if the square has pieces.
         """
-        return len(self.pieces) > 0
+        return bool(self.single_colors | self.tied_colors)
 
     def isempty(self) -> bool:
         """Check if the square is empty.
@@ -44,7 +103,7 @@ class Square:
         Returns:
             bool: True if the square is empty.
         """
-        return not self.has_pieces()
+        return not (self.single_colors | self.tied_colors)
 
     def has_team_piece(self, color: PieceColor) -> bool:
         """Check if the square has a piece of the given color.
@@ -52,11 +111,7 @@ class Square:
         Returns:
             bool: True if the square has a piece of the given color.
         """
-        if self.has_pieces():
-            for piece in self.pieces:
-                if piece.color == color:
-                    return True
-        return False
+        return bool((self.single_colors | self.tied_colors) & COLOR_BITS[color])
 
     def has_single_team_piece(self, color: PieceColor) -> bool:
         """Check if the square has a single (as in not a TiedPiece, not one) piece
@@ -66,11 +121,7 @@ class Square:
             bool: True if the square has a single (as in not a TiedPiece, not one)
             piece of the given color.
         """
-        if self.has_pieces():
-            for piece in self.pieces:
-                if piece.color == color and piece.name == "Piece":
-                    return True
-        return False
+        return bool(self.single_colors & COLOR_BITS[color])
 
     def get_other_single_team_piece(self, piece: Piece) -> bool | None:
         """If the square has a single (as in not a TiedPiece, not one) piece
@@ -80,7 +131,7 @@ class Square:
             bool | None: Return the piece on the square of the same color as the given piece.
             If none present, return None.
         """
-        if self.has_pieces():
+        if self.single_colors & COLOR_BITS[piece.color]:
             for other_piece in self.pieces:
                 if (
                     other_piece.color == piece.color
@@ -99,11 +150,7 @@ class Square:
         Returns:
             bool: True if the square has an enemy piece.
         """
-        if self.has_pieces():
-            for piece in self.pieces:
-                if piece.color != color:
-                    return True
-        return False
+        return bool((self.single_colors | self.tied_colors) & ~COLOR_BITS[color])
 
     def has_enemy_tied_piece(self, color: PieceColor) -> bool:
         """Check whether the square has a TiedPiece belonging to an enemy player.
@@ -114,17 +161,15 @@ class Square:
         Returns:
             bool: True if the square has an enemy TiedPiece.
         """
-        if self.has_pieces():
-            for piece in self.pieces:
-                if piece.color != color and piece.name == "TiedPiece":
-                    return True
-        return False
+        return bool(self.tied_colors & ~COLOR_BITS[color])
 
     def get_enemy_pieces(self, color: PieceColor) -> List[Piece | TiedPiece]:
         """Return the enemy pieces.
         Returns:
             List[Piece | TiedPiece]: The list of enemy pieces.
         """
+        if not (self.single_colors | self.tied_colors) & ~COLOR_BITS[color]:
+            return []
         return [piece for piece in self.pieces if piece.color != color]
 
     def isempty_or_enemy(self, color: PieceColor) -> bool:
@@ -133,15 +178,61 @@ class Square:
         Returns:
             bool: True if the square is either empty or has enemy pieces.
         """
-        return self.isempty() or self.has_enemy_piece(color)
+        colors = self.single_colors | self.tied_colors
+        return not colors or bool(colors & ~COLOR_BITS[color])
 
-    def add_piece(self, piece: Piece | TiedPiece):
-        """Add a piece to the square's pieces list."""
-        self.pieces.append(piece)
+    def add_piece(self, piece: Piece | TiedPiece, index: Optional[int] = None):
+        """Add a piece to the square's pieces list.
+
+        Args:
+            piece (Piece | TiedPiece): The piece to add.
+            index (Optional[int], optional): The index to insert the piece at.
+                Defaults to None, which appends the piece.
+        """
+        if index is None:
+            self.pieces.append(piece)
+        else:
+            self.pieces.insert(index, piece)
+        self._count(piece, 1)
 
     def remove_piece(self, piece: Piece | TiedPiece):
         """Remove a piece from the square's pieces list."""
         self.pieces.remove(piece)
+        self._count(piece, -1)
+
+    def attach(self, bitboards: Bitboards):
+        """Set the bits of the square in the masks of a board and keep them up to
+        date from now on.
+
+        Args:
+            bitboards (Bitboards): The masks of the board.
+        """
+        self.bitboards = bitboards
+        for color in PieceColor:
+            color_bit = 1 << color.value
+            if self.single_colors & color_bit:
+                bitboards.single[color.value] |= self.bit
+            if self.tied_colors & color_bit:
+                bitboards.tied[color.value] |= self.bit
+
+    def _count(self, piece: Piece | TiedPiece, delta: int):
+        """Count a piece that arrived on (delta 1) or left (delta -1) the square,
+        flipping the bits of its color when it is the first or last of its kind.
+        """
+        if self._counts is None:
+            self._counts = [0] * (2 * COLORS)
+        tied = piece.name == "TiedPiece"
+        slot = 2 * piece.color_index + tied
+        count = self._counts[slot] + delta
+        self._counts[slot] = count
+        if count == 0 or (count == 1 and delta == 1):
+            color_bit = 1 << piece.color_index
+            if tied:
+                self.tied_colors ^= color_bit
+            else:
+                self.single_colors ^= color_bit
+            if self.bitboards is not None:
+                self.bitboards.toggle(tied, piece.color_index, self.bit)
 
     @staticmethod
     def get_alphacol(col: int) -> str:
@@ -0,0 +1,110 @@
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+import pygame
+
+from constants import IMG_CENTERS, SQSIZE
+from piece import Piece, TiedPiece
+from textures import TextureCache
+
+# The content signature of a square: the (color, is TiedPiece) pair of every
+# piece in the square's order, with None in place of a piece that is not drawn.
+Signature = Tuple[Optional[Tuple[str, bool]], ...]
+
+
+class StackSpriteCache:
+    """A least recently used cache of composited square sprites. A sprite holds
+    all the pieces of a square drawn at their :py:data:`src.constants.IMG_CENTERS`
+    positions, so that an unchanged square costs a single blit however many pieces
+    it holds.
+
+    Args:
+        textures (TextureCache): The cache to take the piece textures from.
+        maxsize (int, optional): The maximum number of sprites to keep.
+            Defaults to 256.
+    """
+
+    def __init__(self, textures: TextureCache, maxsize: int = 256):
+        self.textures = textures
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._sprites: OrderedDict[
+            Signature, Tuple[pygame.Surface, List[pygame.Rect]]
+        ] = OrderedDict()
+
+    @staticmethod
+    def signature(
+        pieces: List[Piece | TiedPiece], skip: Optional[Piece] = None
+    ) -> Signature:
+        """Return the content signature of a square holding the given pieces.
+
+        Args:
+            pieces (List[Piece | TiedPiece]): The pieces on the square.
+            skip (Optional[Piece], optional): A piece that is not to be drawn,
+                e.g. the piece being dragged. Defaults to None.
+
+        Returns:
+            Signature: The content signature.
+        """
+        return tuple(
+            None if piece is skip else (piece.color, piece.name == "TiedPiece")
+            for piece in pieces
+        )
+
+    def get(
+        self, pieces: List[Piece | TiedPiece], skip: Optional[Piece] = None
+    ) -> Tuple[pygame.Surface, List[pygame.Rect]]:
+        """Return the sprite of a square holding the given pieces along with the
+        rect of every piece relative to the square's top left corner.
+
+        Args:
+            pieces (List[Piece | TiedPiece]): The pieces on the square.
+            skip (Optional[Piece], optional): A piece that is not to be drawn,
+                e.g. the piece being dragged. Defaults to None.
+
+        Returns:
+            Tuple[pygame.Surface, List[pygame.Rect]]: The sprite and the rects of
+            the pieces.
+        """
+        key = self.signature(pieces, skip)
+        sprite = self._sprites.get(key)
+        if sprite is not None:
+            self.hits += 1
+            self._sprites.move_to_end(key)
+            return sprite
+        self.misses += 1
+        sprite = self._sprites[key] = self._composite(pieces, skip)
+        if len(self._sprites) > self.maxsize:
+            self._sprites.popitem(last=False)
+        return sprite
+
+    def clear(self):
+        """Drop every cached sprite and reset the counters."""
+        self._sprites.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def _composite(
+        self, pieces: List[Piece | TiedPiece], skip: Optional[Piece]
+    ) -> Tuple[pygame.Surface, List[pygame.Rect]]:
+        """Draw the pieces of a square on a new sprite.
+
+        Args:
+            pieces (List[Piece | TiedPiece]): The pieces on the square.
+            skip (Optional[Piece]): A piece that is not to be drawn.
+
+        Returns:
+            Tuple[pygame.Surface, List[pygame.Rect]]: The sprite and the rects of
+            the pieces.
+        """
+        sprite = pygame.Surface((SQSIZE, SQSIZE), pygame.SRCALPHA)
+        if pygame.display.get_surface() is not None:
+            sprite = sprite.convert_alpha()
+        rects = []
+        for piece_idx, piece in enumerate(pieces):
+            img = self.textures.get(piece, size=80, count=len(pieces))
+            rect = img.get_rect(center=IMG_CENTERS[len(pieces)][piece_idx])
+            if piece is not skip:
+                sprite.blit(img, rect)
+            rects.append(rect)
+        return sprite, rects
@@ -0,0 +1,162 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, List, Optional
+import numpy as np
+
+from constants import GRID_OFFSET, PIECES_PER_PLAYER, ROLL_VALUES
+from piece import PieceColor
+
+if TYPE_CHECKING:
+    from board import Board
+
+_TO_MOVE = 0
+_CAPTURED = 1
+_ROLL = 2
+_POSITIONS = _ROLL + len(ROLL_VALUES)
+
+
+class BoardState:
+    """A compact snapshot of a board position, held in a single small ``int16``
+    array so that it can be copied, compared and hashed cheaply.
+
+    The array holds, in order:
+        - the index of the player to move,
+        - the players' capture flags as a bitmask,
+        - the pending roll as a count per value of
+          :py:data:`src.constants.ROLL_VALUES`,
+        - the path alias (0 to PLACES_TO_FRUIT) of every piece of every player,
+        - the slot of the piece each piece is tied with, or -1,
+        - whether each piece is held by an enemy TiedPiece.
+
+    The pieces of a player are sorted by path alias, so equal positions have
+    equal arrays. Use :py:meth:`src.board.Board.to_state` and
+    :py:meth:`src.board.Board.from_state` to convert to and from a Board.
+
+    Args:
+        players (List[PieceColor]): The players of the game.
+        data (np.ndarray, optional): The underlying array. Defaults to the array
+            of an empty state.
+    """
+
+    __slots__ = ("players", "data")
+
+    def __init__(self, players: List[PieceColor], data: Optional[np.ndarray] = None):
+        self.players = players
+        if data is None:
+            data = np.zeros(
+                _POSITIONS + 3 * len(players) * PIECES_PER_PLAYER, dtype=np.int16
+            )
+        self.data = data
+
+    @property
+    def to_move(self) -> int:
+        """The index of the player to move."""
+        return int(self.data[_TO_MOVE])
+
+    @property
+    def captured(self) -> np.ndarray:
+        """The capture flag of every player."""
+        return (self.data[_CAPTURED] >> np.arange(len(self.players))) & 1 == 1
+
+    @property
+    def roll_counts(self) -> np.ndarray:
+        """The number of times each of ROLL_VALUES is in the pending roll."""
+        return self.data[_ROLL:_POSITIONS]
+
+    @property
+    def positions(self) -> np.ndarray:
+        """The path alias of every piece, as a players x PIECES_PER_PLAYER array."""
+        return self._block(0)
+
+    @property
+    def tied(self) -> np.ndarray:
+        """The slot of the piece each piece is tied with, or -1, as a
+        players x PIECES_PER_PLAYER array."""
+        return self._block(1)
+
+    @property
+    def pinned(self) -> np.ndarray:
+        """Whether each piece shares its square with an enemy TiedPiece, as a
+        players x PIECES_PER_PLAYER array."""
+        return self._block(2)
+
+    @property
+    def roll(self) -> List[int]:
+        """The pending roll as a list of values."""
+        return [
+            value
+            for value, count in zip(ROLL_VALUES, self.roll_counts.tolist())
+            for _ in range(count)
+        ]
+
+    def _block(self, idx: int) -> np.ndarray:
+        """Return a players x PIECES_PER_PLAYER view of the idx-th piece block."""
+        size = len(self.players) * PIECES_PER_PLAYER
+        start = _POSITIONS + idx * size
+        return self.data[start : start + size].reshape(
+            len(self.players), PIECES_PER_PLAYER
+        )
+
+    def copy(self) -> BoardState:
+        """Return a copy of the state."""
+        return BoardState(self.players, self.data.copy())
+
+    @classmethod
+    def from_board(cls, board: Board, to_move: PieceColor) -> BoardState:
+        """Take a snapshot of the given board.
+
+        Args:
+            board (Board): The board to take the snapshot of.
+            to_move (PieceColor): The player to move.
+
+        Returns:
+            BoardState: The snapshot.
+        """
+        state = cls(board.players)
+        data = state.data
+        data[_TO_MOVE] = board.players.index(to_move)
+        data[_CAPTURED] = sum(
+            1 << idx
+            for idx, player in enumerate(board.players)
+            if board.player_captured_flags[player]
+        )
+        for value in board.roll or []:
+            data[_ROLL + ROLL_VALUES.index(value)] += 1
+
+        entries = {player: [] for player in board.players}
+        for row in board.squares:
+            for square in row:
+                for piece in square.pieces:
+                    alias = (
+                        board.get_row_col_to_alias(piece.color, square.row, square.col)
+                        % GRID_OFFSET
+                    )
+                    if piece.name == "TiedPiece":
+                        entries[piece.color] += [(alias, 1, 0), (alias, 1, 0)]
+                    else:
+                        entries[piece.color].append(
+                            (alias, 0, int(piece.with_enemy_tied_piece))
+                        )
+
+        positions, tied, pinned = state.positions, state.tied, state.pinned
+        for idx, player in enumerate(board.players):
+            tied[idx] = -1
+            for slot, (alias, is_tied, is_pinned) in enumerate(sorted(entries[player])):
+                positions[idx, slot] = alias
+                pinned[idx, slot] = is_pinned
+                if is_tied and tied[idx, slot] == -1:
+                    # Tied slots of the same alias are adjacent after sorting.
+                    tied[idx, slot] = slot + 1
+                    tied[idx, slot + 1] = slot
+        return state
+
+    def __eq__(self, other) -> bool:
+        return self.players == other.players and np.array_equal(self.data, other.data)
+
+    def __hash__(self) -> int:
+        return hash(self.data.tobytes())
+
+    def __repr__(self) -> str:
+        return (
+            f"BoardState(to_move={self.to_move}, roll={self.roll}, "
+            f"positions={self.positions.tolist()}, tied={self.tied.tolist()})"
+        )
@@ -0,0 +1,721 @@
+import argparse
+import hashlib
+import os
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import combinations, combinations_with_replacement
+from math import comb
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+from board import Board
+from constants import (
+    GRID_OFFSET,
+    PIECES_PER_PLAYER,
+    PLACES_BEFORE_INNER,
+    PLACES_TO_FRUIT,
+    REROLL_VALUES,
+    ROLL_VALUES,
+    ROLL_WEIGHTS,
+    RULE_VERSION,
+    SAFE_HOUSES,
+)
+from move import LegalMove
+from paths import get_path_tables
+from piece import PieceColor
+from rolls import get_roll_distribution
+
+# The first bytes of a tablebase file, followed by the rest of the header.
+MAGIC = b"CBTB"
+FORMAT_VERSION = 1
+# magic, format version, rule version, rule fingerprint, roll mass, number of
+# positions, number of layers solved, padded to HEADER_SIZE bytes.
+HEADER = struct.Struct("<4sHHQdQQ")
+HEADER_SIZE = 64
+
+# A race position is the sorted codes of the pieces of a player. A single piece
+# at place k past the outer loop (k = 0 is the first inner square and FRUIT the
+# fruit square) has code k, and both pieces of a TiedPiece at place k have code
+# TIED + k.
+FRUIT = PLACES_TO_FRUIT - PLACES_BEFORE_INNER - 1
+TIED = FRUIT + 1
+# The most places the pieces of a position have covered together.
+MAX_PROGRESS = PIECES_PER_PLAYER * FRUIT
+# The largest move, in places covered by the pieces.
+MAX_STEP = max(ROLL_VALUES)
+
+# The moves tried from a position: every single piece, then every pair of
+# pieces, which is a TiedPiece or two single pieces that can be tied.
+MOVES = PIECES_PER_PLAYER + PIECES_PER_PLAYER - 1
+
+# The stored best move of a position when a single roll value is left: the code
+# of the piece to move, with TYING_FLAG set for a tying move, or NO_MOVE.
+TYING_FLAG = 0x80
+NO_MOVE = 0xFF
+
+_BINOMIALS = np.array(
+    [[comb(n, k) for k in range(PIECES_PER_PLAYER + 1)] for n in range(2 * TIED)],
+    dtype=np.int64,
+)
+
+
+class TablebaseError(Exception):
+    """Raised when a tablebase file is malformed, incomplete or was built for
+    other rules."""
+
+
+def _safe_places() -> Tuple[int, ...]:
+    """Return the places past the outer loop that are safe houses. The grids of
+    all players are rotations of each other, so they are the same for every
+    player."""
+    grid = get_path_tables(1).grids[0]
+    return tuple(
+        sorted(
+            int(grid[row][col]) - PLACES_BEFORE_INNER - 1
+            for row, col in SAFE_HOUSES
+            if grid[row][col] > PLACES_BEFORE_INNER
+        )
+    )
+
+
+SAFE_PLACES = _safe_places()
+_SAFE = np.zeros(TIED + 1, dtype=bool)
+_SAFE[list(SAFE_PLACES)] = True
+
+
+def rule_fingerprint(mass: float) -> int:
+    """Return a fingerprint of the rules a tablebase depends on, so that a file
+    built for other rules is never used.
+
+    Args:
+        mass (float): The probability mass of the roll distribution.
+
+    Returns:
+        int: A 64 bit fingerprint.
+    """
+    rules = (
+        RULE_VERSION,
+        PIECES_PER_PLAYER,
+        PLACES_BEFORE_INNER,
+        PLACES_TO_FRUIT,
+        ROLL_VALUES,
+        ROLL_WEIGHTS,
+        REROLL_VALUES,
+        SAFE_PLACES,
+        mass,
+    )
+    digest = hashlib.blake2b(repr(rules).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def _block_sizes() -> List[Tuple[int, int, int]]:
+    """Return (number of TiedPieces, number of single pieces, number of
+    positions) for every block of positions with the same number of TiedPieces.
+    """
+    sizes = []
+    for tied in range(PIECES_PER_PLAYER // 2 + 1):
+        singles = PIECES_PER_PLAYER - 2 * tied
+        sizes.append(
+            (
+                tied,
+                singles,
+                comb(TIED + singles - 1, singles) * comb(FRUIT + tied - 1, tied),
+            )
+        )
+    return sizes
+
+
+_BLOCKS = _block_sizes()
+_BLOCK_OFFSETS = np.cumsum([0] + [size for _, _, size in _BLOCKS])
+POSITIONS = int(_BLOCK_OFFSETS[-1])
+
+
+def race_index(codes: np.ndarray) -> np.ndarray:
+    """Return the index in the tablebase of every given race position.
+
+    Positions are grouped in blocks by their number of TiedPieces. Within a
+    block, the multisets of the places of the single pieces and of the
+    TiedPieces are ranked with the combinatorial number system.
+
+    Args:
+        codes (np.ndarray): A positions x PIECES_PER_PLAYER array of the sorted
+            codes of every position.
+
+    Returns:
+        np.ndarray: The indices.
+    """
+    codes = codes.astype(np.int64)
+    ties = (codes >= TIED).sum(axis=1) // 2
+    index = np.zeros(len(codes), dtype=np.int64)
+    for tied, singles, _ in _BLOCKS:
+        rows = ties == tied
+        if not rows.any():
+            continue
+        block = codes[rows]
+        single_rank = np.zeros(len(block), dtype=np.int64)
+        for idx in range(singles):
+            single_rank += _BINOMIALS[block[:, idx] + idx, idx + 1]
+        tied_rank = np.zeros(len(block), dtype=np.int64)
+        for idx in range(tied):
+            tied_rank += _BINOMIALS[block[:, singles + 2 * idx] - TIED + idx, idx + 1]
+        index[rows] = (
+            _BLOCK_OFFSETS[tied]
+            + tied_rank * comb(TIED + singles - 1, singles)
+            + single_rank
+        )
+    return index
+
+
+def progress(codes: np.ndarray) -> np.ndarray:
+    """Return the number of places the pieces of every given race position have
+    covered past the outer loop. Every move adds its roll value to it."""
+    codes = codes.astype(np.int64)
+    return np.where(codes >= TIED, codes - TIED, codes).sum(axis=1)
+
+
+def successors(codes: np.ndarray, value: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the positions reached from the given race positions by every move
+    with the given roll value.
+
+    The moves follow :py:meth:`src.board.Board.legal_moves` without opponents:
+    a single piece moves value places if it does not overshoot the fruit, a
+    TiedPiece moves value // 2 places on even values, and two single pieces on
+    a square that is not a safe house are tied on a 2 if the next square is not
+    a safe house either.
+
+    Args:
+        codes (np.ndarray): A positions x PIECES_PER_PLAYER array of sorted codes.
+        value (int): The roll value.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The positions x MOVES x PIECES_PER_PLAYER
+        sorted codes after every move, and a positions x MOVES mask of the legal
+        moves.
+    """
+    count = len(codes)
+    after = np.repeat(codes[:, None, :], MOVES, axis=1).astype(np.int8)
+    legal = np.zeros((count, MOVES), dtype=bool)
+    for idx in range(PIECES_PER_PLAYER):
+        legal[:, idx] = codes[:, idx] + value <= FRUIT
+        after[:, idx, idx] += value
+    for idx in range(PIECES_PER_PLAYER - 1):
+        move = PIECES_PER_PLAYER + idx
+        first, second = codes[:, idx], codes[:, idx + 1]
+        pair = first == second
+        if value % 2 == 0:
+            place = first.astype(np.int64) - TIED + value // 2
+            tied = pair & (first >= TIED) & (place <= FRUIT)
+            code = np.where(place == FRUIT, FRUIT, place + TIED)
+            legal[:, move] |= tied
+            after[tied, move, idx] = code[tied]
+            after[tied, move, idx + 1] = code[tied]
+        if value == 2:
+            place = np.minimum(first.astype(np.int64), FRUIT)
+            tying = pair & (first < FRUIT - 1) & ~_SAFE[place] & ~_SAFE[place + 1]
+            legal[:, move] |= tying
+            after[tying, move, idx] = first[tying] + 1 + TIED
+            after[tying, move, idx + 1] = first[tying] + 1 + TIED
+    after.sort(axis=2)
+    return after, legal
+
+
+@lru_cache(maxsize=None)
+def _positions() -> np.ndarray:
+    """Return the codes of every race position, in index order."""
+    blocks = []
+    for tied, singles, _ in _BLOCKS:
+        single_places = np.array(
+            list(combinations_with_replacement(range(TIED), singles)), dtype=np.int8
+        ).reshape(comb(TIED + singles - 1, singles), singles)
+        tied_places = np.array(
+            list(combinations_with_replacement(range(FRUIT), tied)), dtype=np.int8
+        ).reshape(comb(FRUIT + tied - 1, tied), tied)
+        block = np.concatenate(
+            [
+                np.repeat(single_places[None], len(tied_places), axis=0),
+                np.repeat(
+                    np.repeat(tied_places + TIED, 2, axis=1)[:, None],
+                    len(single_places),
+                    axis=1,
+                ),
+            ],
+            axis=2,
+        ).reshape(-1, PIECES_PER_PLAYER)
+        blocks.append(block)
+    codes = np.concatenate(blocks)
+    order = np.empty(len(codes), dtype=np.int64)
+    order[race_index(codes)] = np.arange(len(codes))
+    return codes[order]
+
+
+@lru_cache(maxsize=None)
+def _layers() -> Tuple[np.ndarray, ...]:
+    """Return the sorted indices of the race positions of every progress."""
+    layer_of = progress(_positions())
+    order = np.argsort(layer_of, kind="stable")
+    bounds = np.searchsorted(layer_of[order], np.arange(MAX_PROGRESS + 2))
+    return tuple(
+        order[bounds[idx] : bounds[idx + 1]] for idx in range(MAX_PROGRESS + 1)
+    )
+
+
+@lru_cache(maxsize=None)
+def _sub_rolls(
+    mass: float,
+) -> Tuple[Tuple[Tuple[int, ...], ...], np.ndarray, np.ndarray, Dict[tuple, int]]:
+    """Return every roll that can be left of a roll of the distribution during a
+    turn (the empty roll first), the indices and probabilities of the full
+    rolls, and the index of every roll."""
+    distribution = get_roll_distribution(mass)
+    left = {()}
+    for roll in distribution.rolls:
+        for size in range(1, len(roll) + 1):
+            left.update(combinations(roll, size))
+    rolls = tuple(sorted(left, key=lambda roll: (len(roll), roll)))
+    index = {roll: idx for idx, roll in enumerate(rolls)}
+    full = np.array([index[roll] for roll in distribution.rolls], dtype=np.int64)
+    return rolls, full, distribution.normalized(), index
+
+
+def _window_shape(mass: float) -> Tuple[int, int, int]:
+    """Return the shape of the window of the values of the layers the next layer
+    moves to: MAX_STEP layers and the one being solved, of the largest layer's
+    size, by the number of rolls left."""
+    return (
+        MAX_STEP + 1,
+        max(len(layer) for layer in _layers()),
+        len(_sub_rolls(mass)[0]),
+    )
+
+
+def _solve_chunk(
+    window_path: str, mass: float, layer: int, start: int, stop: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Solve a chunk of the positions of a layer, in a worker process.
+
+    The value of a position with a roll left is the fewest expected turns to
+    finish from it after playing the roll: the value of the position itself
+    (the expected turns from the start of a turn) when no move is possible and
+    otherwise the best of the values of the moves, which lead to the layers
+    solved before. Rolls that give no move at all leave the position as it was,
+    so its expected turns E solve E = 1 + sum(p * value) with E on both sides.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: The expected turns, the best
+        moves of the single roll values and the values with every roll left of
+        the positions of the chunk.
+    """
+    rolls, full, probabilities, roll_index = _sub_rolls(mass)
+    layers = _layers()
+    indices = layers[layer][start:stop]
+    codes = _positions()[indices]
+    count = len(codes)
+    window = np.memmap(
+        window_path, dtype=np.float32, mode="r", shape=_window_shape(mass)
+    )
+
+    best = {}
+    first_moves = {}
+    for value in set(ROLL_VALUES):
+        target = layer + value
+        values = np.full((count, MOVES, len(rolls)), np.inf, dtype=np.float32)
+        if target <= MAX_PROGRESS:
+            after, legal = successors(codes, value)
+            rows = np.searchsorted(layers[target], race_index(after[legal]))
+            values[legal] = window[target % len(window), rows]
+        best[value] = values.min(axis=1)
+        first_moves[value] = np.where(
+            np.isfinite(values[:, :, 0]).any(axis=1), values[:, :, 0].argmin(axis=1), -1
+        )
+
+    played = np.full((count, len(rolls)), np.inf, dtype=np.float64)
+    for idx, roll in enumerate(rolls[1:], start=1):
+        for value in set(roll):
+            rest = list(roll)
+            rest.remove(value)
+            np.minimum(
+                played[:, idx],
+                best[value][:, roll_index[tuple(rest)]],
+                out=played[:, idx],
+            )
+
+    finished = (codes == FRUIT).all(axis=1)
+    movable = np.isfinite(played[:, full])
+    stuck = (probabilities * ~movable).sum(axis=1)
+    gained = (probabilities * np.where(movable, played[:, full], 0.0)).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        expected = np.where(finished, 0.0, (1.0 + gained) / (1.0 - stuck))
+    played[:, 0] = expected
+    played = np.where(np.isfinite(played), played, expected[:, None])
+    played[finished] = 0.0
+
+    choices = np.full((count, len(ROLL_VALUES)), NO_MOVE, dtype=np.uint8)
+    rows = np.arange(count)
+    for column, value in enumerate(ROLL_VALUES):
+        move = first_moves[value]
+        found = move >= 0
+        piece = np.minimum(move, PIECES_PER_PLAYER - 1)
+        pair = move >= PIECES_PER_PLAYER
+        piece = np.where(pair, move - PIECES_PER_PLAYER, piece)
+        code = codes[rows, piece].astype(np.uint8)
+        code = np.where(pair & (code < TIED), code | TYING_FLAG, code)
+        choices[found, column] = code[found]
+    return expected.astype(np.float32), choices, played.astype(np.float32)
+
+
+class RaceTablebase:
+    """The solved races of a player whose pieces are all past the outer loop, for
+    bots and hints.
+
+    A race tablebase file holds a header, the expected number of turns to
+    finish of every race position (float32) and the best move of every position
+    for every single roll value left (uint8, see TYING_FLAG and NO_MOVE), in
+    the order of :py:func:`race_index`. It is memory-mapped, so opening it is
+    instant and only the looked up pages are read.
+
+    Build the file with :py:func:`generate`.
+
+    Args:
+        path (str): The path of the file.
+
+    Raises:
+        TablebaseError: If the file is not a complete tablebase for the current
+            rules.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as stream:
+            header = stream.read(HEADER_SIZE)
+        if len(header) < HEADER_SIZE:
+            raise TablebaseError("Not a tablebase file.")
+        (
+            magic,
+            version,
+            rule_version,
+            fingerprint,
+            mass,
+            positions,
+            layers,
+        ) = HEADER.unpack_from(header)
+        if magic != MAGIC:
+            raise TablebaseError("Not a tablebase file.")
+        if version != FORMAT_VERSION:
+            raise TablebaseError(f"Unsupported format version {version}.")
+        if rule_version != RULE_VERSION or fingerprint != rule_fingerprint(mass):
+            raise TablebaseError("The tablebase was built for other rules.")
+        if positions != POSITIONS or layers != MAX_PROGRESS + 1:
+            raise TablebaseError("The tablebase is incomplete.")
+        self.mass = mass
+        self.expected, self.choices = _map(path, "r")
+
+    @staticmethod
+    def is_race(board: Board, player: PieceColor) -> bool:
+        """Check whether the given player is in a race: all of its pieces are past
+        the outer loop and no opponent can reach the inner squares, neither now nor
+        later. An opponent reaches them by capturing a piece, so none may have
+        captured one, and no two opponents may have pieces left on the outer loop
+        or at home, where they could capture each other.
+
+        Args:
+            board (Board): The board.
+            player (PieceColor): The player.
+
+        Returns:
+            bool: Whether the player is in a race.
+        """
+        opponents = [color for color in board.players if color != player]
+        if any(board.player_captured_flags[color] for color in opponents):
+            return False
+        if (
+            sum(
+                board.at_home[color] + board.on_outer_loop[color] > 0
+                for color in opponents
+            )
+            > 1
+        ):
+            return False
+        return race_codes(board, player) is not None
+
+    def expected_turns(self, board: Board, player: PieceColor) -> Optional[float]:
+        """Return the expected number of turns the given player needs to finish,
+        from the start of its turn, if it is in a race.
+
+        Args:
+            board (Board): The board.
+            player (PieceColor): The player.
+
+        Returns:
+            Optional[float]: The expected turns, or None if it is not in a race.
+        """
+        if not self.is_race(board, player):
+            return None
+        return float(self.expected[race_index(race_codes(board, player)[None])[0]])
+
+    def best_move(self, board: Board, player: PieceColor) -> Optional[LegalMove]:
+        """Return the best move of the given player with its current roll if it is
+        in a race: the first move of the play of the roll that leaves the position
+        with the fewest expected turns. A single roll value is answered from the
+        stored best moves; longer rolls look up the positions their plays reach.
+
+        Args:
+            board (Board): The board.
+            player (PieceColor): The player.
+
+        Returns:
+            Optional[LegalMove]: The move, or None if the player is not in a race
+            or cannot move.
+        """
+        if not board.roll or not self.is_race(board, player):
+            return None
+        codes = race_codes(board, player)
+        roll = tuple(sorted(board.roll))
+        if len(roll) == 1:
+            choice = int(
+                self.choices[race_index(codes[None])[0], ROLL_VALUES.index(roll[0])]
+            )
+            if choice == NO_MOVE:
+                return None
+            return self._legal_move(board, player, roll[0], choice)
+        _, value, choice = self._play(codes, roll, {})
+        if choice is None:
+            return None
+        return self._legal_move(board, player, value, choice)
+
+    def _play(
+        self, codes: np.ndarray, roll: Tuple[int, ...], seen: dict
+    ) -> Tuple[float, Optional[int], Optional[int]]:
+        """Return the fewest expected turns after playing the roll from the
+        position, with the roll value and the stored code of its first move."""
+        key = (codes.tobytes(), roll)
+        if key in seen:
+            return seen[key]
+        result = (float(self.expected[race_index(codes[None])[0]]), None, None)
+        if (codes == FRUIT).all():
+            result = (0.0, None, None)
+        else:
+            found = False
+            for value in sorted(set(roll)):
+                after, legal = successors(codes[None], value)
+                rest = list(roll)
+                rest.remove(value)
+                for move in np.flatnonzero(legal[0]):
+                    turns, _, _ = self._play(after[0, move], tuple(rest), seen)
+                    if not found or turns < result[0]:
+                        found = True
+                        if move < PIECES_PER_PLAYER:
+                            choice = int(codes[move])
+                        else:
+                            choice = int(codes[move - PIECES_PER_PLAYER])
+                            if choice < TIED:
+                                choice |= TYING_FLAG
+                        result = (turns, value, choice)
+        seen[key] = result
+        return result
+
+    @staticmethod
+    def _legal_move(
+        board: Board, player: PieceColor, value: int, choice: int
+    ) -> Optional[LegalMove]:
+        """Return the legal move of the board that moves the piece of the given
+        code with the given roll value."""
+        tying = bool(choice & TYING_FLAG)
+        code = choice & ~TYING_FLAG
+        tied = code >= TIED
+        place = (code - TIED if tied else code) + PLACES_BEFORE_INNER + 1
+        for legal_move in board.legal_moves(player):
+            if (
+                legal_move.roll == value
+                and legal_move.piece.position % GRID_OFFSET == place
+                and (legal_move.piece.name == "TiedPiece") == tied
+                and bool(legal_move.move.tying_move) == tying
+            ):
+                return legal_move
+        return None
+
+    def close(self):
+        """Release the memory maps of the file."""
+        self.expected = self.choices = None
+
+
+def race_codes(board: Board, player: PieceColor) -> Optional[np.ndarray]:
+    """Return the sorted codes of the race position of the given player, see FRUIT
+    and TIED.
+
+    Args:
+        board (Board): The board.
+        player (PieceColor): The player.
+
+    Returns:
+        Optional[np.ndarray]: The codes, or None if a piece of the player is still
+        on the outer loop.
+    """
+    codes = []
+    for row in board.squares:
+        for square in row:
+            for piece in square.pieces:
+                if piece.color != player:
+                    continue
+                place = piece.position % GRID_OFFSET - PLACES_BEFORE_INNER - 1
+                if place < 0:
+                    return None
+                if piece.name == "TiedPiece":
+                    codes += [FRUIT if place == FRUIT else TIED + place] * 2
+                else:
+                    codes.append(place)
+    return np.array(sorted(codes), dtype=np.int8)
+
+
+def _map(path: str, mode: str) -> Tuple[np.memmap, np.memmap]:
+    """Memory-map the expected turns and the best moves of a tablebase file."""
+    expected = np.memmap(
+        path, dtype=np.float32, mode=mode, offset=HEADER_SIZE, shape=(POSITIONS,)
+    )
+    choices = np.memmap(
+        path,
+        dtype=np.uint8,
+        mode=mode,
+        offset=HEADER_SIZE + 4 * POSITIONS,
+        shape=(POSITIONS, len(ROLL_VALUES)),
+    )
+    return expected, choices
+
+
+def _write_header(path: str, mass: float, layers: int):
+    """Write the header of a tablebase file with the given number of solved
+    layers."""
+    header = HEADER.pack(
+        MAGIC,
+        FORMAT_VERSION,
+        RULE_VERSION,
+        rule_fingerprint(mass),
+        mass,
+        POSITIONS,
+        layers,
+    )
+    with open(path, "r+b") as stream:
+        stream.write(header.ljust(HEADER_SIZE, b"\0"))
+
+
+def _solved_layers(path: str, mass: float) -> int:
+    """Return the number of layers already solved in the file at the given path
+    for the current rules, or 0 if there is none."""
+    try:
+        with open(path, "rb") as stream:
+            header = stream.read(HEADER_SIZE)
+        fields = HEADER.unpack_from(header)
+    except (OSError, struct.error):
+        return 0
+    magic, version, rule_version, fingerprint, _, positions, layers = fields
+    if (
+        magic != MAGIC
+        or version != FORMAT_VERSION
+        or rule_version != RULE_VERSION
+        or fingerprint != rule_fingerprint(mass)
+        or positions != POSITIONS
+    ):
+        return 0
+    return layers
+
+
+def generate(
+    path: str,
+    mass: float = 0.999,
+    workers: Optional[int] = None,
+    chunk_size: int = 4096,
+    verbose: bool = False,
+) -> RaceTablebase:
+    """Solve every race position and write the tablebase to a file.
+
+    The positions are solved in layers of the same progress, from the finished
+    position down, since every move leads to a layer solved before. The positions
+    of a layer are split into chunks solved in a pool of worker processes. The
+    values the next layers need are kept in a window file next to the tablebase,
+    so that an interrupted build resumes at the first layer not solved yet; a
+    file built for other rules is rebuilt from scratch.
+
+    Args:
+        path (str): The path of the file.
+        mass (float, optional): The probability mass of the rolls considered, see
+            :py:func:`src.rolls.get_roll_distribution`. Defaults to 0.999.
+        workers (Optional[int], optional): The number of worker processes. 1
+            solves the layers in this process. Defaults to the number of CPUs.
+        chunk_size (int, optional): The number of positions of a chunk. Defaults
+            to 4096.
+        verbose (bool, optional): Whether to print the progress. Defaults to False.
+
+    Returns:
+        RaceTablebase: The tablebase.
+    """
+    workers = workers or os.cpu_count() or 1
+    window_path = path + ".window"
+    solved = _solved_layers(path, mass)
+    if 0 < solved <= MAX_PROGRESS and not os.path.exists(window_path):
+        solved = 0
+    if solved == 0:
+        with open(path, "wb") as stream:
+            stream.truncate(HEADER_SIZE + (4 + len(ROLL_VALUES)) * POSITIONS)
+        _write_header(path, mass, 0)
+        np.memmap(window_path, dtype=np.float32, mode="w+", shape=_window_shape(mass))
+
+    if solved <= MAX_PROGRESS:
+        expected, choices = _map(path, "r+")
+        window = np.memmap(
+            window_path, dtype=np.float32, mode="r+", shape=_window_shape(mass)
+        )
+        layers = _layers()
+        executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        try:
+            for layer in range(MAX_PROGRESS - solved, -1, -1):
+                start = time.perf_counter()
+                indices = layers[layer]
+                chunks = [
+                    (first, min(first + chunk_size, len(indices)))
+                    for first in range(0, len(indices), chunk_size)
+                ]
+                args = [(window_path, mass, layer, *chunk) for chunk in chunks]
+                if executor is None:
+                    results = [_solve_chunk(*arg) for arg in args]
+                else:
+                    results = list(executor.map(_solve_chunk, *zip(*args)))
+                for (first, last), (turns, moves, played) in zip(chunks, results):
+                    expected[indices[first:last]] = turns
+                    choices[indices[first:last]] = moves
+                    window[layer % len(window), first:last] = played
+                window.flush()
+                expected.flush()
+                choices.flush()
+                _write_header(path, mass, MAX_PROGRESS + 1 - layer)
+                if verbose:
+                    print(
+                        f"layer {layer}: {len(indices)} positions in "
+                        f"{time.perf_counter() - start:.2f} s"
+                    )
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        del expected, choices, window
+    if os.path.exists(window_path):
+        os.remove(window_path)
+    return RaceTablebase(path)
+
+
+def main(argv: Optional[List[str]] = None):
+    """Build a race tablebase from the command line."""
+    parser = argparse.ArgumentParser(description="Build the race tablebase.")
+    parser.add_argument("path", help="The path of the tablebase file.")
+    parser.add_argument("--mass", type=float, default=0.999)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+    start = time.perf_counter()
+    tablebase = generate(args.path, mass=args.mass, workers=args.workers, verbose=True)
+    print(
+        f"{POSITIONS} positions in {time.perf_counter() - start:.1f} s, "
+        f"{float(tablebase.expected[0]):.2f} expected turns from the first inner "
+        "square"
+    )
+
+
+if __name__ == "__main__":
+    main()
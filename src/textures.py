@@ -0,0 +1,88 @@
+import os
+from typing import Dict, Tuple
+import pygame
+
+from constants import IMG_CENTERS
+from piece import Piece, TiedPiece
+
+
+class TextureCache:
+    """A cache of the piece textures used while rendering. Every texture is loaded
+    from disk once, converted to the display's pixel format and pre-scaled for
+    every stack count in :py:data:`src.constants.IMG_CENTERS`, so that the render
+    loop never decodes or resamples an image.
+
+    Args:
+        sizes (Tuple[int, ...], optional): The texture sizes (in px) to be cached.
+            Defaults to (80, 128).
+    """
+
+    def __init__(self, sizes: Tuple[int, ...] = (80, 128)):
+        self.sizes = sizes
+        self._textures: Dict[Tuple[str, bool, int, int], pygame.Surface] = {}
+
+    @staticmethod
+    def texture_path(color: str, tied: bool, size: int = 80) -> str:
+        """Return the path to the texture of the given color, kind and size.
+
+        Args:
+            color (str): The color of the piece.
+            tied (bool): Whether the texture is for a TiedPiece.
+            size (int, optional): The size of the texture. Defaults to 80.
+
+        Returns:
+            str: The path to the texture.
+        """
+        name = f"Tied{color}" if tied else color
+        return os.path.join(f"assets/images/imgs-{size}px/{name}.png")
+
+    def preload(self, colors: list[str]):
+        """Load the textures of both the pieces and the TiedPieces of the given
+        colors for every cached size and stack count.
+
+        Args:
+            colors (list[str]): The colors of the players.
+        """
+        for color in colors:
+            for tied in (False, True):
+                for size in self.sizes:
+                    self._load(color, tied, size)
+
+    def get(self, piece: Piece | TiedPiece, size: int = 80, count: int = 1):
+        """Return the texture of the given piece, scaled to fit in a square that
+        contains count pieces.
+
+        Args:
+            piece (Piece | TiedPiece): The piece whose texture is requested.
+            size (int, optional): The size of the texture. Defaults to 80.
+            count (int, optional): The number of pieces on the piece's square.
+                Defaults to 1.
+
+        Returns:
+            pygame.Surface: The scaled texture.
+        """
+        key = (piece.color, piece.name == "TiedPiece", size, count)
+        texture = self._textures.get(key)
+        if texture is None:
+            self._load(*key[:3])
+            texture = self._textures[key]
+        return texture
+
+    def _load(self, color: str, tied: bool, size: int):
+        """Load a texture from disk and store a scaled copy of it for every stack
+        count in :py:data:`src.constants.IMG_CENTERS`.
+
+        Args:
+            color (str): The color of the piece.
+            tied (bool): Whether the texture is for a TiedPiece.
+            size (int): The size of the texture.
+        """
+        if (color, tied, size, 1) in self._textures:
+            return
+        img = pygame.image.load(self.texture_path(color, tied, size))
+        if pygame.display.get_surface() is not None:
+            img = img.convert_alpha()
+        for count in IMG_CENTERS:
+            self._textures[(color, tied, size, count)] = (
+                img if count == 1 else pygame.transform.rotozoom(img, 0, count**-0.5)
+            )
@@ -0,0 +1,38 @@
+from typing import Any, List, Tuple
+
+# The kinds of changes an UndoRecord holds.
+ADD_PIECE = 0  # (ADD_PIECE, square, piece)
+REMOVE_PIECE = 1  # (REMOVE_PIECE, square, piece, index in the square's pieces)
+SET_ATTR = 2  # (SET_ATTR, obj, attribute name, previous value or MISSING)
+SET_ITEM = 3  # (SET_ITEM, dict, key, previous value)
+APPEND_ROLL = 4  # (APPEND_ROLL, value)
+REMOVE_ROLL = 5  # (REMOVE_ROLL, value, index in the roll)
+
+# The previous value of an attribute that did not exist.
+MISSING = object()
+
+
+class UndoRecord:
+    """The changes a move made to a board, in the order they were made, so that
+    :py:meth:`src.board.Board.unmake_move` can revert exactly those changes.
+
+    Args:
+        piece (Piece | TiedPiece, optional): The piece that was moved.
+        move (Move, optional): The move that was made.
+        zobrist (int, optional): The Zobrist hash of the board before the move.
+            Defaults to 0.
+    """
+
+    __slots__ = ("piece", "move", "zobrist", "changes")
+
+    def __init__(self, piece=None, move=None, zobrist: int = 0):
+        self.piece = piece
+        self.move = move
+        self.zobrist = zobrist
+        self.changes: List[Tuple[Any, ...]] = []
+
+    def __len__(self) -> int:
+        return len(self.changes)
+
+    def __repr__(self) -> str:
+        return f"UndoRecord({self.move}, {len(self.changes)} changes)"
@@ -0,0 +1,78 @@
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Tuple
+import numpy as np
+
+from constants import ROLL_VALUES, SQUARES
+
+# Keys are summed modulo 2**64 rather than XORed, so that identical pieces sharing
+# a square and repeated values in a roll do not cancel each other out.
+HASH_MASK = (1 << 64) - 1
+
+# The seed the keys are drawn from, so that hashes are stable across processes.
+ZOBRIST_SEED = 0x5EED
+
+# The kinds of piece that get a key of their own.
+SINGLE = 0
+TIED = 1
+PINNED = 2  # A single piece that shares its square with an enemy TiedPiece.
+
+
+@dataclass(frozen=True)
+class ZobristKeys:
+    """The random keys that make up the Zobrist hash of a board with a given
+    number of players. Keys are built once per player count by
+    :py:func:`get_zobrist_keys` and shared by every board.
+
+    The hash of a position is the sum, modulo 2**64, of the key of every piece on
+    its square, of every set capture flag, of every value in the pending roll and
+    of the player to move.
+
+    Args:
+        number_of_players (int): The number of players.
+        pieces (Tuple[Tuple[Tuple[int, ...], ...], ...]): The key of a piece of
+            every player, of every kind (SINGLE, TIED, PINNED), on every flat square
+            index.
+        captured (Tuple[int, ...]): The key of every player's capture flag.
+        roll (Tuple[int, ...]): The key of every roll value, indexed by the value.
+        to_move (Tuple[int, ...]): The key of every player being the one to move.
+    """
+
+    number_of_players: int
+    pieces: Tuple[Tuple[Tuple[int, ...], ...], ...]
+    captured: Tuple[int, ...]
+    roll: Tuple[int, ...]
+    to_move: Tuple[int, ...]
+
+
+@lru_cache(maxsize=None)
+def get_zobrist_keys(number_of_players: int) -> ZobristKeys:
+    """Return the Zobrist keys of a game with the given number of players. The
+    keys are drawn on the first call for a player count and shared after.
+
+    Args:
+        number_of_players (int): The number of players.
+
+    Returns:
+        ZobristKeys: The keys.
+    """
+    rng = np.random.default_rng((ZOBRIST_SEED, number_of_players))
+
+    def draw(*shape: int) -> list:
+        return rng.integers(
+            0, HASH_MASK, size=shape, dtype=np.uint64, endpoint=True
+        ).tolist()
+
+    roll = [0] * (max(ROLL_VALUES) + 1)
+    for value, key in zip(ROLL_VALUES, draw(len(ROLL_VALUES))):
+        roll[value] = key
+    return ZobristKeys(
+        number_of_players=number_of_players,
+        pieces=tuple(
+            tuple(tuple(squares) for squares in kinds)
+            for kinds in draw(number_of_players, 3, SQUARES)
+        ),
+        captured=tuple(draw(number_of_players)),
+        roll=tuple(roll),
+        to_move=tuple(draw(number_of_players)),
+    )
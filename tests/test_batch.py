@@ -0,0 +1,8 @@
+import pytest
+
+from batch import validate
+
+
+@pytest.mark.parametrize("number_of_players", [2, 3, 4])
+def test_validate(number_of_players):
+    assert validate(games=20, number_of_players=number_of_players, seed=1) > 0
@@ -0,0 +1,116 @@
+import io
+
+import numpy as np
+import pytest
+
+from board import Board
+from piece import PieceColor
+from policies import RandomPolicy
+from records import (
+    GameRecordWriter,
+    RecordFormatError,
+    decode,
+    read_records,
+    replay,
+)
+from rolls import RandomRollSource
+
+
+def play(writer, number_of_players, seed, stored_rolls):
+    """Play a random game, record it and return the states after every move."""
+    players = list(PieceColor.__members__.keys())[:number_of_players]
+    rolls = RandomRollSource(seed)
+    if stored_rolls:
+        writer.start_game(number_of_players)
+        rolls = writer.roll_source(rolls)
+    else:
+        writer.start_game(number_of_players, seed=seed)
+    board = Board(players, roll_source=rolls)
+    rng = np.random.default_rng(seed)
+    policy = RandomPolicy()
+    states = []
+    finished = []
+    seat = 0
+    while len(finished) < number_of_players - 1:
+        player = players[seat]
+        board.kawade()
+        while board.roll:
+            moves = board.legal_moves(player)
+            if not moves:
+                break
+            choice = policy.choose(board, player, moves, rng)
+            writer.record_move(moves, choice)
+            board.move(choice.piece, choice.move)
+            states.append(board.to_state(player))
+            if board.has_player_finished(player):
+                finished.append(seat)
+                break
+        board.roll = []
+        board.clear_enemy_pieces_with_player_tied_piece(player)
+        writer.end_turn()
+        seat = (seat + 1) % number_of_players
+        while seat in finished:
+            seat = (seat + 1) % number_of_players
+    writer.end_game()
+    return states
+
+
+@pytest.mark.parametrize("move_index", [False, True])
+@pytest.mark.parametrize("stored_rolls", [False, True])
+@pytest.mark.parametrize("number_of_players", [2, 4])
+def test_replay(number_of_players, stored_rolls, move_index):
+    stream = io.BytesIO()
+    writer = GameRecordWriter(stream, move_index=move_index)
+    games = [play(writer, number_of_players, seed, stored_rolls) for seed in range(3)]
+    stream.seek(0)
+    records = list(read_records(stream))
+    assert len(records) == len(games)
+    for record, states in zip(records, games):
+        replayed = [
+            replayed.board.to_state(replayed.player) for replayed in replay(record)
+        ]
+        assert replayed == states
+
+
+def test_decode_without_a_board():
+    stream = io.BytesIO()
+    states = play(GameRecordWriter(stream), 3, 0, stored_rolls=True)
+    stream.seek(0)
+    (record,) = read_records(stream)
+    turns = list(decode(record))
+    assert len(turns) == record.turns
+    assert sum(len(turn.moves) for turn in turns) == len(states)
+    assert all(turn.throws for turn in turns)
+    # Captures give bonus rolls.
+    assert any(len(turn.throws) > 1 for turn in turns)
+
+
+def test_decode_needs_path_aliases():
+    stream = io.BytesIO()
+    play(GameRecordWriter(stream, move_index=True), 2, 0, stored_rolls=False)
+    stream.seek(0)
+    (record,) = read_records(stream)
+    with pytest.raises(RecordFormatError):
+        list(decode(record))
+
+
+def test_replay_under_other_rules():
+    stream = io.BytesIO()
+    states = play(GameRecordWriter(stream), 2, 0, stored_rolls=False)
+    stream.seek(0)
+    (record,) = read_records(stream)
+    record.rule_version -= 1
+    assert len(list(replay(record))) == len(states)
+    record.move_index = True
+    with pytest.raises(RecordFormatError):
+        list(replay(record))
+
+
+def test_read_format_version_1():
+    stream = io.BytesIO()
+    states = play(GameRecordWriter(stream, move_index=True), 2, 0, stored_rolls=False)
+    data = bytearray(stream.getvalue())
+    data[4] = 1
+    (record,) = read_records(io.BytesIO(bytes(data)))
+    assert record.move_index
+    assert len(list(replay(record))) == len(states)
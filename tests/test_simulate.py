@@ -0,0 +1,33 @@
+import pytest
+
+from policies import RandomPolicy
+from simulate import simulate
+
+
+class FailingPolicy(RandomPolicy):
+    def choose(self, board, player, moves, rng):
+        raise RuntimeError("Broken policy.")
+
+
+@pytest.mark.parametrize("number_of_players", [3, 4])
+def test_games_do_not_fail(number_of_players):
+    # Games of more than two players reach the captures of TiedPieces by
+    # TiedPieces that leave a square.
+    report = simulate(300, number_of_players, workers=1)
+    assert report.games == 300
+    assert not report.failures
+
+
+def test_errors_propagate():
+    with pytest.raises(RuntimeError):
+        simulate(2, policies=[FailingPolicy()], workers=1)
+
+
+def test_failed_games_are_left_out_of_the_totals():
+    report = simulate(
+        4, policies=[RandomPolicy(), FailingPolicy()], workers=1, keep_going=True
+    )
+    assert report.games == 0
+    assert len(report.failures) == 4
+    assert all("RuntimeError" in error for _, error in report.failures)
+    assert report.win_rates == [0.0, 0.0]
@@ -0,0 +1,21 @@
+import pytest
+
+from board import Board
+from state import BoardState
+from tablebase import RaceTablebase
+
+
+def race_board(number_of_players):
+    players = ["Red", "Green", "Blue", "Yellow"][:number_of_players]
+    state = BoardState(players)
+    state.tied[:] = -1
+    # Red has captured and has all of its pieces on the inner ring.
+    state.data[1] = 1
+    state.positions[0] = range(24, 24 + state.positions.shape[1])
+    return Board.from_state(state)
+
+
+@pytest.mark.parametrize("number_of_players, race", [(2, True), (3, False), (4, False)])
+def test_is_race(number_of_players, race):
+    board = race_board(number_of_players)
+    assert RaceTablebase.is_race(board, "Red") == race